@@ -0,0 +1,286 @@
+# benchmarks of each stage of the pipeline on synthetic data of different sizes
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+import data
+import rounds
+import rankings
+import ratings
+import synthetic
+
+# (number of years, number of single elimination tournaments each year)
+DEFAULT_SIZES = [(3, 20), (6, 40), (12, 60)]
+
+# the undamped WbW iteration can cycle forever on some data instead of settling
+# on a ranking order or on its scores, so each ranking stops after this many 
+# iterations; the number of rankings that stopped there is saved with the times
+MAX_ITERATIONS = 1000
+
+# tolerance of the assign_wbw_rankings run that stops on the change in scores
+TOLERANCE = 1e-8
+
+# file the results of each run are added to, in a folder ignored by git
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "benchmark-results", "results.json")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Times each stage of the pipeline " +
+                                     "on synthetic data and saves the results")
+    parser.add_argument("--sizes", nargs = "+", default = None,
+                        help = "data sizes as YEARSxTOURNAMENTS, such as 6x40")
+    parser.add_argument("--repeats", type = int, default = 1,
+                        help = "times to run each stage; the fastest time is kept")
+    parser.add_argument("--results", default = RESULTS_FILE,
+                        help = "json file the results are added to")
+    parser.add_argument("--threshold", type = float, default = 1.25,
+                        help = "slowdown compared to the last run reported as a regression")
+    parser.add_argument("--full-wbw", action = "store_true",
+                        help = "also time assign_wbw_rankings without the window")
+    args = parser.parse_args()
+
+    sizes = DEFAULT_SIZES
+    if args.sizes != None:
+        sizes = [tuple(int(n) for n in size.split("x")) for size in args.sizes]
+
+    run = run_benchmarks(sizes, repeats = args.repeats, full_wbw = args.full_wbw)
+    previous_runs = load_results(args.results)
+    for size in run["Sizes"]:
+        print(str(size["Years"]) + " years x " + str(size["Tournaments"]) +
+              " tournaments, " + str(size["Rows"]) + " rows")
+        for stage, seconds in size["Stages"].items():
+            capped = ""
+            if stage in size["Capped"].keys() and size["Capped"][stage] > 0:
+                capped = (", " + str(size["Capped"][stage]) + " rankings stopped at " +
+                          str(MAX_ITERATIONS) + " iterations")
+            print("    " + stage + ": " + str(round(seconds, 3)) + " s" + capped)
+    for regression in find_regressions(run, previous_runs, threshold = args.threshold):
+        print("REGRESSION " + regression)
+    save_results(args.results, previous_runs + [run])
+
+def time_stage(function, repeats = 1, setup = None):
+    """
+    Times a function, keeping the fastest of repeats runs
+
+    Parameters
+    ----------
+    function : function
+        function to time, called with the value returned by setup
+    repeats : int, optional
+        number of times to run the function. The default is 1.
+    setup : function, optional
+        function called before each run, not timed, whose return value is
+        passed to function. The default is None.
+
+    Returns
+    -------
+    best : float
+        the fastest run in seconds
+    result
+        value returned by the last run of function
+    """
+    best = None
+    for i in range(repeats):
+        argument = setup() if setup != None else None
+        start = time.perf_counter()
+        result = function(argument)
+        seconds = time.perf_counter() - start
+        if best == None or seconds < best:
+            best = seconds
+    return best, result
+
+def run_assign_wbw_rankings(list_of_dicts, options):
+    """
+    Runs assign_wbw_rankings with at most MAX_ITERATIONS iterations for each
+    ranking
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries
+        the matches to rank
+    options : dictionary
+        other keyword arguments of assign_wbw_rankings
+
+    Returns
+    -------
+    iteration_log : list of dictionaries
+        the iteration log of assign_wbw_rankings
+    """
+    iteration_log = []
+    rankings.assign_wbw_rankings(list_of_dicts, max_iterations = MAX_ITERATIONS,
+                                 iteration_log = iteration_log, **options)
+    return iteration_log
+
+def benchmark_size(num_years, tournaments_per_year, repeats = 1, full_wbw = False):
+    """
+    Generates synthetic data of one size and times each stage of the pipeline
+    on it: get_and_parse_data, assign_rounds, wbw over the last year of
+    matches, assign_wbw_rankings with the default stopping rule and with a 
+    tolerance of TOLERANCE, stopping each ranking after MAX_ITERATIONS 
+    iterations, and assign_elo_ratings
+
+    Parameters
+    ----------
+    num_years : int
+        number of years of data, starting in 2007
+    tournaments_per_year : int
+        number of single elimination tournaments each year
+    repeats : int, optional
+        number of times to run each stage; the fastest time is kept. The
+        default is 1.
+    full_wbw : Boolean, optional
+        whether to also time assign_wbw_rankings without the window, which is
+        much slower. The default is False.
+
+    Returns
+    -------
+    dictionary
+        dictionary with the number of years and tournaments under "Years" and
+        "Tournaments," the number of matches under "Rows," a dictionary of
+        stage name: seconds under "Stages," and a dictionary of stage name: 
+        number of rankings that stopped because they reached MAX_ITERATIONS
+        under "Capped" for the WbW stages
+    """
+    years = list(range(2007, 2007 + num_years))
+    stages = {}
+    capped = {}
+    original_dir = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        file_names = synthetic.generate_data(os.path.join(work_dir, "assignment-final-data"),
+                                             years, tournaments_per_year)
+        # get_and_parse_data reads from the working directory
+        os.chdir(work_dir)
+        try:
+            stages["get_and_parse_data"], list_of_dicts = time_stage(
+                lambda arg: data.get_and_parse_data(file_names, years), repeats)
+        finally:
+            os.chdir(original_dir)
+
+    stages["assign_rounds"], result = time_stage(
+        lambda rows: rounds.assign_rounds(rows), repeats,
+        setup = lambda: [dict(dic) for dic in list_of_dicts])
+    rounds.assign_rounds(list_of_dicts)
+
+    last_year = [dic for dic in list_of_dicts if dic["End date"].year == years[-1]]
+    stages["wbw"], result = time_stage(
+        lambda arg: rankings.wbw(last_year, max_iterations = MAX_ITERATIONS,
+                                 return_info = True), repeats)
+    capped["wbw"] = int(result[2]["Iterations"] >= MAX_ITERATIONS)
+
+    wbw_stages = [("assign_wbw_rankings windowed", {"windowed": True}),
+                  ("assign_wbw_rankings windowed tolerance", {"windowed": True,
+                                                              "tolerance": TOLERANCE})]
+    if rankings.np != None:
+        wbw_stages.append(("assign_wbw_rankings windowed numpy", {"windowed": True,
+                                                                  "backend": "numpy"}))
+    if full_wbw:
+        wbw_stages.append(("assign_wbw_rankings", {}))
+    for stage, options in wbw_stages:
+        stages[stage], iteration_log = time_stage(
+            lambda rows: run_assign_wbw_rankings(rows, options), repeats,
+            setup = lambda: [dict(dic) for dic in list_of_dicts])
+        capped[stage] = len([entry for entry in iteration_log if 
+                             entry["Iterations"] >= MAX_ITERATIONS])
+
+    stages["assign_elo_ratings"], result = time_stage(
+        lambda rows: ratings.assign_elo_ratings(rows), repeats,
+        setup = lambda: [dict(dic) for dic in list_of_dicts])
+
+    return {"Years": num_years, "Tournaments": tournaments_per_year,
+            "Rows": len(list_of_dicts), "Stages": stages, "Capped": capped}
+
+def run_benchmarks(sizes, repeats = 1, full_wbw = False):
+    """
+    Runs benchmark_size for each size
+
+    Parameters
+    ----------
+    sizes : list of tuples
+        (number of years, number of tournaments each year) tuples
+    repeats : int, optional
+        number of times to run each stage. The default is 1.
+    full_wbw : Boolean, optional
+        whether to also time assign_wbw_rankings without the window. The
+        default is False.
+
+    Returns
+    -------
+    dictionary
+        dictionary with when the benchmarks were run under "Date," the Python
+        version and machine under "Python" and "Machine," and the result of
+        benchmark_size for each size under "Sizes"
+    """
+    return {"Date": datetime.now().isoformat(timespec = "seconds"),
+            "Python": platform.python_version(), "Machine": platform.machine(),
+            "Sizes": [benchmark_size(num_years, tournaments_per_year, repeats = repeats,
+                                     full_wbw = full_wbw) for
+                      num_years, tournaments_per_year in sizes]}
+
+def load_results(file_path):
+    """
+    Loads the list of previous runs from a results file, or an empty list if
+    there is no results file
+    """
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path) as f:
+        return json.load(f)
+
+def save_results(file_path, runs):
+    """
+    Saves the list of runs to a results file, making its folder if needed
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok = True)
+    with open(file_path, "w") as f:
+        json.dump(runs, f, indent = 2)
+
+def find_regressions(run, previous_runs, threshold = 1.25):
+    """
+    Compares a run with the last previous run on the same machine and Python
+    version, finding stages that got slower
+
+    Parameters
+    ----------
+    run : dictionary
+        run as made by run_benchmarks
+    previous_runs : list of dictionaries
+        earlier runs, oldest first
+    threshold : float, optional
+        how many times slower a stage has to be to count as a regression. The
+        default is 1.25.
+
+    Returns
+    -------
+    regressions : list of strings
+        a description of each stage that got slower
+    """
+    regressions = []
+    comparable = [previous for previous in previous_runs if
+                  previous["Python"] == run["Python"] and
+                  previous["Machine"] == run["Machine"]]
+    if len(comparable) == 0:
+        return regressions
+    previous_sizes = {(size["Years"], size["Tournaments"]): size for
+                      size in comparable[-1]["Sizes"]}
+
+    for size in run["Sizes"]:
+        key = (size["Years"], size["Tournaments"])
+        if key not in previous_sizes.keys():
+            continue
+        for stage, seconds in size["Stages"].items():
+            previous_seconds = previous_sizes[key]["Stages"].get(stage)
+            if previous_seconds != None and seconds > previous_seconds * threshold:
+                regressions.append(stage + " on " + str(key[0]) + " years x " +
+                                   str(key[1]) + " tournaments took " +
+                                   str(round(seconds, 3)) + " s, up from " +
+                                   str(round(previous_seconds, 3)) + " s on " +
+                                   comparable[-1]["Date"])
+    return regressions
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# functions for building and querying the bracket of each tournament
+
+import data
+
+def main():
+    pass
+
+def build_bracket(list_of_dicts, start, end):
+    """
+    Builds the bracket tree of one tournament from matches that have already
+    been assigned rounds. Each match is a node pointing to the two matches, one
+    for each player, that fed into it and to the match its winner played next.
+    Group stage and third place matches are kept outside of the tree.
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Tournament," "Start date," "Winner," "Loser," "Round number,"
+        and "Round name"
+    start : int
+        index of list_of_dicts of the first match in the tournament
+    end : int
+        index of list_of_dicts of the last match in the tournament
+
+    Returns
+    -------
+    bracket : dictionary
+        dictionary with the tournament's name under "Tournament," its start
+        date under "Start date," the final's node under "Final," the third
+        place match's node or None under "Third place match," the group stage
+        matches' nodes under "Group stage," every node in the order of the
+        data under "Matches," dictionaries of player name: node of their first
+        and last match in the tree under "First match" and "Last match," and
+        the players whose first match in the tree was after round 1 under
+        "Byes." Each node is a dictionary with the match's index in
+        list_of_dicts under "Index," its "Round number," "Round name,"
+        "Winner," and "Loser," a list of the winner's and the loser's previous
+        matches (None for a bye or the first round) under "Feeders," and the
+        winner's next match (None for the final) under "Parent"
+    """
+    bracket = {"Tournament": list_of_dicts[start]["Tournament"],
+               "Start date": list_of_dicts[start]["Start date"],
+               "Final": None, "Third place match": None, "Group stage": [],
+               "Matches": [], "First match": {}, "Last match": {}, "Byes": []}
+
+    # make a node for each match, keeping the nodes of each round together
+    nodes_by_round = {}
+    for i in range(start, end + 1):
+        node = {"Index": i, "Round number": list_of_dicts[i]["Round number"],
+                "Round name": list_of_dicts[i]["Round name"],
+                "Winner": list_of_dicts[i]["Winner"], "Loser": list_of_dicts[i]["Loser"],
+                "Feeders": [None, None], "Parent": None}
+        bracket["Matches"].append(node)
+        if node["Round name"] == "Round Robin":
+            bracket["Group stage"].append(node)
+        elif node["Round name"] == "Third Place Match":
+            bracket["Third place match"] = node
+        else:
+            if node["Round number"] not in nodes_by_round.keys():
+                nodes_by_round[node["Round number"]] = []
+            nodes_by_round[node["Round number"]].append(node)
+
+    # link the rounds from the first to the last; a player's previous match is
+    # the last match they won
+    last_won = {}
+    for round_number in sorted(nodes_by_round.keys()):
+        for node in nodes_by_round[round_number]:
+            for position, player in enumerate((node["Winner"], node["Loser"])):
+                if player in last_won.keys():
+                    feeder = last_won.pop(player)
+                    node["Feeders"][position] = feeder
+                    feeder["Parent"] = node
+                else:
+                    bracket["First match"][player] = node
+                    if round_number > 1 and len(bracket["Group stage"]) == 0:
+                        bracket["Byes"].append(player)
+                bracket["Last match"][player] = node
+            last_won[node["Winner"]] = node
+            bracket["Final"] = node
+
+    # the third place match is played by the losers of the semifinals
+    third_place_match = bracket["Third place match"]
+    if third_place_match != None:
+        for position, player in enumerate((third_place_match["Winner"],
+                                           third_place_match["Loser"])):
+            if player in bracket["Last match"].keys():
+                third_place_match["Feeders"][position] = bracket["Last match"][player]
+
+    return bracket
+
+def build_brackets(list_of_dicts, tournament_index = None):
+    """
+    Builds the bracket tree of every tournament in the data
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data that have already been
+        assigned rounds - each dictionary must have keys "Tournament,"
+        "Start date," "Winner," "Loser," "Round number," and "Round name"
+    tournament_index : list of dictionaries, optional
+        where each tournament starts and ends in list_of_dicts, as made by
+        data.build_tournament_index. The default is None, which builds it.
+
+    Returns
+    -------
+    brackets : dictionary
+        dictionary with key: value pairs of (tournament, start date): bracket
+        as made by build_bracket
+    """
+    if tournament_index == None:
+        tournament_index = data.build_tournament_index(list_of_dicts)
+
+    brackets = {}
+    for tournament in tournament_index:
+        brackets[(tournament["Tournament"], tournament["Start date"])] = build_bracket(
+            list_of_dicts, tournament["Start"], tournament["End"])
+
+    return brackets
+
+def path_to_final(bracket, player):
+    """
+    Finds the matches from a player's first match in the bracket up to the
+    final, following the winner of each match
+
+    Parameters
+    ----------
+    bracket : dictionary
+        bracket as made by build_bracket
+    player : string
+        name of the player
+
+    Returns
+    -------
+    path : list of dictionaries
+        nodes of the matches in round order; the player played in the first
+        ones, up to their last match, and the rest are the matches they would
+        have played had they kept winning
+    """
+    path = []
+    node = bracket["First match"][player]
+    while node != None:
+        path.append(node)
+        node = node["Parent"]
+    return path
+
+def players_beaten(bracket, player):
+    """
+    Finds the players that a player beat in the bracket, in round order
+
+    Parameters
+    ----------
+    bracket : dictionary
+        bracket as made by build_bracket
+    player : string
+        name of the player
+
+    Returns
+    -------
+    beaten : list of strings
+        names of the players beaten by player, from the first round they
+        played to the last; a third place match or group stage is not included
+    """
+    beaten = []
+    node = bracket["Last match"][player]
+    # the winner's previous match is always the first feeder
+    if node["Winner"] != player:
+        node = node["Feeders"][1]
+    while node != None:
+        beaten.append(node["Loser"])
+        node = node["Feeders"][0]
+    beaten.reverse()
+    return beaten
+
+def bracket_section(bracket, player, round_number):
+    """
+    Finds the section of the draw a player was in, as the match of the given
+    round that the winner of the player's section played
+
+    Parameters
+    ----------
+    bracket : dictionary
+        bracket as made by build_bracket
+    player : string
+        name of the player
+    round_number : int
+        round deciding the section; for example, the semifinal round gives the
+        player's half of the draw
+
+    Returns
+    -------
+    dictionary or None
+        node of the match in round round_number above the player's first
+        match, or None if the player's first match was after that round
+    """
+    node = bracket["First match"][player]
+    while node != None and node["Round number"] < round_number:
+        node = node["Parent"]
+    if node == None or node["Round number"] != round_number:
+        return None
+    return node
+
+def section_players(node):
+    """
+    Lists the players in the section of the draw below a match
+
+    Parameters
+    ----------
+    node : dictionary
+        node of a match in a bracket as made by build_bracket
+
+    Returns
+    -------
+    players : list of strings
+        names of the players that played in the match or any match that fed
+        into it
+    """
+    players = []
+    to_visit = [node]
+    while len(to_visit) != 0:
+        current = to_visit.pop()
+        for position, player in enumerate((current["Winner"], current["Loser"])):
+            feeder = current["Feeders"][position]
+            if feeder == None:
+                players.append(player)
+            else:
+                to_visit.append(feeder)
+    return players
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# functions for caching parsed data on disk
+
+import os
+import pickle
+import hashlib
+
+# change when the format of the cache files changes so old ones are ignored
+CACHE_VERSION = 2
+
+def main():
+    pass
+
+def file_fingerprint(file_path):
+    """
+    Gets the details of a file used to tell whether it has changed without
+    reading it
+
+    Parameters
+    ----------
+    file_path : string
+        path to the file
+
+    Returns
+    -------
+    dictionary
+        dictionary with the absolute path under "Path," the size in bytes
+        under "Size," and the modification time in nanoseconds under "Mtime"
+    """
+    stats = os.stat(file_path)
+    return {"Path": os.path.abspath(file_path), "Size": stats.st_size,
+            "Mtime": stats.st_mtime_ns}
+
+def file_hash(file_path):
+    """
+    Calculates the SHA-256 hash of a file's contents
+
+    Parameters
+    ----------
+    file_path : string
+        path to the file
+
+    Returns
+    -------
+    string
+        hexadecimal digest of the file's contents
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def cache_file_path(cache_dir, file_path, year):
+    """
+    Gets the path of the cache file for one data file
+
+    Parameters
+    ----------
+    cache_dir : string
+        folder the cache files are kept in
+    file_path : string
+        path to the data file
+    year : int
+        year the matches in the data file take place
+
+    Returns
+    -------
+    string
+        path to the cache file, named after the data file, the year, and a
+        hash of the data file's absolute path
+    """
+    path_hash = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, os.path.basename(file_path) + "-" + str(year) +
+                        "-" + path_hash + ".pickle")
+
+def load_cached_rows(cache_dir, file_path, year, parser_key = "", with_extra = False):
+    """
+    Loads the parsed rows of a data file from the cache if the cache file was
+    made from the same version of the data file by the same version of the
+    parser. The data file is only hashed if its size or modification time
+    changed since the cache file was made.
+
+    Parameters
+    ----------
+    cache_dir : string
+        folder the cache files are kept in
+    file_path : string
+        path to the data file
+    year : int
+        year the matches in the data file take place
+    parser_key : string, optional
+        string identifying the parser and anything else the parsed rows depend
+        on, such as the data corrections. The default is "".
+    with_extra : Boolean, optional
+        If True, also return what was saved with the rows under extra in
+        save_cached_rows. The default is False.
+
+    Returns
+    -------
+    list of dictionaries or None
+        the parsed rows, or None if there is no valid cache file
+    extra
+        Only returned if with_extra is True; what was saved with the rows, or
+        None if there is no valid cache file
+    """
+    cache_path = cache_file_path(cache_dir, file_path, year)
+    if not os.path.exists(cache_path):
+        return (None, None) if with_extra else None
+
+    fingerprint = file_fingerprint(file_path)
+
+    try:
+        with open(cache_path, "rb") as f:
+            # the small header is read first so a stale cache file is rejected
+            # without loading its rows
+            header = pickle.load(f)
+            if (header["Version"] != CACHE_VERSION or header["Year"] != year or
+                header["Parser"] != parser_key or
+                header["Path"] != fingerprint["Path"]):
+                return (None, None) if with_extra else None
+            unchanged = (header["Size"] == fingerprint["Size"] and
+                         header["Mtime"] == fingerprint["Mtime"])
+            content_hash = None
+            if not unchanged:
+                content_hash = file_hash(file_path)
+                if content_hash != header["Hash"]:
+                    return (None, None) if with_extra else None
+            # load the rows with one bulk read
+            rows = pickle.loads(f.read())
+    except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+        return (None, None) if with_extra else None
+
+    # the file was touched but its contents are the same, so update the
+    # header to avoid hashing it again next time
+    if content_hash != None:
+        save_cached_rows(cache_dir, file_path, year, rows, parser_key = parser_key,
+                         content_hash = content_hash, extra = header["Extra"])
+
+    if with_extra:
+        return rows, header["Extra"]
+    return rows
+
+def save_cached_rows(cache_dir, file_path, year, rows, parser_key = "",
+                     content_hash = None, extra = None):
+    """
+    Saves the parsed rows of a data file to the cache
+
+    Parameters
+    ----------
+    cache_dir : string
+        folder the cache files are kept in; made if it does not exist
+    file_path : string
+        path to the data file
+    year : int
+        year the matches in the data file take place
+    rows : list of dictionaries
+        the parsed rows of the data file
+    parser_key : string, optional
+        string identifying the parser and anything else the parsed rows depend
+        on. The default is "".
+    content_hash : string, optional
+        hash of the data file's contents if it has already been calculated.
+        The default is None.
+    extra : object, optional
+        anything else to keep with the rows, such as counts made while parsing
+        them; kept in the header, so it should be small. The default is None.
+
+    Returns
+    -------
+    None.
+    """
+    os.makedirs(cache_dir, exist_ok = True)
+    fingerprint = file_fingerprint(file_path)
+    if content_hash == None:
+        content_hash = file_hash(file_path)
+    header = {"Version": CACHE_VERSION, "Year": year, "Parser": parser_key,
+              "Path": fingerprint["Path"], "Size": fingerprint["Size"],
+              "Mtime": fingerprint["Mtime"], "Hash": content_hash, "Extra": extra}
+
+    # write to a temporary file first so an interrupted run cannot leave a
+    # broken cache file behind
+    cache_path = cache_file_path(cache_dir, file_path, year)
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(header, f, protocol = pickle.HIGHEST_PROTOCOL)
+        pickle.dump(rows, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,51 @@
 # functions for parsing the data
 
 import math
+from array import array
 from datetime import datetime
 import os
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from match_table import MatchTable
+import cache
+import instrumentation
+
+# change when the parsing, data corrections or added keys change so that 
+# cached parsed rows are not reused
+PARSER_VERSION = "2"
+
+# table of corrections to data errors, kept next to this file
+CORRECTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "data-corrections.csv")
+
+# corrections loaded from CORRECTIONS_FILE the first time they are needed
+corrections = None
+
+# table of the format of tournaments that are not plain single elimination
+# tournaments, kept next to this file
+FORMATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "tournament-formats.csv")
+
+# tournament formats that can be given in FORMATS_FILE
+TOURNAMENT_FORMATS = ("round robin", "single elimination")
+
+# formats loaded from FORMATS_FILE the first time they are needed
+tournament_formats = None
+
+# names of the set score columns, made once instead of for each row; a best
+# of 5 match has the most sets
+SET_COLUMNS = ["Set " + str(i) for i in range(1, 6)]
 
 def main():
     pass
 
-def parse_tennis_data_line(line_lst, col_names, year):
+def parse_tennis_data_line(line_lst, col_names, year, tournament_format = None):
     """
     Makes each line into a dictionary with key value pairs of col_names: 
         corresponding line_lst values. Also changes data types, fixes data 
-        errors and adds new keys, including winner and loser, and a round robin 
-        key whose value says whether the tournament has a round robin group stage
+        errors and adds new keys, including winner and loser, the tournament
+        format, and a round robin key whose value says whether the tournament 
+        has a round robin group stage
 
     Parameters
     ----------
@@ -25,6 +57,9 @@ def parse_tennis_data_line(line_lst, col_names, year):
         apprporiate values at the same index in line_lst; same length as line_lst
     year : int
         year the match happened
+    tournament_format : string, optional
+        format of the match's tournament if it has already been looked up. The
+        default is None, which looks it up with get_tournament_format.
 
     Returns
     -------
@@ -33,6 +68,25 @@ def parse_tennis_data_line(line_lst, col_names, year):
         col_names[i]: line_lst[i] for each i from 0 to the length of col_names
         line_lst minus one
     """
+    row_dict, rules = read_tennis_data_line(line_lst, col_names, year)
+    winner, loser = get_winner_loser(row_dict)
+    return finish_tennis_data_line(row_dict, rules, winner, loser, year, 
+                                   tournament_format = tournament_format)
+
+def read_tennis_data_line(line_lst, col_names, year):
+    """
+    Makes a line into a dictionary as parse_tennis_data_line does, up to 
+    finding the winner: the data types are changed and the names are 
+    corrected
+
+    Returns
+    -------
+    row_dict : dictionary
+        the line as a dictionary, without a winner and loser yet
+    rules : list of dictionaries
+        the corrections of the match, or None if it has none, to be passed 
+        to finish_tennis_data_line
+    """
     
     # set up dictionary with the column names as the keys and the data as the
     # values
@@ -51,39 +105,376 @@ def parse_tennis_data_line(line_lst, col_names, year):
     row_dict["Start date"] = datetime.strptime(row_dict["Start date"], "%Y-%m-%d")
     row_dict["End date"] = datetime.strptime(row_dict["End date"], "%Y-%m-%d")
     
+    # data errors are fixed by the rules in the corrections table, which are
+    # looked up by the year, tournament and players as listed in the data
+    rules = get_corrections().get((year, row_dict["Tournament"], row_dict["Player 1"],
+                                   row_dict["Player 2"]))
+    
     # name errors
-    # Sun T.T. and Kucova K. were listed as playing after losing in single elimination 
-    # tournaments with no third place match, and I learned one of the Sun T.T.s 
-    # was supposed to be Sun S. and one of the Kucova K.s was wupposed to be Kucova Z.
-    # I only noticed it when doing some tests the night before it was due and felt
-    # like that was too late to report it and make other people stressed about
-    # there being a change so late, so I'm sorry I didn't notice earlier and report it.
-    if (year == 2007 and row_dict["Tournament"] == "Internationaux de Strasbourg" and
-        row_dict["Player 1"] == "Sun T.T." and row_dict["Player 2"] == "Tanasugarn T."):
-        row_dict["Player 1"] = "Sun S."
-    if (year == 2010 and row_dict["Tournament"] == "Australian Open" and
-        row_dict["Player 1"] == "Dulko G." and row_dict["Player 2"] == "Kucova K."):
-        row_dict["Player 2"] = "Kucova Z."
-    # Hantuchova D. was listed as playing in the third round, in the third place
-    # match after loosing in the very first round, and it should have been Lisicki S.
-    if (year == 2011 and row_dict["Tournament"] == "Commonwealth Bank Tournament of Champions" and
-        row_dict["Player 1"] == "Hantuchova D." and row_dict["Player 2"] == "Petrova N."):
-        row_dict["Player 1"] = "Lisicki S."
+    if rules != None:
+        apply_corrections(row_dict, rules, "rename")
     
+    return row_dict, rules
+
+def finish_tennis_data_line(row_dict, rules, winner, loser, year, tournament_format = None):
+    """
+    Finishes a dictionary made by read_tennis_data_line, adding the winner and
+    loser found from the score or retirement, correcting the winner, and 
+    adding the tournament format
+
+    Returns
+    -------
+    row_dict : dictionary
+        the finished dictionary, as returned by parse_tennis_data_line
+    """
     # add winner and loser
-    row_dict["Winner"], row_dict["Loser"] = get_winner_loser(row_dict)
-    # Kurdermetova V. was the one to advance to the semifinals even though she 
-    # retired in the quarterfinals
-    if (year == 2020 and row_dict["Tournament"] == "Hobart International" and
-        row_dict["Player 1"] == "Muguruza G." and row_dict["Player 2"] == "Kudermetova V."):
-        row_dict["Winner"] = "Kudermetova V."
-        row_dict["Loser"] = "Muguruza G."
+    row_dict["Winner"], row_dict["Loser"] = winner, loser
+    
+    # winners that are not the winner by the score or retirement
+    if rules != None:
+        apply_corrections(row_dict, rules, "winner")
     
-    # add whether the tournament has round robin group stage
-    row_dict["Round robin tournament"] = get_round_robin_status(row_dict["Tournament"], year)
+    # add the tournament format and whether the tournament has round robin 
+    # group stage
+    if tournament_format == None:
+        tournament_format = get_tournament_format(row_dict["Tournament"], year)
+    row_dict["Tournament format"] = tournament_format
+    row_dict["Round robin tournament"] = tournament_format == "round robin"
     
     return row_dict
 
+def load_corrections(file_path):
+    """
+    Loads a table of corrections to data errors. Each row of the csv file has 
+    the "Year," "Tournament," "Player 1," and "Player 2" of the match as listed
+    in the data, an "Action" of "rename," which sets the "Player 1" or 
+    "Player 2" given under "Field" to "Value," or "winner," which makes "Value"
+    the winner and the other player the loser, and a "Note" explaining it.
+
+    Parameters
+    ----------
+    file_path : string
+        path to the csv file of corrections
+
+    Returns
+    -------
+    corrections_dict : dictionary
+        dictionary with key: value pairs of (year, tournament, player 1, 
+        player 2): list of rules for that match, where each rule is a 
+        dictionary with the row's "Action," "Field," "Value," and "Note" and a
+        count of how often it has been applied under "Times applied"
+    """
+    corrections_dict = {}
+    
+    with open(file_path) as f:
+        for row in csv.DictReader(f):
+            assertion_msg = ("unknown action " + row["Action"] + " in the corrections " +
+                             "for " + row["Tournament"] + " in " + row["Year"])
+            assert row["Action"] in ("rename", "winner"), assertion_msg
+            if row["Action"] == "rename":
+                assertion_msg = ("corrections can only rename Player 1 or Player 2, " +
+                                 "not " + row["Field"])
+                assert row["Field"] in ("Player 1", "Player 2"), assertion_msg
+            else:
+                assertion_msg = ("the winner " + row["Value"] + " is not one of the " +
+                                 "players in the correction for " + row["Tournament"] +
+                                 " in " + row["Year"])
+                assert row["Value"] in (row["Player 1"], row["Player 2"]), assertion_msg
+            
+            key = (int(row["Year"]), row["Tournament"], row["Player 1"], row["Player 2"])
+            rule = {"Action": row["Action"], "Field": row["Field"], 
+                    "Value": row["Value"], "Note": row["Note"], "Times applied": 0}
+            if key in corrections_dict.keys():
+                corrections_dict[key].append(rule)
+            else:
+                corrections_dict[key] = [rule]
+    
+    return corrections_dict
+
+def get_corrections():
+    """
+    Gets the corrections to data errors, loading them from CORRECTIONS_FILE 
+    the first time
+
+    Returns
+    -------
+    dictionary
+        corrections as returned by load_corrections
+    """
+    global corrections
+    if corrections == None:
+        corrections = load_corrections(CORRECTIONS_FILE)
+    return corrections
+
+def apply_corrections(row_dict, rules, action):
+    """
+    Applies the rules with the given action to a row, counting each time a 
+    rule is applied
+
+    Parameters
+    ----------
+    row_dict : dictionary
+        dictionary representing a row of data; must have keys "Player 1" and
+        "Player 2," and "Winner" and "Loser" if action is "winner"
+    rules : list of dictionaries
+        rules for the row's match as stored by load_corrections
+    action : string
+        "rename" or "winner," the action of the rules to apply
+
+    Returns
+    -------
+    None.
+    """
+    for rule in rules:
+        if rule["Action"] != action:
+            continue
+        if action == "rename":
+            row_dict[rule["Field"]] = rule["Value"]
+        else:
+            row_dict["Winner"] = rule["Value"]
+            if row_dict["Player 1"] == rule["Value"]:
+                row_dict["Loser"] = row_dict["Player 2"]
+            else:
+                row_dict["Loser"] = row_dict["Player 1"]
+        rule["Times applied"] += 1
+
+def correction_counts():
+    """
+    Gets how often each correction has been applied so far
+
+    Returns
+    -------
+    dictionary
+        dictionary with key: value pairs of (year, tournament, player 1, 
+        player 2, position of the rule in the match's rules): times applied,
+        for each rule that has been applied
+    """
+    return {key + (position,): rules[position]["Times applied"] for 
+            key, rules in get_corrections().items() for position in range(len(rules)) if
+            rules[position]["Times applied"] != 0}
+
+def add_correction_counts(counts):
+    """
+    Adds counts made by correction_counts, such as those of the rows parsed by
+    a worker process or loaded from the cache, to the corrections' counts in
+    this process
+
+    Parameters
+    ----------
+    counts : dictionary
+        counts as returned by correction_counts
+
+    Returns
+    -------
+    None.
+    """
+    rules_by_key = get_corrections()
+    for key, times_applied in counts.items():
+        rules = rules_by_key.get(key[:-1])
+        # corrections that have since been removed are not counted
+        if rules != None and key[-1] < len(rules):
+            rules[key[-1]]["Times applied"] += times_applied
+
+def corrections_report():
+    """
+    Reports how often each correction has been applied in this process, 
+    including to the rows parsed by worker processes or loaded from the cache
+    by parse_files.
+
+    Returns
+    -------
+    list of tuples
+        list of (year, tournament, player 1, player 2, action, value, times
+        applied) tuples, one for each correction
+    """
+    return [key + (rule["Action"], rule["Value"], rule["Times applied"]) for 
+            key, rules in get_corrections().items() for rule in rules]
+
+def iter_parsed_rows(file_path, year):
+    """
+    Reads a csv file one row at a time, yielding each row as a dictionary 
+    after adjusting data types, fixing data errors, and adding new variables
+
+    Parameters
+    ----------
+    file_path : string
+        relative file path to a csv file to be parsed
+    year : int
+        year the matches in the file take place
+
+    Yields
+    ------
+    dictionary
+        the next row of the csv file as a dictionary
+    """
+    col_names = []
+    # formats of the tournaments in the file, looked up once per tournament
+    formats = {}
+    
+    with open(file_path) as f:
+        
+        reader = csv.reader(f)
+        
+        for row in reader:
+        
+            # col_names will be defined in the first line and then will be used for
+            # the rest
+            if row[0] != "Tournament":
+                if row[0] not in formats.keys():
+                    formats[row[0]] = get_tournament_format(row[0], year)
+                yield parse_tennis_data_line(row, col_names, year, 
+                                             tournament_format = formats[row[0]])
+            else:
+                col_names = row
+
+def parse_one_file(file_path, year):
+    """
+    Makes each row in a csv file a dictionary, adjusts data types, fixes data
+    errors, and adds new variables, without moving any rows to leftovers. The
+    set scores of the whole file are decoded in one pass by decode_set_scores,
+    which gives the winners.
+
+    Parameters
+    ----------
+    file_path : string
+        relative file path to a csv file to be parsed
+    year : int
+        year the matches in the file take place
+
+    Returns
+    -------
+    list of dictionaries
+        all of the rows of the csv file as dictionaries, in the order they are
+        in the file
+    """
+    parsed_rows = []
+    all_rules = []
+    col_names = []
+    # formats of the tournaments in the file, looked up once per tournament
+    formats = {}
+    
+    with open(file_path) as f:
+        for row in csv.reader(f):
+            if row[0] != "Tournament":
+                row_dict, rules = read_tennis_data_line(row, col_names, year)
+                parsed_rows.append(row_dict)
+                all_rules.append(rules)
+            else:
+                col_names = row
+    
+    winner_indices = decode_set_scores(parsed_rows)["Winner index"]
+    for i in range(len(parsed_rows)):
+        row_dict = parsed_rows[i]
+        if row_dict["Tournament"] not in formats.keys():
+            formats[row_dict["Tournament"]] = get_tournament_format(row_dict["Tournament"], 
+                                                                    year)
+        if winner_indices[i] == 0:
+            winner, loser = row_dict["Player 1"], row_dict["Player 2"]
+        else:
+            winner, loser = row_dict["Player 2"], row_dict["Player 1"]
+        finish_tennis_data_line(row_dict, all_rules[i], winner, loser, year, 
+                                tournament_format = formats[row_dict["Tournament"]])
+    return parsed_rows
+
+def parse_one_file_counted(file_path, year):
+    """
+    Parses a csv file with parse_one_file, also finding how often each 
+    correction was applied to its rows, so the counts can be passed back from
+    a worker process or saved in the cache
+
+    Returns
+    -------
+    parsed_rows : list of dictionaries
+        the rows as returned by parse_one_file
+    counts : dictionary
+        counts of the corrections applied to the rows, as returned by
+        correction_counts
+    """
+    before = correction_counts()
+    parsed_rows = parse_one_file(file_path, year)
+    after = correction_counts()
+    return parsed_rows, {key: after[key] - before.get(key, 0) for key in after.keys() if
+                         after[key] != before.get(key, 0)}
+
+def iter_split_leftovers(parsed_rows, year, leftovers, new_leftovers):
+    """
+    Goes through the parsed rows of one year's file, yielding the matches of 
+    tournaments that ended that year, with the leftovers from the previous 
+    year yielded in front of the rest of their tournament, and adding the 
+    matches of tournaments that end the next year to new_leftovers
+
+    Parameters
+    ----------
+    parsed_rows : iterable of dictionaries
+        the rows of one year's csv file as parsed by parse_tennis_data_line
+    year : int
+        year the matches in the file take place
+    leftovers : list of dictionaries
+        list of dictionaries representing the rows from a previous file that
+        belong to tournaments that finish in this file
+    new_leftovers : list
+        list to add the rows of tournaments that end the next year to
+
+    Yields
+    ------
+    dictionary
+        the next row for a match of a tournament that ended in year
+    """
+    old_leftovers = leftovers
+    leftover_tournaments = set([dic["Tournament"] for dic in old_leftovers])
+    
+    for dict_to_append in parsed_rows:
+        
+        # add matches from tournaments that span this year and next year
+        # to leftovers instead of the data
+        if (dict_to_append["End date"].year == year and 
+            dict_to_append["End date"].month == 12 and 
+            dict_to_append["End date"].day == 31):
+            new_leftovers.append(dict_to_append)
+        
+        # if the match is a continuation of a tournament at the end of the 
+        # previous year and the old matches haven't been added to the data
+        # yet, add them first to preserve the order
+        elif dict_to_append["Tournament"] in leftover_tournaments:
+            for dic in old_leftovers:
+                if dic["Tournament"] == dict_to_append["Tournament"]:
+                    yield dic
+            leftover_tournaments.remove(dict_to_append["Tournament"])
+            yield dict_to_append
+        
+        else:
+            yield dict_to_append
+
+def split_leftovers(parsed_rows, year, leftovers):
+    """
+    Separates the parsed rows of one year's file into the matches of 
+    tournaments that ended that year, with the leftovers from the previous 
+    year put in front of the rest of their tournament, and the matches of 
+    tournaments that end the next year
+
+    Parameters
+    ----------
+    parsed_rows : list of dictionaries
+        the rows of one year's csv file as parsed by parse_one_file
+    year : int
+        year the matches in the file take place
+    leftovers : list of dictionaries
+        list of dictionaries representing the rows from a previous file that
+        belong to tournaments that finish in this file
+
+    Returns
+    -------
+    data_rows : list of dictionaries
+        the rows of the csv file as dictionaries for the matches of tournaments
+        that ended in year
+    new_leftovers : list of dictionaries
+        rows of the csv file as dictionaries for the matches of tournaments
+        that end the next year
+    """
+    new_leftovers = []
+    data_rows = list(iter_split_leftovers(parsed_rows, year, leftovers, new_leftovers))
+    return data_rows, new_leftovers
+
 def get_and_parse_one_file(file_path, year, leftovers):
     """
     Makes each row in a csv file a dictionary, adjusts data types, fixes data
@@ -108,48 +499,187 @@ def get_and_parse_one_file(file_path, year, leftovers):
         rows of the csv file as dictionaries for the matches of tournaments
         that end the next year
     """
-    data_rows = []
-    col_names = []
-    old_leftovers = leftovers
-    leftover_tournaments = set([dic["Tournament"] for dic in old_leftovers])
-    new_leftovers = []
+    return split_leftovers(parse_one_file(file_path, year), year, leftovers)
+
+def parser_cache_key():
+    """
+    Gets the string identifying this version of the parser in the cache of
+    parsed rows
+
+    Returns
+    -------
+    string
+        key stored with each cache file; cache files made with a different
+        key are parsed again
+    """
+    return ("parser " + PARSER_VERSION + " corrections " + cache.file_hash(CORRECTIONS_FILE) +
+            " formats " + cache.file_hash(FORMATS_FILE))
+
+def parse_files(file_paths, years, cache_dir = None, workers = None):
+    """
+    Parses each csv file in file_paths on its own, without moving any rows to
+    leftovers, loading the parsed rows from the cache where possible and 
+    parsing the rest in parallel if workers is more than 1
+
+    Parameters
+    ----------
+    file_paths : list of strings
+        paths to the csv files to be parsed
+    years : list of ints
+        years[i] is the year in which the matches in file_paths[i] took place
+    cache_dir : string, optional
+        folder to load cached parsed rows from and save newly parsed rows to.
+        The default is None, which does not cache.
+    workers : int, optional
+        number of processes to parse the files with. The default is None, 
+        which parses the files one after another in this process.
+
+    Returns
+    -------
+    all_parsed_rows : list of lists of dictionaries
+        all_parsed_rows[i] holds the parsed rows of file_paths[i]
+    """
+    all_parsed_rows = [None] * len(file_paths)
+    # counts of the corrections applied to each file, kept with its cache file
+    all_counts = [None] * len(file_paths)
     
-    with open(file_path) as f:
-        
-        reader = csv.reader(f)
-        
-        for row in reader:
+    if cache_dir != None:
+        for i in range(len(file_paths)):
+            all_parsed_rows[i], counts = cache.load_cached_rows(cache_dir, file_paths[i], 
+                                                                years[i], 
+                                                                parser_key = parser_cache_key(),
+                                                                with_extra = True)
+            if counts != None:
+                add_correction_counts(counts)
+    
+    to_parse = [i for i in range(len(file_paths)) if all_parsed_rows[i] == None]
+    instrumentation.count("Files loaded from cache", len(file_paths) - len(to_parse))
+    instrumentation.count("Files parsed", len(to_parse))
+    
+    if workers != None and workers > 1 and len(to_parse) > 1:
+        # each file is parsed in its own process; map returns the results in
+        # the order the files were given
+        with ProcessPoolExecutor(max_workers = min(workers, len(to_parse))) as executor:
+            results = executor.map(parse_one_file_counted, [file_paths[i] for i in to_parse],
+                                   [years[i] for i in to_parse])
+            for i, (parsed_rows, counts) in zip(to_parse, results):
+                all_parsed_rows[i] = parsed_rows
+                all_counts[i] = counts
+                # the workers' counts were made in their own processes
+                add_correction_counts(counts)
+    else:
+        for i in to_parse:
+            all_parsed_rows[i], all_counts[i] = parse_one_file_counted(file_paths[i], years[i])
+    
+    if cache_dir != None:
+        for i in to_parse:
+            cache.save_cached_rows(cache_dir, file_paths[i], years[i], all_parsed_rows[i],
+                                   parser_key = parser_cache_key(), extra = all_counts[i])
+    
+    return all_parsed_rows
+
+def build_tournament_index(list_of_dicts, first_row = 0):
+    """
+    Finds where each tournament starts and ends in the data, going through the
+    data once, so other functions can go straight to a tournament's matches 
+    instead of comparing "Tournament" values again. A tournament is a run of 
+    consecutive rows with the same "Tournament" value.
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Tournament," "Start date," "End date," "Player 1," and 
+        "Player 2"
+    first_row : int, optional
+        index of the row to start from, which must be the first match of a
+        tournament, so only the tournaments added after an earlier index was
+        built are indexed. The default is 0.
+
+    Returns
+    -------
+    tournament_index : list of dictionaries
+        one dictionary for each tournament, in the order they are in the data,
+        with the tournament's name under "Tournament," the indices of its first
+        and last (inclusive) matches under "Start" and "End," its start date
+        under "Start date," its latest end date under "End date," the number 
+        of players under "Draw size," and its format under "Format"
+    """
+    tournament_index = []
+    if len(list_of_dicts) <= first_row:
+        return tournament_index
+    
+    # compare ids and ordinals instead of names and dates for a MatchTable;
+    # the columns of a list of dictionaries are only made from first_row on,
+    # so column values are at i - offset
+    if isinstance(list_of_dicts, MatchTable):
+        offset = 0
+        tournaments = list_of_dicts.column("Tournament")
+        players1 = list_of_dicts.column("Player 1")
+        players2 = list_of_dicts.column("Player 2")
+        end_dates = list_of_dicts.column("End date")
+    else:
+        offset = first_row
+        rows = list_of_dicts[first_row:]
+        tournaments = [dic["Tournament"] for dic in rows]
+        players1 = [dic["Player 1"] for dic in rows]
+        players2 = [dic["Player 2"] for dic in rows]
+        end_dates = [dic["End date"] for dic in rows]
+    
+    start = first_row
+    players = set()
+    
+    for i in range(first_row, len(list_of_dicts)):
         
-            # col_names will be defined in the first line and then will be used for
-            # the rest
-            if row[0] != "Tournament":
-                dict_to_append = parse_tennis_data_line(row, col_names, year)
-            
-                # add matches from tournaments that span this year and next year
-                # to leftovers instead of the data
-                if (dict_to_append["End date"].year == year and 
-                    dict_to_append["End date"].month == 12 and 
-                    dict_to_append["End date"].day == 31):
-                    new_leftovers.append(dict_to_append)
-                
-                # if the match is a continuation of a tournament at the end of the 
-                # previous year and the old matches haven't been added to the data
-                # yet, add them first to preserve the order
-                elif dict_to_append["Tournament"] in leftover_tournaments:
-                    data_rows.extend([dic for dic in old_leftovers if dic["Tournament"] == 
-                                 dict_to_append["Tournament"]])
-                    leftover_tournaments.remove(dict_to_append["Tournament"])
-                    data_rows.append(dict_to_append)
-                
-                else:
-                    data_rows.append(dict_to_append)
+        players.add(players1[i - offset])
+        players.add(players2[i - offset])
         
+        # the tournament ends at the last row or before a different tournament
+        if (i == len(list_of_dicts) - 1 or 
+            tournaments[i + 1 - offset] != tournaments[i - offset]):
+            first_match = list_of_dicts[start]
+            if "Tournament format" in first_match.keys():
+                tournament_format = first_match["Tournament format"]
+            elif first_match["Round robin tournament"]:
+                tournament_format = "round robin"
             else:
-                col_names = row
-        
-    return data_rows, new_leftovers
+                tournament_format = "single elimination"
+            end_date = max([end_dates[j - offset] for j in range(start, i + 1)])
+            if isinstance(list_of_dicts, MatchTable):
+                end_date = datetime.fromordinal(end_date)
+            tournament_index.append({"Tournament": first_match["Tournament"],
+                                     "Start": start, "End": i,
+                                     "Start date": first_match["Start date"],
+                                     "End date": end_date,
+                                     "Draw size": len(players),
+                                     "Format": tournament_format})
+            start = i + 1
+            players = set()
+    
+    return tournament_index
+
+def index_by_tournament(tournament_index):
+    """
+    Makes a dictionary for looking up a tournament in a tournament index by its
+    name and start date
 
-def get_and_parse_data(file_names, years):
+    Parameters
+    ----------
+    tournament_index : list of dictionaries
+        tournament index as made by build_tournament_index
+
+    Returns
+    -------
+    dictionary
+        dictionary with key: value pairs of (tournament, start date): the 
+        tournament's dictionary in tournament_index
+    """
+    return {(tournament["Tournament"], tournament["Start date"]): tournament for 
+            tournament in tournament_index}
+
+def get_and_parse_data(file_names, years, as_table = False, cache_dir = None,
+                       workers = None, with_index = False, data_dir = None,
+                       final_leftovers = None, with_set_scores = False):
     """
     Parses all csv files in file_names and returns the data as a list of 
     dictionaries
@@ -162,29 +692,210 @@ def get_and_parse_data(file_names, years):
     years : list of ints
         the years to be included in the analysis, where years[i] is the year
         in which the matches in file_names[i] took place
+    as_table : Boolean, optional
+        If True, return the data as a MatchTable, storing each column in one
+        typed array, instead of as a list of dictionaries. The default is False.
+    cache_dir : string, optional
+        If given, the parsed rows of each file are saved in this folder and
+        loaded from it on later runs, so a file is only parsed again if it or
+        the parser has changed. The default is None, which does not cache.
+    workers : int, optional
+        If more than 1, the files are parsed in parallel by this many 
+        processes, and the tournaments that span two years are stitched 
+        together afterwards, giving the same order as parsing the files one
+        after another. The default is None.
+    with_index : Boolean, optional
+        If True, also return the tournament index of the data, as made by
+        build_tournament_index. The default is False.
+    data_dir : string, optional
+        folder the csv files are in. The default is None, which uses the 
+        assignment-final-data folder in the working directory.
+    final_leftovers : list, optional
+        If given, the rows of the last year's tournaments that end the next
+        year, which are left out of the data, are added to it so the next
+        year can be added later with add_year. The default is None.
+    with_set_scores : Boolean, optional
+        If True, also return the set scores of every match, decoded in one 
+        pass by decode_set_scores, for set and game statistics. The default is
+        False.
 
     Returns
     -------
-    all_data : list of dictionaries
+    all_data : list of dictionaries or MatchTable
         list of dictionaries representing the rows of the data with the column
-        names as keys
+        names as keys, or a MatchTable holding the same data if as_table is True
+    tournament_index : list of dictionaries
+        Only returned if with_index is True; where each tournament starts and
+        ends in all_data along with its dates, draw size and format
+    set_scores : dictionary
+        Only returned if with_set_scores is True; the set scores of all_data 
+        as made by decode_set_scores
     """
     
-    all_data = []
+    if as_table:
+        all_data = MatchTable()
+    else:
+        all_data = []
     leftovers = []
     
-    for i in range(len(file_names)):
-        # data should be stored in the assignment-final-data folder
-        filepath = os.getcwd() + "/assignment-final-data/" + file_names[i]
-        rows_to_extend, new_leftovers = get_and_parse_one_file(filepath, years[i], 
-                                                                leftovers)
+    # data should be stored in the assignment-final-data folder
+    if data_dir == None:
+        data_dir = os.getcwd() + "/assignment-final-data"
+    file_paths = [os.path.join(data_dir, file_name) for file_name in file_names]
+    with instrumentation.stage("parse_files"):
+        all_parsed_rows = parse_files(file_paths, years, cache_dir = cache_dir,
+                                      workers = workers)
+    
+    # stitch the years together in order, moving the leftovers of each year 
+    # in front of the rest of their tournament the next year
+    with instrumentation.stage("stitch_years"):
+        for i in range(len(file_names)):
+            rows_to_extend, new_leftovers = split_leftovers(all_parsed_rows[i], years[i], 
+                                                            leftovers)
+            all_data.extend(rows_to_extend)
+            leftovers = new_leftovers
+            # let the parsed rows be freed once they are in all_data
+            all_parsed_rows[i] = None
+            instrumentation.progress(years[i], "is done")
+    
+    instrumentation.count("Rows parsed", len(all_data))
+    instrumentation.progress("All data done")
+    
+    if final_leftovers != None:
+        final_leftovers.extend(leftovers)
+    
+    results = [all_data]
+    if with_index:
+        with instrumentation.stage("build_tournament_index"):
+            results.append(build_tournament_index(all_data))
+    if with_set_scores:
+        with instrumentation.stage("decode_set_scores"):
+            results.append(decode_set_scores(all_data))
+    if len(results) == 1:
+        return all_data
+    return tuple(results)
+
+def add_year(all_data, tournament_index, file_name, year, leftovers, cache_dir = None,
+             data_dir = None):
+    """
+    Parses one more year's csv file and adds its matches to the end of data 
+    already parsed by get_and_parse_data, without parsing the earlier years 
+    again. The data ends up the same as if the new year had been parsed along
+    with the others.
+
+    Parameters
+    ----------
+    all_data : list of dictionaries or MatchTable
+        the data of the earlier years, as returned by get_and_parse_data; 
+        the new matches are added to it
+    tournament_index : list of dictionaries
+        tournament index of all_data, as made by build_tournament_index; the
+        new tournaments are added to it
+    file_name : string
+        name of the csv file of the new year
+    year : int
+        year the matches in the file take place, which must be the year after
+        the last year in all_data
+    leftovers : list of dictionaries
+        rows of the previous year's tournaments that end in this year, as 
+        given by final_leftovers in get_and_parse_data or returned by the last
+        call to add_year
+    cache_dir : string, optional
+        folder to load or save the file's parsed rows, as in
+        get_and_parse_data. The default is None.
+    data_dir : string, optional
+        folder the csv file is in. The default is None, which uses the 
+        assignment-final-data folder in the working directory.
+
+    Returns
+    -------
+    new_tournaments : list of dictionaries
+        the dictionaries added to tournament_index for the new tournaments
+    new_leftovers : list of dictionaries
+        rows of the new year's tournaments that end the next year
+    """
+    if data_dir == None:
+        data_dir = os.getcwd() + "/assignment-final-data"
+    file_path = os.path.join(data_dir, file_name)
+    
+    with instrumentation.stage("parse_files"):
+        parsed_rows = parse_files([file_path], [year], cache_dir = cache_dir)[0]
+    
+    first_row = len(all_data)
+    with instrumentation.stage("stitch_years"):
+        rows_to_extend, new_leftovers = split_leftovers(parsed_rows, year, leftovers)
         all_data.extend(rows_to_extend)
+    instrumentation.count("Rows parsed", len(rows_to_extend))
+    instrumentation.progress(year, "is done")
+    
+    # the leftovers are put in front of the rest of their tournament, so the
+    # new rows start with a whole tournament
+    with instrumentation.stage("build_tournament_index"):
+        new_tournaments = build_tournament_index(all_data, first_row = first_row)
+    tournament_index.extend(new_tournaments)
+    return new_tournaments, new_leftovers
+
+def stream_tournaments(file_names, years, cache_dir = None, data_dir = None):
+    """
+    Parses the csv files in file_names one row at a time, yielding each 
+    tournament as soon as the row after its last match has been read, so the
+    whole history never has to be held at once. Tournaments that span two
+    years are held back until the rest of their matches are read from the 
+    next year's file. The tournaments are yielded in the same order, and with
+    the same matches, as in the data returned by get_and_parse_data.
+
+    Parameters
+    ----------
+    file_names : list of strings
+        names of csv files to be parsed; one file corresponding to one year of
+        tennis matches
+    years : list of ints
+        the years to be included in the analysis, where years[i] is the year
+        in which the matches in file_names[i] took place
+    cache_dir : string, optional
+        If given, each file's parsed rows are loaded from or saved to this 
+        folder as in get_and_parse_data, which holds one year's rows at a 
+        time. The default is None.
+    data_dir : string, optional
+        folder the csv files are in. The default is None, which uses the 
+        assignment-final-data folder in the working directory.
+
+    Yields
+    ------
+    tournament : list of dictionaries
+        the matches of one tournament, in the order they appear in the data
+    """
+    leftovers = []
+    tournament = []
+    
+    # data should be stored in the assignment-final-data folder
+    if data_dir == None:
+        data_dir = os.getcwd() + "/assignment-final-data"
+    
+    for i in range(len(file_names)):
+        filepath = os.path.join(data_dir, file_names[i])
+        if cache_dir != None:
+            parsed_rows = parse_files([filepath], [years[i]], cache_dir = cache_dir)[0]
+        else:
+            parsed_rows = iter_parsed_rows(filepath, years[i])
+        
+        new_leftovers = []
+        for dic in iter_split_leftovers(parsed_rows, years[i], leftovers, new_leftovers):
+            # a match from a different tournament means the current one is 
+            # complete
+            if len(tournament) > 0 and dic["Tournament"] != tournament[0]["Tournament"]:
+                yield tournament
+                tournament = []
+            tournament.append(dic)
+            instrumentation.count("Rows parsed")
+        
         leftovers = new_leftovers
-        print(years[i], "is done")
+        instrumentation.progress(years[i], "is done")
     
-    print("All data done")
+    if len(tournament) > 0:
+        yield tournament
     
-    return all_data
+    instrumentation.progress("All data done")
 
 def get_set_winner(player1, player2, str_score):
     """
@@ -213,6 +924,83 @@ def get_set_winner(player1, player2, str_score):
     else:
         return player2
     
+def decode_match_score(data_row):
+    """
+    Parses the set scores of a match, splitting and converting each set's 
+    score only once, and finds who won. A completed match is decided by the
+    sets, which are parsed until one player has won enough of them; the 
+    winner of a match that was not completed is the player that did not 
+    retire, as found by get_non_retiree.
+
+    Parameters
+    ----------
+    data_row : dictionary
+        dictionary representing a row of data; must have keys "Player 1," 
+        "Player 2," "Best of," "Comment," and "Set i" for each set i 1 - data_row["Best of"]
+
+    Returns
+    -------
+    games : list of tuples
+        (player 1 games, player 2 games) tuples for each set parsed. For a 
+        match that was not completed, the sets with a score of two whole 
+        numbers are parsed.
+    sets_won : list of ints
+        the number of sets won by player 1 and by player 2. For a match that
+        was not completed, only the finished sets are counted.
+    winner_index : int
+        0 if player 1 won and 1 if player 2 won
+    """
+    best_of = data_row["Best of"]
+    games = []
+    sets_won = [0, 0]
+    
+    if data_row["Comment"] == "Completed":
+        need_to_win = best_of // 2 + 1
+        # go through the set scores until one player has won enough sets to
+        # win the match
+        for j in range(best_of):
+            scores = data_row[SET_COLUMNS[j]].split('-')
+            set_games = (int(scores[0]), int(scores[1]))
+            games.append(set_games)
+            if set_games[0] > set_games[1]:
+                sets_won[0] += 1
+                if sets_won[0] == need_to_win:
+                    return games, sets_won, 0
+            else:
+                sets_won[1] += 1
+                if sets_won[1] == need_to_win:
+                    return games, sets_won, 1
+        assertion_msg = ("Neither player won " + str(need_to_win) + " sets in the " +
+                         "completed match between " + data_row["Player 1"] + " and " +
+                         data_row["Player 2"] + " at the " + data_row["Tournament"] +
+                         " tournament.")
+        assert False, assertion_msg
+    
+    # the sets played before the retirement may be missing or unfinished
+    for j in range(best_of):
+        scores = data_row.get(SET_COLUMNS[j], "").split('-')
+        if len(scores) != 2 or not scores[0].isdigit() or not scores[1].isdigit():
+            continue
+        set_games = (int(scores[0]), int(scores[1]))
+        games.append(set_games)
+        if is_finished_set(set_games[0], set_games[1]):
+            sets_won[0 if set_games[0] > set_games[1] else 1] += 1
+    
+    non_retiree, retiree = get_non_retiree(data_row, data_row["Player 1"], 
+                                           data_row["Player 2"])
+    winner_index = 0 if non_retiree == data_row["Player 1"] else 1
+    return games, sets_won, winner_index
+
+def is_finished_set(games1, games2):
+    """
+    Checks whether a set with the given games won by each player was 
+    finished: one player has at least 6 games and is 2 games ahead, or won a
+    tiebreak 7-6
+    """
+    most = max(games1, games2)
+    least = min(games1, games2)
+    return most >= 6 and (most - least >= 2 or (most == 7 and least == 6))
+
 def get_winner_loser(data_row):
     """
     Determines the winner of a tennis match
@@ -230,40 +1018,66 @@ def get_winner_loser(data_row):
     loser : string
         name of the loser
     """
-    # initialise variables
-    player1 = data_row["Player 1"]
-    player2 = data_row["Player 2"]
-    player1_sets_won = 0
-    player2_sets_won = 0
-    need_to_win = data_row["Best of"] // 2 + 1
-    
-    # list of dictionary keys with values for the set scores
-    score_col_names = ["Set " + str(i) for i in range(1, data_row["Best of"] + 1)]
-    
-    # iterate through the set scores until one player has won enough sets to 
-    # win the match if the match was completed
-    for col_name in score_col_names:
-        if (data_row["Comment"] == "Completed" and 
-            get_set_winner(player1, player2, data_row[col_name]) == player1):
-            player1_sets_won += 1
-            if player1_sets_won == need_to_win:
-                winner = player1
-                loser = player2
-                break
-        elif (data_row["Comment"] == "Completed" and 
-              get_set_winner(player1, player2, data_row[col_name]) == player2):
-            player2_sets_won += 1
-            if player2_sets_won == need_to_win:
-                winner = player2
-                loser = player1
-                break
-    
-    # if the match was not completed, find the winner and loser based on who
-    # retired
+    # if the match was not completed, the winner is the player who did not 
+    # retire, so the set scores are not needed
     if data_row["Comment"] != "Completed":
-        winner, loser = get_non_retiree(data_row, player1, player2)
-        
-    return winner, loser
+        return get_non_retiree(data_row, data_row["Player 1"], data_row["Player 2"])
+    
+    games, sets_won, winner_index = decode_match_score(data_row)
+    if winner_index == 0:
+        return data_row["Player 1"], data_row["Player 2"]
+    return data_row["Player 2"], data_row["Player 1"]
+
+def decode_set_scores(list_of_dicts):
+    """
+    Parses the set scores of every match in the data in one pass, storing 
+    them in compact arrays so set and game statistics can be worked out 
+    without splitting the score strings again
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data, such as one file's 
+        rows as parsed by parse_one_file - each dictionary must have the keys
+        needed by decode_match_score
+
+    Returns
+    -------
+    set_scores : dictionary
+        dictionary with the most sets in a match under "Sets per match," and
+        arrays with an item for each match: the number of sets parsed under 
+        "Sets parsed," the sets won by player 1 and player 2 under "Sets 1" 
+        and "Sets 2," and 0 if player 1 won or 1 if player 2 won under 
+        "Winner index." The games of set j of match i are at 
+        i * "Sets per match" + j in the arrays under "Games 1" and "Games 2," 
+        with 0 for sets that were not parsed. The winners are the winners by
+        the score or retirement, before any corrections.
+    """
+    num_matches = len(list_of_dicts)
+    sets_per_match = 0
+    for dic in list_of_dicts:
+        sets_per_match = max(sets_per_match, dic["Best of"])
+    
+    set_scores = {"Sets per match": sets_per_match,
+                  "Games 1": array("H", bytes(2 * num_matches * sets_per_match)),
+                  "Games 2": array("H", bytes(2 * num_matches * sets_per_match)),
+                  "Sets parsed": array("B", bytes(num_matches)),
+                  "Sets 1": array("B", bytes(num_matches)),
+                  "Sets 2": array("B", bytes(num_matches)),
+                  "Winner index": array("B", bytes(num_matches))}
+    games1 = set_scores["Games 1"]
+    games2 = set_scores["Games 2"]
+    
+    for i in range(num_matches):
+        games, sets_won, winner_index = decode_match_score(list_of_dicts[i])
+        first = i * sets_per_match
+        for j in range(len(games)):
+            games1[first + j], games2[first + j] = games[j]
+        set_scores["Sets parsed"][i] = len(games)
+        set_scores["Sets 1"][i], set_scores["Sets 2"][i] = sets_won
+        set_scores["Winner index"][i] = winner_index
+    
+    return set_scores
 
 def get_non_retiree(data_row, player1, player2):
     """
@@ -306,6 +1120,61 @@ def get_non_retiree(data_row, player1, player2):
             
         return non_retiree, retiree
 
+def load_tournament_formats(file_path):
+    """
+    Loads a table of tournament formats. Each row of the csv file gives a 
+    "Tournament," the "First year" and "Last year" it had a "Format," which is
+    one of TOURNAMENT_FORMATS.
+
+    Parameters
+    ----------
+    file_path : string
+        path to the csv file of tournament formats
+
+    Returns
+    -------
+    formats : dictionary
+        dictionary with key: value pairs of (tournament, year): format for 
+        every year of every row in the table
+    """
+    formats = {}
+    
+    with open(file_path) as f:
+        for row in csv.DictReader(f):
+            assertion_msg = ("unknown format " + row["Format"] + " for " + 
+                             row["Tournament"] + "; must be one of " + 
+                             ", ".join(TOURNAMENT_FORMATS))
+            assert row["Format"] in TOURNAMENT_FORMATS, assertion_msg
+            for year in range(int(row["First year"]), int(row["Last year"]) + 1):
+                formats[(row["Tournament"], year)] = row["Format"]
+    
+    return formats
+
+def get_tournament_format(tournament_name, year):
+    """
+    Looks up the format of a tournament in the table in FORMATS_FILE, loading
+    it the first time
+
+    Parameters
+    ----------
+    tournament_name : string
+        name of the tournament
+    year : int
+        year the tournament took place
+
+    Returns
+    -------
+    string
+        "round robin" if the tournament had a round robin group stage and 
+        "single elimination" otherwise, including for tournaments that are not
+        in the table. Whether a single elimination tournament had a third 
+        place match is found from its matches when rounds are assigned.
+    """
+    global tournament_formats
+    if tournament_formats == None:
+        tournament_formats = load_tournament_formats(FORMATS_FILE)
+    return tournament_formats.get((tournament_name, year), "single elimination")
+
 def get_round_robin_status(tournament_name, year):
     """
     Determines whether a match was part of a tournament with a round robin
@@ -324,25 +1193,7 @@ def get_round_robin_status(tournament_name, year):
         True if the match was part of a tournament with a round robin group
         stage and False otherwise
     """
-    if (tournament_name == "Sony Ericsson Championships" and 
-        year in range(2007, 2016)):
-        return True
-    if (tournament_name == "Commonwealth Bank Tournament of Champions" and
-        year == 2009):
-        return True
-    if (tournament_name == "Qatar Airways Tournament of Champions Sofia" and
-        year == 2012):
-        return True
-    if (tournament_name == "Garanti Koza WTA Tournament of Champions" and
-        year in range(2013, 2015)):
-        return True
-    if (tournament_name == "BNP Paribas WTA Finals" and year in range(2016, 2019)):
-        return True
-    if (tournament_name == "WTA Elite Trophy" and year in range(2015, 2020)):
-        return True
-    if (tournament_name == "WTA Finals" and (year == 2019 or year == 2021)):
-        return True
-    return False
+    return get_tournament_format(tournament_name, year) == "round robin"
     
 def sort(data, variable_name, for_each = None, in_place = False, descending = False,
          for_each_descending = False):
@@ -0,0 +1,155 @@
+# opt-in timing and counters for the stages of the pipeline
+
+import json
+import time
+from contextlib import contextmanager
+
+# the report being recorded, or None when instrumentation is off
+report = None
+# function called with each event while instrumentation is on, or None
+callback = None
+
+def main():
+    pass
+
+def start(event_callback = None):
+    """
+    Turns instrumentation on, starting a new report. While it is on, stages
+    are timed, counters are kept, and progress messages are recorded instead
+    of printed.
+
+    Parameters
+    ----------
+    event_callback : function, optional
+        function called with a dictionary for each event: the end of a stage,
+        with "Event": "stage," the stage's name under "Stage," and its wall
+        and CPU time in seconds under "Wall time" and "CPU time," or a
+        progress message, with "Event": "progress" and the message under
+        "Message." The default is None.
+
+    Returns
+    -------
+    None.
+    """
+    global report, callback
+    report = {"Stages": {}, "Counters": {}, "Progress": []}
+    callback = event_callback
+
+def stop():
+    """
+    Turns instrumentation off
+
+    Returns
+    -------
+    dictionary or None
+        the report recorded since start, as described in get_report, or None
+        if instrumentation was not on
+    """
+    global report, callback
+    finished_report = report
+    report = None
+    callback = None
+    return finished_report
+
+def is_enabled():
+    """
+    Returns whether instrumentation is on
+    """
+    return report != None
+
+def get_report():
+    """
+    Returns the report recorded so far: a dictionary with a dictionary of
+    stage name: dictionary with the number of times the stage ran under
+    "Calls" and its total wall and CPU time in seconds under "Wall time" and
+    "CPU time" under "Stages," a dictionary of counter name: count under
+    "Counters," and a list of the progress messages under "Progress." Returns
+    None if instrumentation is off.
+    """
+    return report
+
+@contextmanager
+def stage(name):
+    """
+    Times the code in a with block, or each call of a function it decorates,
+    as a stage of the pipeline, adding its wall and CPU time to the report; 
+    does nothing if instrumentation is off
+
+    Parameters
+    ----------
+    name : string
+        name of the stage; the times of stages with the same name are added up
+    """
+    if report == None:
+        yield
+        return
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        # the report may have been stopped inside the block
+        if report != None:
+            if name not in report["Stages"].keys():
+                report["Stages"][name] = {"Calls": 0, "Wall time": 0.0, "CPU time": 0.0}
+            report["Stages"][name]["Calls"] += 1
+            report["Stages"][name]["Wall time"] += wall_time
+            report["Stages"][name]["CPU time"] += cpu_time
+            if callback != None:
+                callback({"Event": "stage", "Stage": name, "Wall time": wall_time,
+                          "CPU time": cpu_time})
+
+def count(name, amount = 1):
+    """
+    Adds amount to a counter in the report; does nothing if instrumentation is
+    off
+
+    Parameters
+    ----------
+    name : string
+        name of the counter
+    amount : int, optional
+        how much to add. The default is 1.
+    """
+    if report == None:
+        return
+    report["Counters"][name] = report["Counters"].get(name, 0) + amount
+
+def progress(*message):
+    """
+    Reports progress. Prints the message, like print, if instrumentation is
+    off, or records it in the report and passes it to the callback if it is on.
+
+    Parameters
+    ----------
+    *message : objects
+        the parts of the message, joined by spaces
+    """
+    if report == None:
+        print(*message)
+        return
+    text = " ".join([str(part) for part in message])
+    report["Progress"].append(text)
+    if callback != None:
+        callback({"Event": "progress", "Message": text})
+
+def write_report(file_path):
+    """
+    Writes the report recorded so far to a json file
+
+    Parameters
+    ----------
+    file_path : string
+        path to the json file
+
+    Returns
+    -------
+    None.
+    """
+    with open(file_path, "w") as f:
+        json.dump(report, f, indent = 2)
+
+if __name__ == "__main__":
+    main()
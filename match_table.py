@@ -0,0 +1,422 @@
+# class for storing the data in columns
+
+from array import array
+from datetime import datetime
+import math
+from collections.abc import MutableMapping
+
+# how each of the known columns is stored; any other column is stored based on
+# the type of the first value given for it
+COLUMN_KINDS = {"Tournament": "tournament",
+                "Player 1": "player",
+                "Player 2": "player",
+                "Winner": "player",
+                "Loser": "player",
+                "Start date": "date",
+                "End date": "date",
+                "Best of": "int",
+                "Rank 1": "float",
+                "Rank 2": "float",
+                "Tournament format": "string",
+                "Round robin tournament": "bool",
+                "Round number": "int",
+                "Round name": "string",
+                "WbW 1": "rank",
+                "WbW 2": "rank"}
+
+# array type codes for each kind of column; interned strings are stored as ids
+# and "object" columns are stored in a plain list
+TYPE_CODES = {"player": "i", "tournament": "i", "string": "i", "date": "i",
+              "int": "q", "float": "d", "rank": "d", "bool": "b"}
+
+# values used for rows that do not have a value in a column
+DEFAULTS = {"player": -1, "tournament": -1, "string": -1, "date": 0, "int": 0,
+            "float": math.nan, "rank": math.nan, "bool": 0, "object": None}
+
+# kinds of columns that store ids into a table of names
+INTERNED_KINDS = ("player", "tournament", "string")
+
+class MatchTable:
+    """
+    Stores the matches in columns, with one typed array per column instead of
+    one dictionary per match. Player, tournament and other string values are
+    stored as integer ids into tables of names shared by all columns of the
+    same kind, and dates are stored as ordinal ints. Indexing the table gives
+    a MatchRow, which can be used like the dictionary for that match, so code
+    written for a list of dictionaries keeps working.
+    """
+
+    def __init__(self, names = None, name_ids = None):
+        """
+        Makes an empty table
+
+        Parameters
+        ----------
+        names : dictionary, optional
+            dictionary with key: value pairs of kind of interned column: list of
+            names, to share the names with another table. The default is None.
+        name_ids : dictionary, optional
+            dictionary with key: value pairs of kind of interned column:
+            dictionary of name: id, matching names. The default is None.
+        """
+        if names == None:
+            names = {kind: [] for kind in INTERNED_KINDS}
+            name_ids = {kind: {} for kind in INTERNED_KINDS}
+        self.names = names
+        self.name_ids = name_ids
+        # each column is a dictionary with the kind of column under "Kind," the
+        # values under "Values," and either None, if every row has a value, or
+        # a bytearray with a 1 for each row that has a value under "Present"
+        self.columns = {}
+        self.length = 0
+
+    @classmethod
+    def from_dicts(cls, list_of_dicts):
+        """
+        Makes a table holding the same data as a list of dictionaries
+
+        Parameters
+        ----------
+        list_of_dicts : list of dictionaries
+            list of dictionaries representing rows of data
+
+        Returns
+        -------
+        table : MatchTable
+            table with one row for each dictionary
+        """
+        table = cls()
+        table.extend(list_of_dicts)
+        return table
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [MatchRow(self, i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("MatchTable index out of range")
+        return MatchRow(self, index)
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield MatchRow(self, i)
+
+    def intern(self, kind, name):
+        """
+        Gets the id of a name in the table of names for a kind of column,
+        adding it if it is not there yet
+
+        Parameters
+        ----------
+        kind : string
+            "player," "tournament," or "string"
+        name : string
+            the name to get the id of
+
+        Returns
+        -------
+        int
+            id of the name
+        """
+        if not isinstance(name, str):
+            raise TypeError("only strings can be stored in a " + kind + " column")
+        ids = self.name_ids[kind]
+        if name not in ids:
+            ids[name] = len(self.names[kind])
+            self.names[kind].append(name)
+        return ids[name]
+
+    def player_id(self, player):
+        """
+        Returns the id of a player, adding the player if they are new
+        """
+        return self.intern("player", player)
+
+    def player_name(self, player_id):
+        """
+        Returns the name of the player with id player_id
+        """
+        return self.names["player"][player_id]
+
+    def tournament_id(self, tournament):
+        """
+        Returns the id of a tournament, adding the tournament if it is new
+        """
+        return self.intern("tournament", tournament)
+
+    def tournament_name(self, tournament_id):
+        """
+        Returns the name of the tournament with id tournament_id
+        """
+        return self.names["tournament"][tournament_id]
+
+    def encode(self, kind, value):
+        """
+        Converts a value to how it is stored in a column of the given kind,
+        raising a TypeError if it cannot be stored there
+        """
+        if kind in INTERNED_KINDS:
+            return self.intern(kind, value)
+        if kind == "date":
+            if not isinstance(value, datetime):
+                raise TypeError("only datetimes can be stored in a date column")
+            return value.toordinal()
+        if kind == "int":
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise TypeError("only ints can be stored in an int column")
+            return value
+        if kind == "float":
+            if not isinstance(value, float):
+                raise TypeError("only floats can be stored in a float column")
+            return value
+        if kind == "rank":
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError("only ints and nan can be stored in a rank column")
+            if isinstance(value, float) and not math.isnan(value):
+                raise TypeError("only ints and nan can be stored in a rank column")
+            return float(value)
+        if kind == "bool":
+            if not isinstance(value, bool):
+                raise TypeError("only Booleans can be stored in a bool column")
+            return int(value)
+        return value
+
+    def decode(self, kind, value):
+        """
+        Converts a stored value back to the value it represents
+        """
+        if kind in INTERNED_KINDS:
+            return self.names[kind][value]
+        if kind == "date":
+            return datetime.fromordinal(value)
+        if kind == "rank":
+            if math.isnan(value):
+                return value
+            return int(value)
+        if kind == "bool":
+            return value == 1
+        return value
+
+    def infer_kind(self, name, value):
+        """
+        Decides how to store a new column from its name or its first value
+        """
+        if name in COLUMN_KINDS.keys():
+            return COLUMN_KINDS[name]
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, float):
+            return "float"
+        if isinstance(value, datetime):
+            return "date"
+        if isinstance(value, str):
+            return "string"
+        return "object"
+
+    def add_column(self, name, kind):
+        """
+        Adds an empty column, with no values present in any existing row
+        """
+        if kind == "object":
+            values = [None] * self.length
+        else:
+            values = array(TYPE_CODES[kind], [DEFAULTS[kind]]) * self.length
+        self.columns[name] = {"Kind": kind, "Values": values,
+                              "Present": bytearray(self.length)}
+
+    def convert_to_object(self, name):
+        """
+        Changes a column to store plain Python objects, for when a value is
+        given that does not fit the column's type
+        """
+        column = self.columns[name]
+        values = column["Values"]
+        column["Values"] = [self.decode(column["Kind"], values[i]) for i in range(len(values))]
+        column["Kind"] = "object"
+
+    def set_value(self, index, name, value):
+        """
+        Sets the value of a column in one row, adding the column if needed
+        """
+        if name not in self.columns.keys():
+            self.add_column(name, self.infer_kind(name, value))
+        column = self.columns[name]
+        try:
+            column["Values"][index] = self.encode(column["Kind"], value)
+        except (TypeError, OverflowError):
+            self.convert_to_object(name)
+            column["Values"][index] = value
+        if column["Present"] != None:
+            column["Present"][index] = 1
+
+    def get_value(self, index, name):
+        """
+        Gets the value of a column in one row, raising a KeyError if the row
+        does not have a value in that column
+        """
+        if name not in self.columns.keys():
+            raise KeyError(name)
+        column = self.columns[name]
+        if column["Present"] != None and column["Present"][index] == 0:
+            raise KeyError(name)
+        return self.decode(column["Kind"], column["Values"][index])
+
+    def has_value(self, index, name):
+        """
+        Returns whether a row has a value in a column
+        """
+        if name not in self.columns.keys():
+            return False
+        present = self.columns[name]["Present"]
+        return present == None or present[index] == 1
+
+    def delete_value(self, index, name):
+        """
+        Removes the value of a column in one row
+        """
+        if not self.has_value(index, name):
+            raise KeyError(name)
+        column = self.columns[name]
+        if column["Present"] == None:
+            column["Present"] = bytearray(b"\x01") * self.length
+        column["Present"][index] = 0
+
+    def append(self, row):
+        """
+        Adds a row to the end of the table
+
+        Parameters
+        ----------
+        row : dictionary
+            dictionary representing a row of data
+        """
+        index = self.length
+        self.length += 1
+
+        # add a value, or a placeholder, to every existing column
+        for name, column in self.columns.items():
+            kind = column["Kind"]
+            if name in row.keys():
+                try:
+                    column["Values"].append(self.encode(kind, row[name]))
+                except (TypeError, OverflowError):
+                    self.convert_to_object(name)
+                    column["Values"].append(row[name])
+                if column["Present"] != None:
+                    column["Present"].append(1)
+            else:
+                column["Values"].append(DEFAULTS[kind])
+                if column["Present"] == None:
+                    column["Present"] = bytearray(b"\x01") * index
+                column["Present"].append(0)
+
+        # add any new columns
+        for name in row.keys():
+            if name not in self.columns.keys():
+                self.add_column(name, self.infer_kind(name, row[name]))
+                self.set_value(index, name, row[name])
+                # every row has a value if this is the first row
+                if index == 0:
+                    self.columns[name]["Present"] = None
+
+    def extend(self, rows):
+        """
+        Adds each of the rows in rows to the end of the table
+        """
+        for row in rows:
+            self.append(row)
+
+    def column(self, name):
+        """
+        Returns the stored values of a column: ids for player, tournament and
+        string columns, ordinals for date columns, and the values themselves
+        for other columns
+        """
+        return self.columns[name]["Values"]
+
+    def column_kind(self, name):
+        """
+        Returns how a column is stored, or None if there is no such column
+        """
+        if name not in self.columns.keys():
+            return None
+        return self.columns[name]["Kind"]
+
+    def select(self, indices):
+        """
+        Makes a new table with the rows at the given indices, in that order.
+        The new table shares its tables of names with this one, so ids mean
+        the same thing in both.
+
+        Parameters
+        ----------
+        indices : list of ints
+            indices of the rows to put in the new table
+
+        Returns
+        -------
+        table : MatchTable
+            new table holding copies of the selected rows
+        """
+        table = MatchTable(self.names, self.name_ids)
+        table.length = len(indices)
+        for name, column in self.columns.items():
+            values = column["Values"]
+            if column["Kind"] == "object":
+                new_values = [values[i] for i in indices]
+            else:
+                new_values = array(values.typecode, [values[i] for i in indices])
+            if column["Present"] == None:
+                present = None
+            else:
+                present = bytearray([column["Present"][i] for i in indices])
+            table.columns[name] = {"Kind": column["Kind"], "Values": new_values,
+                                   "Present": present}
+        return table
+
+    def to_dicts(self):
+        """
+        Returns the data as a list of dictionaries, one for each row
+        """
+        return [dict(row) for row in self]
+
+class MatchRow(MutableMapping):
+    """
+    Dictionary-like view of one row of a MatchTable. Reading, setting, and
+    deleting keys reads and changes the columns of the table.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, name):
+        return self.table.get_value(self.index, name)
+
+    def __setitem__(self, name, value):
+        self.table.set_value(self.index, name, value)
+
+    def __delitem__(self, name):
+        self.table.delete_value(self.index, name)
+
+    def __contains__(self, name):
+        return self.table.has_value(self.index, name)
+
+    def __iter__(self):
+        for name in list(self.table.columns.keys()):
+            if self.table.has_value(self.index, name):
+                yield name
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+    def __repr__(self):
+        return "MatchRow(" + repr(dict(self)) + ")"
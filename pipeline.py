@@ -0,0 +1,420 @@
+# command line entry point running the whole pipeline: parsing the data,
+# assigning rounds, WbW rankings, and the win and loss penalty rankings
+
+import argparse
+import csv
+import json
+import math
+import os
+import pickle
+import re
+from datetime import datetime
+import data
+import rounds
+import rankings
+import ratings
+import instrumentation
+
+# most WbW iterations for each ranking by default; the undamped WbW iteration
+# can cycle forever on some data instead of settling on a ranking order
+MAX_ITERATIONS = 1000
+
+# columns written to the enriched matches file, in order; other columns in the
+# data are written after these
+MATCH_COLUMNS = ["Tournament", "Start date", "End date", "Best of", "Player 1", "Player 2",
+                 "Rank 1", "Rank 2", "Set 1", "Set 2", "Set 3", "Comment", "Winner", "Loser",
+                 "Tournament format", "Round number", "Round name", "WbW 1", "WbW 2"]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Parses the match data, assigns " +
+                                     "rounds and WbW rankings, and writes the enriched " +
+                                     "matches and the rankings")
+    parser.add_argument("--data-dir", default = os.path.join(os.getcwd(), "assignment-final-data"),
+                        help = "folder of csv files, one for each year, each with the " +
+                        "year in its name")
+    parser.add_argument("--first-year", type = int, default = None)
+    parser.add_argument("--last-year", type = int, default = None)
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "number of processes to parse files and assign rounds with")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "folder to cache parsed files in")
+    parser.add_argument("--backend", choices = ["dict", "numpy"], default = "dict",
+                        help = "WbW backend; numpy is faster but needs numpy installed")
+    parser.add_argument("--full-window", action = "store_true",
+                        help = "recalculate each WbW ranking from all of the data " +
+                        "instead of sliding a 52-week window")
+    parser.add_argument("--max-iterations", type = int, default = MAX_ITERATIONS,
+                        help = "most WbW iterations for each ranking; rankings that " +
+                        "stop here are reported")
+    parser.add_argument("--top-k", type = int, default = None,
+                        help = "only write the top k players of each ranking")
+    parser.add_argument("--matches-output", default = "enriched-matches.csv")
+    parser.add_argument("--rankings-output", default = "rankings.json")
+    parser.add_argument("--profile", default = None,
+                        help = "json file to write the time of each stage and the " +
+                        "counters to")
+    parser.add_argument("--state", default = None,
+                        help = "file to save the pipeline state to; if it already " +
+                        "exists, only the years after the last year in it are parsed, " +
+                        "given rounds and ranked")
+    parser.add_argument("--elo", action = "store_true",
+                        help = "also rate the players with online Elo ratings")
+    parser.add_argument("--checkpoint", default = None,
+                        help = "file to save WbW checkpoints to; an interrupted run " +
+                        "resumes the WbW rankings from it")
+    args = parser.parse_args(argv)
+
+    if args.profile != None:
+        instrumentation.start()
+
+    state = None
+    if args.state != None and os.path.exists(args.state):
+        state = load_state(args.state)
+        # a state made by a different parser or setting has to be redone
+        if (state["Parser"] != data.parser_cache_key() or 
+            state["Windowed"] == args.full_window or (state.get("Elo") != None) != args.elo or
+            state.get("Backend") != args.backend or 
+            state.get("Max iterations") != args.max_iterations):
+            instrumentation.progress("The saved state does not match the parser or " +
+                                     "options, so all years are parsed again")
+            state = None
+
+    iteration_log = []
+    if state != None:
+        file_names, years = find_data_files(args.data_dir, first_year = state["Years"][-1] + 1,
+                                            last_year = args.last_year)
+        list_of_dicts, tournament_index, engine = update_pipeline(
+            state, file_names, years, args.data_dir, cache_dir = args.cache_dir,
+            workers = args.workers, backend = args.backend, 
+            max_iterations = args.max_iterations, checkpoint_file = args.checkpoint,
+            iteration_log = iteration_log)
+    else:
+        file_names, years = find_data_files(args.data_dir, first_year = args.first_year,
+                                            last_year = args.last_year)
+        if len(file_names) == 0:
+            parser.error("no csv files for the years given in " + args.data_dir)
+        if args.state != None:
+            state = {}
+        list_of_dicts, tournament_index, engine = run_pipeline(
+            file_names, years, args.data_dir, cache_dir = args.cache_dir,
+            workers = args.workers, backend = args.backend, 
+            windowed = not args.full_window, max_iterations = args.max_iterations,
+            state = state, checkpoint_file = args.checkpoint, elo = args.elo,
+            iteration_log = iteration_log)
+
+    capped = [entry for entry in iteration_log if entry["Iterations"] >= args.max_iterations]
+    if len(capped) != 0:
+        instrumentation.progress(str(len(capped)) + " of " + str(len(iteration_log)) + 
+                                 " WbW rankings stopped at " + str(args.max_iterations) +
+                                 " iterations without converging, the first before " +
+                                 capped[0]["Start date"].strftime("%Y-%m-%d"))
+    if args.state != None:
+        with instrumentation.stage("save_state"):
+            save_state(args.state, state)
+
+    with instrumentation.stage("write_outputs"):
+        write_matches(list_of_dicts, args.matches_output)
+        write_rankings(list_of_dicts, args.rankings_output, top_k = args.top_k,
+                       engine = engine)
+
+    if args.profile != None:
+        instrumentation.write_report(args.profile)
+        instrumentation.stop()
+
+def find_data_files(data_dir, first_year = None, last_year = None):
+    """
+    Finds the csv file of each year in a folder, from the four digit year in
+    each file's name
+
+    Parameters
+    ----------
+    data_dir : string
+        folder of csv files
+    first_year : int, optional
+        first year to use. The default is None, which starts from the earliest.
+    last_year : int, optional
+        last year to use. The default is None, which goes to the latest.
+
+    Returns
+    -------
+    file_names : list of strings
+        names of the csv files, in order of year
+    years : list of ints
+        years[i] is the year of file_names[i]
+    """
+    files = []
+    for file_name in os.listdir(data_dir):
+        match = re.search(r"(19|20)\d\d", file_name)
+        if not file_name.endswith(".csv") or match == None:
+            continue
+        year = int(match.group(0))
+        if ((first_year == None or year >= first_year) and
+            (last_year == None or year <= last_year)):
+            files.append((year, file_name))
+    files.sort()
+    return [file_name for year, file_name in files], [year for year, file_name in files]
+
+def run_pipeline(file_names, years, data_dir, cache_dir = None, workers = None,
+                 backend = "dict", windowed = True, max_iterations = None, state = None,
+                 checkpoint_file = None, elo = False, iteration_log = None):
+    """
+    Parses the data, assigns rounds, and assigns WbW rankings, building the
+    tournament index once for all of the stages
+
+    Parameters
+    ----------
+    file_names : list of strings
+        names of the csv files, in order of year
+    years : list of ints
+        years[i] is the year of file_names[i]
+    data_dir : string
+        folder the csv files are in
+    cache_dir : string, optional
+        folder to cache parsed files in. The default is None.
+    workers : int, optional
+        number of processes to parse files and assign rounds with. The
+        default is None.
+    backend : string, optional
+        backend of wbw, "dict" or "numpy." The default is "dict".
+    windowed : Boolean, optional
+        whether to slide a 52-week window for the WbW rankings. The default
+        is True.
+    max_iterations : int, optional
+        most WbW iterations for each ranking. The default is None.
+    state : dictionary, optional
+        If given, everything needed to add later years with update_pipeline
+        is saved in it: the matches under "Data," the tournament index under
+        "Tournament index," the years under "Years," the rows of tournaments
+        that end after the last year under "Leftovers," the state of the WbW
+        rankings under "WbW," whether they are windowed under "Windowed," the
+        WbW backend and most iterations under "Backend" and "Max iterations,"
+        the parser's cache key under "Parser," and the Elo rating engine, or 
+        None, under "Elo." The default is None.
+    checkpoint_file : string, optional
+        file to save WbW checkpoints to and resume the WbW rankings from, as 
+        in rankings.assign_wbw_rankings. The default is None.
+    elo : Boolean, optional
+        whether to also assign online Elo ratings with 
+        ratings.assign_elo_ratings. The default is False.
+    iteration_log : list, optional
+        list to add the iterations of each WbW ranking to, as in 
+        rankings.assign_wbw_rankings. The default is None.
+
+    Returns
+    -------
+    list_of_dicts : list of dictionaries
+        the matches with rounds and WbW rankings
+    tournament_index : list of dictionaries
+        tournament index as made by data.build_tournament_index
+    engine : dictionary
+        the Elo rating engine after the last tournament, or None if elo is
+        False
+    """
+    leftovers = None
+    wbw_state = None
+    if state != None:
+        leftovers = []
+        wbw_state = {}
+    list_of_dicts, tournament_index = data.get_and_parse_data(file_names, years,
+                                                              cache_dir = cache_dir,
+                                                              workers = workers,
+                                                              with_index = True,
+                                                              data_dir = data_dir,
+                                                              final_leftovers = leftovers)
+    rounds.assign_rounds(list_of_dicts, tournament_index = tournament_index,
+                         workers = workers)
+    rankings.assign_wbw_rankings(list_of_dicts, windowed = windowed, backend = backend,
+                                 max_iterations = max_iterations,
+                                 tournament_index = tournament_index, state = wbw_state,
+                                 checkpoint_file = checkpoint_file,
+                                 iteration_log = iteration_log)
+    engine = None
+    if elo:
+        engine = ratings.assign_elo_ratings(list_of_dicts, tournament_index = tournament_index)
+    if state != None:
+        state.update({"Data": list_of_dicts, "Tournament index": tournament_index,
+                      "Years": list(years), "Leftovers": leftovers, "WbW": wbw_state,
+                      "Windowed": windowed, "Backend": backend, 
+                      "Max iterations": max_iterations, "Parser": data.parser_cache_key(),
+                      "Elo": engine})
+    return list_of_dicts, tournament_index, engine
+
+def update_pipeline(state, file_names, years, data_dir, cache_dir = None, workers = None,
+                    backend = "dict", max_iterations = None, checkpoint_file = None,
+                    iteration_log = None):
+    """
+    Adds new years to a pipeline state saved by run_pipeline, parsing only 
+    the new files, assigning rounds only to the new tournaments, and ranking
+    only the tournament dates after the last one in the state, so the time 
+    taken depends on the new years and not on the whole history. The data 
+    ends up the same as running run_pipeline over all of the years.
+
+    Parameters
+    ----------
+    state : dictionary
+        pipeline state saved by run_pipeline; updated with the new years
+    file_names : list of strings
+        names of the csv files of the new years, in order of year
+    years : list of ints
+        years[i] is the year of file_names[i]; all after the last year in 
+        state
+    data_dir : string
+        folder the csv files are in
+    cache_dir : string, optional
+        folder to cache parsed files in. The default is None.
+    workers : int, optional
+        number of processes to assign rounds with. The default is None.
+    backend : string, optional
+        backend of wbw, "dict" or "numpy," which must be the one the state 
+        was saved with. The default is "dict".
+    max_iterations : int, optional
+        most WbW iterations for each ranking, which must be the number the 
+        state was saved with. The default is None.
+    checkpoint_file : string, optional
+        file to save WbW checkpoints to and resume the WbW rankings from, as 
+        in rankings.assign_wbw_rankings. The default is None.
+    iteration_log : list, optional
+        list to add the iterations of each WbW ranking to, as in 
+        rankings.assign_wbw_rankings. The default is None.
+
+    Returns
+    -------
+    list_of_dicts : list of dictionaries
+        the matches of all of the years with rounds and WbW rankings
+    tournament_index : list of dictionaries
+        tournament index of all of the years
+    engine : dictionary
+        the Elo rating engine after the last tournament, or None if the state
+        has no Elo ratings
+    """
+    # carrying on the saved WbW scores with other settings would not give the
+    # same rankings as running over all of the years
+    assertion_msg = ("the state was saved with the " + str(state.get("Backend")) + 
+                     " backend and " + str(state.get("Max iterations")) + 
+                     " most iterations, not " + backend + " and " + str(max_iterations))
+    assert (state.get("Backend") == backend and 
+            state.get("Max iterations") == max_iterations), assertion_msg
+    
+    list_of_dicts = state["Data"]
+    tournament_index = state["Tournament index"]
+    first_new_tournament = len(tournament_index)
+    
+    for file_name, year in zip(file_names, years):
+        assert year > state["Years"][-1], (str(year) + " is not after the last year in " +
+                                           "the saved state, " + str(state["Years"][-1]))
+        new_tournaments, state["Leftovers"] = data.add_year(list_of_dicts, tournament_index,
+                                                            file_name, year, 
+                                                            state["Leftovers"],
+                                                            cache_dir = cache_dir,
+                                                            data_dir = data_dir)
+        rounds.assign_rounds(list_of_dicts, tournament_index = new_tournaments,
+                             workers = workers)
+        state["Years"].append(year)
+    
+    rankings.assign_wbw_rankings(list_of_dicts, windowed = state["Windowed"], backend = backend,
+                                 max_iterations = max_iterations,
+                                 tournament_index = tournament_index, state = state["WbW"],
+                                 checkpoint_file = checkpoint_file,
+                                 iteration_log = iteration_log)
+    if state.get("Elo") != None:
+        ratings.assign_elo_ratings(list_of_dicts, 
+                                   tournament_index = tournament_index[first_new_tournament:],
+                                   engine = state["Elo"])
+    return list_of_dicts, tournament_index, state.get("Elo")
+
+def load_state(file_path):
+    """
+    Loads a pipeline state saved by save_state
+    """
+    with open(file_path, "rb") as f:
+        return pickle.load(f)
+
+def save_state(file_path, state):
+    """
+    Saves a pipeline state made by run_pipeline or update_pipeline to a file,
+    writing it to a temporary file first so a crash does not leave a broken 
+    state
+    """
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(state, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, file_path)
+
+def format_value(value):
+    """
+    Formats a value for a csv file: dates as YYYY-MM-DD, nan as blank, and
+    whole number floats without a decimal point
+    """
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value == int(value):
+            return str(int(value))
+    return str(value)
+
+def write_matches(list_of_dicts, file_path):
+    """
+    Writes the matches, with their winners, rounds and WbW rankings, to a csv
+    file
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries
+        list of dictionaries representing rows of data
+    file_path : string
+        path to the csv file
+
+    Returns
+    -------
+    None.
+    """
+    column_names = list(MATCH_COLUMNS)
+    for dic in list_of_dicts:
+        for key in dic.keys():
+            if key not in column_names and key != "Round robin tournament":
+                column_names.append(key)
+    with open(file_path, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(column_names)
+        for dic in list_of_dicts:
+            writer.writerow([format_value(dic[name]) if name in dic.keys() else "" for
+                             name in column_names])
+
+def write_rankings(list_of_dicts, file_path, top_k = None, engine = None):
+    """
+    Writes the win and loss penalty rankings of each year and of all years,
+    and the current Elo rankings if there are any, to a json file
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries
+        list of dictionaries representing rows of data with rounds assigned
+    file_path : string
+        path to the json file
+    top_k : int, optional
+        If given, only the top_k players of each ranking are written. The
+        default is None.
+    engine : dictionary, optional
+        Elo rating engine whose rankings are written under "Elo." The default
+        is None.
+
+    Returns
+    -------
+    None.
+    """
+    by_year = rankings.batch_rankings(list_of_dicts, top_k = top_k)
+    output = {"Years": {str(year): {"Wins": by_year[year]["Wins"],
+                                    "Loss penalty": by_year[year]["Loss penalty"]} for
+                        year in by_year.keys()},
+              "All": {"Wins": rankings.get_win_rankings_all(list_of_dicts, top_k = top_k),
+                      "Loss penalty": rankings.loss_penalty_ranking_all(list_of_dicts,
+                                                                        top_k = top_k)}}
+    if engine != None:
+        output["Elo"] = ratings.rating_rankings(engine, top_k = top_k)
+    with open(file_path, "w") as f:
+        json.dump(output, f, indent = 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# running totals of each player's results for ranking over ranges of the data
+
+from bisect import bisect_left, bisect_right
+
+def main():
+    pass
+
+def new_ranking_store():
+    """
+    Makes an empty store of running totals
+
+    Returns
+    -------
+    store : dictionary
+        dictionary with a list of the segments of the data added so far under
+        "Segments," a dictionary of year: list of the positions of the segments
+        of matches that ended in that year under "Years," the number of rows
+        added so far under "Rows," and a dictionary of player name: the
+        player's running totals under "Players." A segment is a run of
+        consecutive rows of the same tournament with end dates in the same
+        year. Each player's running totals are a dictionary with the positions
+        of the segments the player played in under "Segments," and, for each of
+        those segments, the player's total number of wins, losses, and round
+        numbers of matches won up to and including that segment under "Wins,"
+        "Losses," and "Round points," a list of the total number of losses in
+        each round number under "Round losses," and where the player first
+        appears in that segment under "First"
+    """
+    return {"Segments": [], "Years": {}, "Rows": 0, "Players": {}}
+
+def add_player_segment(store, player, position, first):
+    """
+    Starts the running totals of a player for a new segment, carrying over the
+    totals from their last segment
+
+    Returns
+    -------
+    totals : dictionary
+        the player's running totals
+    """
+    if player not in store["Players"].keys():
+        store["Players"][player] = {"Segments": [], "Wins": [], "Losses": [],
+                                    "Round points": [], "Round losses": [], "First": []}
+    totals = store["Players"][player]
+    if len(totals["Segments"]) == 0:
+        totals["Wins"].append(0)
+        totals["Losses"].append(0)
+        totals["Round points"].append(0)
+        totals["Round losses"].append([])
+    else:
+        totals["Wins"].append(totals["Wins"][-1])
+        totals["Losses"].append(totals["Losses"][-1])
+        totals["Round points"].append(totals["Round points"][-1])
+        totals["Round losses"].append(list(totals["Round losses"][-1]))
+    totals["Segments"].append(position)
+    totals["First"].append(first)
+    return totals
+
+def add_to_ranking_store(store, list_of_dicts):
+    """
+    Adds matches to the end of a store of running totals, without going through
+    the matches that were already added
+
+    Parameters
+    ----------
+    store : dictionary
+        store as made by new_ranking_store
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data that come after the
+        rows already added - each dictionary must have keys "Tournament,"
+        "End date," "Winner," "Loser," and "Round number"
+
+    Returns
+    -------
+    None.
+    """
+    # rows of the last tournament added so far continue its segment
+    current_tournament = None
+    current_year = None
+    if len(store["Segments"]) != 0:
+        current_tournament = store["Segments"][-1]["Tournament"]
+        current_year = store["Segments"][-1]["Year"]
+        position = len(store["Segments"]) - 1
+
+    for i in range(len(list_of_dicts)):
+        row = list_of_dicts[i]
+        year = row["End date"].year
+
+        # start a new segment at a new tournament or a new year
+        if row["Tournament"] != current_tournament or year != current_year:
+            current_tournament = row["Tournament"]
+            current_year = year
+            position = len(store["Segments"])
+            store["Segments"].append({"Tournament": current_tournament, "Year": year,
+                                      "Start": store["Rows"] + i})
+            if year not in store["Years"].keys():
+                store["Years"][year] = []
+            store["Years"][year].append(position)
+
+        # a player's first appearance is ordered by row and then winner before
+        # loser, the order players are added to a dictionary of wins and losses
+        row_number = store["Rows"] + i
+        for player, first in ((row["Winner"], 2 * row_number), (row["Loser"], 2 * row_number + 1)):
+            totals = store["Players"].get(player)
+            if totals == None or totals["Segments"][-1] != position:
+                add_player_segment(store, player, position, first)
+
+        round_number = row["Round number"]
+        winner_totals = store["Players"][row["Winner"]]
+        winner_totals["Wins"][-1] += 1
+        winner_totals["Round points"][-1] += round_number
+        loser_totals = store["Players"][row["Loser"]]
+        loser_totals["Losses"][-1] += 1
+        round_losses = loser_totals["Round losses"][-1]
+        while len(round_losses) < round_number:
+            round_losses.append(0)
+        round_losses[round_number - 1] += 1
+
+    store["Rows"] += len(list_of_dicts)
+
+def build_ranking_store(list_of_dicts):
+    """
+    Makes a store of running totals of each player's results in list_of_dicts
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Tournament," "End date," "Winner," "Loser," and "Round number"
+
+    Returns
+    -------
+    store : dictionary
+        store as made by new_ranking_store with list_of_dicts added
+    """
+    store = new_ranking_store()
+    add_to_ranking_store(store, list_of_dicts)
+    return store
+
+def segments_in_years(store, years):
+    """
+    Returns the sorted positions of the segments of matches that ended in one
+    of years
+    """
+    positions = []
+    for year in set(years):
+        positions.extend(store["Years"].get(year, []))
+    return sorted(positions)
+
+def ranking_store_totals(store, positions):
+    """
+    Adds up each player's results over some of the segments in a store, using
+    the differences between running totals instead of going through the matches
+
+    Parameters
+    ----------
+    store : dictionary
+        store as made by new_ranking_store
+    positions : list of ints
+        sorted positions of the segments to add up
+
+    Returns
+    -------
+    totals : dictionary
+        dictionary with key: value pairs of player name: [number of wins,
+        number of losses, loss penalty score] for each player that played in
+        the segments, in the order the players first appear in the segments
+    """
+    # go through runs of consecutive segments, each of which is the difference
+    # between two running totals
+    runs = []
+    for position in positions:
+        if len(runs) != 0 and runs[-1][1] == position - 1:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+
+    first_appearances = []
+    totals = {}
+
+    for player, player_totals in store["Players"].items():
+        segments = player_totals["Segments"]
+        wins = 0
+        losses = 0
+        round_points = 0
+        round_losses = []
+        first = None
+        for first_position, last_position in runs:
+            low = bisect_left(segments, first_position)
+            high = bisect_right(segments, last_position)
+            if high == low:
+                continue
+            if first == None:
+                first = player_totals["First"][low]
+            wins += player_totals["Wins"][high - 1]
+            losses += player_totals["Losses"][high - 1]
+            round_points += player_totals["Round points"][high - 1]
+            add_round_losses(round_losses, player_totals["Round losses"][high - 1], 1)
+            if low > 0:
+                wins -= player_totals["Wins"][low - 1]
+                losses -= player_totals["Losses"][low - 1]
+                round_points -= player_totals["Round points"][low - 1]
+                add_round_losses(round_losses, player_totals["Round losses"][low - 1], -1)
+        if first == None:
+            continue
+        score = loss_penalty_score(round_points, round_losses)
+        totals[player] = [wins, losses, score]
+        first_appearances.append((first, player))
+
+    first_appearances.sort()
+    return {player: totals[player] for first, player in first_appearances}
+
+def loss_penalty_score(round_points, round_losses):
+    """
+    Works out a loss penalty score from whole number counts: the sum of the
+    round numbers of the matches won, round_points, minus 1 / round number for
+    each match lost, where round_losses[r] is the number of matches lost in
+    round r + 1. The counts are exact, so a player's score comes out the same,
+    down to the last bit, however their matches were added up, and players 
+    with the same results tie exactly.
+    """
+    return round_points - sum([round_losses[r] / (r + 1) for r in range(len(round_losses))])
+
+def add_round_losses(round_losses, other_round_losses, sign):
+    """
+    Adds (sign 1) or subtracts (sign -1) other_round_losses to round_losses
+    """
+    while len(round_losses) < len(other_round_losses):
+        round_losses.append(0)
+    for r in range(len(other_round_losses)):
+        round_losses[r] += sign * other_round_losses[r]
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,328 @@
 # functions for creating rankings
 
 import rounds
+import data
+import ranking_store
+import instrumentation
 import math
-from datetime import timedelta
+import heapq
+import os
+import pickle
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta, date
+from match_table import MatchTable
+
+# numpy is only needed for the numpy backend of wbw
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def main():
     pass
 
-def get_win_rankings_year(list_of_dicts, year):
+def build_date_index(list_of_dicts):
+    """
+    Sorts the matches by end date once so the matches that ended in a range of
+    dates can be found by bisecting instead of going through all of the data
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the key "End date"
+
+    Returns
+    -------
+    date_index : dictionary
+        dictionary with the sorted end date ordinals under "Ordinals" and the
+        index in list_of_dicts of the match with each of those end dates under
+        "Indices"; matches with the same end date are in the order of the data
+    """
+    if isinstance(list_of_dicts, MatchTable):
+        ordinals = list_of_dicts.column("End date")
+    else:
+        ordinals = [dic["End date"].toordinal() for dic in list_of_dicts]
+    
+    # sorted is stable, so matches with the same end date keep their order
+    indices = sorted(range(len(ordinals)), key = lambda i: ordinals[i])
+    
+    return {"Ordinals": [ordinals[i] for i in indices], "Indices": indices}
+
+def matches_in_date_ranges(list_of_dicts, date_ranges, date_index):
+    """
+    Finds the matches that ended in any of the given ranges of dates using a
+    date index
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the key "End date"
+    date_ranges : list of tuples
+        list of (first date, last date) tuples of dates or datetimes; both 
+        dates are included in the range
+    date_index : dictionary
+        date index of list_of_dicts as made by build_date_index
+
+    Returns
+    -------
+    list of dictionaries or MatchTable
+        the matches that ended in one of date_ranges, in the same order as in
+        list_of_dicts; a MatchTable if list_of_dicts is a MatchTable
+    """
+    ordinals = date_index["Ordinals"]
+    indices = set()
+    for first_date, last_date in date_ranges:
+        low = bisect_left(ordinals, first_date.toordinal())
+        high = bisect_right(ordinals, last_date.toordinal())
+        indices.update(date_index["Indices"][low:high])
+    
+    # put the matches back in the order of the data, which decides the order 
+    # of players with the same score in the rankings
+    indices = sorted(indices)
+    
+    if isinstance(list_of_dicts, MatchTable):
+        return list_of_dicts.select(indices)
+    return [list_of_dicts[i] for i in indices]
+
+def year_date_ranges(years):
+    """
+    Turns years into ranges of dates, joining consecutive years into one range
+
+    Parameters
+    ----------
+    years : an iterable type holding integers
+        the years
+
+    Returns
+    -------
+    date_ranges : list of tuples
+        list of (January 1, December 31) tuples of dates covering years
+    """
+    date_ranges = []
+    for year in sorted(set(years)):
+        if len(date_ranges) != 0 and date_ranges[-1][1].year == year - 1:
+            date_ranges[-1] = (date_ranges[-1][0], date(year, 12, 31))
+        else:
+            date_ranges.append((date(year, 1, 1), date(year, 12, 31)))
+    return date_ranges
+
+def matches_in_years(list_of_dicts, years, date_index = None):
+    """
+    Finds the matches that ended in one of the given years
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the key "End date"
+    years : an iterable type holding integers
+        the years to keep matches from
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index, used to find
+        the matches without going through all of the data. The default is None.
+
+    Returns
+    -------
+    list of dictionaries or MatchTable
+        the matches that ended in one of years, in the same order as in
+        list_of_dicts; a MatchTable if list_of_dicts is a MatchTable
+    """
+    if date_index != None:
+        return matches_in_date_ranges(list_of_dicts, year_date_ranges(years), date_index)
+    
+    if not isinstance(list_of_dicts, MatchTable):
+        return [dic for dic in list_of_dicts if dic["End date"].year in years]
+    
+    # look up the year of each distinct end date ordinal only once
+    years = set(years)
+    end_dates = list_of_dicts.column("End date")
+    ordinal_in_years = {}
+    indices = []
+    for i in range(len(end_dates)):
+        if end_dates[i] not in ordinal_in_years.keys():
+            ordinal_in_years[end_dates[i]] = date.fromordinal(end_dates[i]).year in years
+        if ordinal_in_years[end_dates[i]]:
+            indices.append(i)
+    
+    return list_of_dicts.select(indices)
+
+def rank_players(player_scores, top_k = None):
+    """
+    Sorts (player, score) tuples in reverse order by score, keeping players with
+    the same score in the order they were given
+
+    Parameters
+    ----------
+    player_scores : iterable of tuples
+        (player, score) tuples
+    top_k : int, optional
+        If given, only the top_k highest scoring tuples are found, using a heap
+        instead of sorting every player. The default is None.
+
+    Returns
+    -------
+    list of tuples
+        list of (player, score) tuples sorted in reverse order by score
+    """
+    if top_k == None:
+        return sorted(player_scores, key = lambda tup: tup[1], reverse = True)
+    # nlargest gives the same tuples in the same order as sorting and slicing
+    return heapq.nlargest(top_k, player_scores, key = lambda tup: tup[1])
+
+def iter_rankings(player_scores):
+    """
+    Yields (player, score) tuples in reverse order by score, keeping players
+    with the same score in the order they were given, without sorting every 
+    player up front; each tuple is taken off a heap when it is needed
+
+    Parameters
+    ----------
+    player_scores : iterable of tuples
+        (player, score) tuples
+
+    Yields
+    ------
+    tuple
+        the (player, score) tuple with the next highest score
+    """
+    heap = [(-score, position, player) for position, (player, score) in 
+            enumerate(player_scores)]
+    heapq.heapify(heap)
+    while len(heap) != 0:
+        negative_score, position, player = heapq.heappop(heap)
+        yield player, -negative_score
+
+def get_win_rankings_year(list_of_dicts, year, date_index = None, store = None,
+                          top_k = None):
     """
     Ranks players that played in one year by number of wins, with rank #1 being
     the player with the most wins
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," and "Loser"
     year : int
         the year for which you want rankings
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index, used to find
+        the matches without going through all of the data. The default is None.
+    store : dictionary, optional
+        store of running totals of list_of_dicts as made by 
+        ranking_store.build_ranking_store, used to add up each player's results
+        without going through the matches. The default is None.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
 
     Returns
     -------
     list of tuples
         list of (player, rank) tuples sorted in reverse order by rank
     """
-    applicable_data = [dic for dic in list_of_dicts if dic["End date"].year == year]
+    if store != None:
+        totals = ranking_store.ranking_store_totals(store, 
+                                                    ranking_store.segments_in_years(store, [year]))
+        return rank_players([(player, totals[player][0]) for player in totals], 
+                            top_k = top_k)
+    applicable_data = matches_in_years(list_of_dicts, [year], date_index = date_index)
     wins_losses_dict = rounds.calculate_wins_losses(applicable_data, 0,
                                                     len(applicable_data) - 1)
-    return sorted([(player, wins_losses_dict[player][0]) for 
-            player in wins_losses_dict], key = lambda tup: tup[1], reverse = True)
+    return rank_players([(player, wins_losses_dict[player][0]) for 
+            player in wins_losses_dict], top_k = top_k)
 
-def get_win_rankings_years(list_of_dicts, years):
+def get_win_rankings_years(list_of_dicts, years, date_index = None, store = None,
+                           top_k = None):
     """
     Ranks players that played over a range of years by cummulative number of wins
     over the years, with rank #1 being the player with the most wins
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," and "Loser"
     years : an iterable type holding integers
         the range of years for which you want rankings
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index, used to find
+        the matches without going through all of the data. The default is None.
+    store : dictionary, optional
+        store of running totals of list_of_dicts as made by 
+        ranking_store.build_ranking_store, used to add up each player's results
+        without going through the matches. The default is None.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
 
     Returns
     -------
     list of tuples
         list of (player, rank) tuples sorted in reverse order by rank
     """
-    applicable_data = [dic for dic in list_of_dicts if dic["End date"].year in years]
+    if store != None:
+        totals = ranking_store.ranking_store_totals(store, 
+                                                    ranking_store.segments_in_years(store, years))
+        return rank_players([(player, totals[player][0]) for player in totals], 
+                            top_k = top_k)
+    applicable_data = matches_in_years(list_of_dicts, years, date_index = date_index)
     wins_losses_dict = rounds.calculate_wins_losses(applicable_data, 0,
                                                     len(applicable_data) - 1)
-    return sorted([(player, wins_losses_dict[player][0]) for 
-            player in wins_losses_dict], key = lambda tup: tup[1], reverse = True)
+    return rank_players([(player, wins_losses_dict[player][0]) for 
+            player in wins_losses_dict], top_k = top_k)
     
-def get_win_rankings_all(list_of_dicts):
+def get_win_rankings_dates(list_of_dicts, first_date, last_date, date_index = None,
+                           top_k = None):
+    """
+    Ranks players that played over a range of dates by cummulative number of 
+    wins over the range, with rank #1 being the player with the most wins
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the keys "End date," "Winner," and "Loser"
+    first_date : date or datetime
+        first end date of the matches to use
+    last_date : date or datetime
+        last end date (inclusive) of the matches to use
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index. The default
+        is None, which builds it.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+
+    Returns
+    -------
+    list of tuples
+        list of (player, rank) tuples sorted in reverse order by rank
+    """
+    if date_index == None:
+        date_index = build_date_index(list_of_dicts)
+    applicable_data = matches_in_date_ranges(list_of_dicts, [(first_date, last_date)],
+                                             date_index)
+    wins_losses_dict = rounds.calculate_wins_losses(applicable_data, 0,
+                                                    len(applicable_data) - 1)
+    return rank_players([(player, wins_losses_dict[player][0]) for 
+            player in wins_losses_dict], top_k = top_k)
+
+def get_win_rankings_all(list_of_dicts, top_k = None):
     """
     Ranks the players in all of the data in list_of_dicts by cumulative number 
     of wins over the years, with rank #1 being the player with the most wins
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," and "Loser"
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
 
     Returns
     -------
@@ -73,40 +331,162 @@ def get_win_rankings_all(list_of_dicts):
     """
     wins_losses_dict = rounds.calculate_wins_losses(list_of_dicts, 0,
                                                     len(list_of_dicts) - 1)
-    return sorted([(player, wins_losses_dict[player][0]) for 
-            player in wins_losses_dict], key = lambda tup: tup[1], reverse = True)
+    return rank_players([(player, wins_losses_dict[player][0]) for 
+            player in wins_losses_dict], top_k = top_k)
 
-def calculate_loss_penalty_scores(list_of_dicts):
+def calculate_loss_penalty_scores(list_of_dicts, backend = "dict"):
     """
     Calculates scores for players based on match results and the match round numbers
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "Winner," "Loser," and "Round number"
+    backend : string, optional
+        "dict" to add up the scores one match at a time with dictionaries or
+        "numpy" to add them up for all matches at once over integer player ids
+        with numpy. Both give the same scores. If numpy is not installed, 
+        "numpy" uses the dictionaries. The default is "dict".
 
     Returns
     -------
     scores : dictionary
-        dictionary with key: value pairs of player: score
+        dictionary with key: value pairs of player: score, worked out from 
+        each player's round points and losses in each round with
+        ranking_store.loss_penalty_score
     """
+    assertion_msg = 'backend must be "dict" or "numpy," not ' + str(backend)
+    assert backend in ("dict", "numpy"), assertion_msg
     
-    scores = {}
+    is_id_table = (isinstance(list_of_dicts, MatchTable) and 
+                   list_of_dicts.column_kind("Winner") == "player" and
+                   list_of_dicts.column_kind("Loser") == "player" and
+                   list_of_dicts.column_kind("Round number") == "int")
     
-    for i in range(len(list_of_dicts)):
-        if list_of_dicts[i]["Winner"] in scores.keys():
-            scores[list_of_dicts[i]["Winner"]] += list_of_dicts[i]["Round number"]
-        else:
-            scores[list_of_dicts[i]["Winner"]] = list_of_dicts[i]["Round number"]
-        if list_of_dicts[i]["Loser"] in scores.keys():
-            scores[list_of_dicts[i]["Loser"]] -= 1 / list_of_dicts[i]["Round number"]
+    if backend == "numpy" and np != None:
+        if is_id_table:
+            winner_ids = np.frombuffer(list_of_dicts.column("Winner"), dtype = np.int32)
+            loser_ids = np.frombuffer(list_of_dicts.column("Loser"), dtype = np.int32)
+            round_numbers = np.frombuffer(list_of_dicts.column("Round number"), 
+                                          dtype = np.int64)
+            names = list_of_dicts.names["player"]
         else:
-            scores[list_of_dicts[i]["Loser"]] = -1 / list_of_dicts[i]["Round number"]
+            # give each player an id in the order they first appear
+            player_ids = {}
+            winner_ids = []
+            loser_ids = []
+            round_numbers = []
+            for dic in list_of_dicts:
+                winner_ids.append(player_ids.setdefault(dic["Winner"], len(player_ids)))
+                loser_ids.append(player_ids.setdefault(dic["Loser"], len(player_ids)))
+                round_numbers.append(dic["Round number"])
+            names = list(player_ids.keys())
+        return loss_penalty_scores_numpy(np.asarray(winner_ids, dtype = np.intp),
+                                         np.asarray(loser_ids, dtype = np.intp),
+                                         np.asarray(round_numbers, dtype = float), names)
+    
+    # add up the scores using the player ids of a MatchTable
+    if is_id_table:
+        id_scores = loss_penalty_scores_from_columns(list_of_dicts.column("Winner"),
+                                                     list_of_dicts.column("Loser"),
+                                                     list_of_dicts.column("Round number"))
+        return {list_of_dicts.player_name(player_id): score for 
+                player_id, score in id_scores.items()}
+    
+    return loss_penalty_scores_from_columns([dic["Winner"] for dic in list_of_dicts],
+                                            [dic["Loser"] for dic in list_of_dicts],
+                                            [dic["Round number"] for dic in list_of_dicts])
+
+def loss_penalty_scores_from_columns(winners, losers, round_numbers):
+    """
+    Counts each player's round points and losses in each round, one match at
+    a time, and works out their scores with ranking_store.loss_penalty_score,
+    so the scores are the same as those found from a ranking store
+
+    Parameters
+    ----------
+    winners : sequence
+        winner of each match
+    losers : sequence
+        loser of each match
+    round_numbers : sequence of ints
+        round number of each match
+
+    Returns
+    -------
+    scores : dictionary
+        dictionary with key: value pairs of player: score for each player that
+        played, in the order the players first appear, winner before loser
+    """
+    round_points = {}
+    round_losses = {}
+    
+    for i in range(len(winners)):
+        for player in (winners[i], losers[i]):
+            if player not in round_points.keys():
+                round_points[player] = 0
+                round_losses[player] = []
+        round_points[winners[i]] += round_numbers[i]
+        losses = round_losses[losers[i]]
+        while len(losses) < round_numbers[i]:
+            losses.append(0)
+        losses[round_numbers[i] - 1] += 1
+    
+    return {player: ranking_store.loss_penalty_score(round_points[player], 
+                                                     round_losses[player]) for 
+            player in round_points.keys()}
+
+def loss_penalty_scores_numpy(winner_ids, loser_ids, round_numbers, names):
+    """
+    Calculates loss penalty scores for all matches at once, adding each match's
+    round number to the winner's score and counting the loser's losses in 
+    each round with np.bincount
+
+    Parameters
+    ----------
+    winner_ids : numpy array of ints
+        id of the winner of each match
+    loser_ids : numpy array of ints
+        id of the loser of each match
+    round_numbers : numpy array of floats
+        round number of each match
+    names : list of strings
+        names[i] is the name of the player with id i
+
+    Returns
+    -------
+    scores : dictionary
+        dictionary with key: value pairs of player: score for each player that
+        played, in the order the players first appear in the matches
+    """
+    if len(winner_ids) == 0:
+        return {}
+    
+    # count the losses in each round, and take them off one round at a time in
+    # the same order as ranking_store.loss_penalty_score so the scores are the
+    # same down to the last bit
+    num_rounds = int(round_numbers.max())
+    round_points = np.bincount(winner_ids, weights = round_numbers, minlength = len(names))
+    round_losses = np.bincount(loser_ids * num_rounds + round_numbers.astype(np.intp) - 1,
+                               minlength = len(names) * num_rounds).reshape(len(names), 
+                                                                             num_rounds)
+    penalties = np.zeros(len(names))
+    for r in range(num_rounds):
+        penalties = penalties + round_losses[:, r] / (r + 1)
+    scores = round_points - penalties
+    
+    # the players in the order they first appear, winner before loser
+    appearances = np.empty(2 * len(winner_ids), dtype = np.intp)
+    appearances[0::2] = winner_ids
+    appearances[1::2] = loser_ids
+    player_ids, first_appearances = np.unique(appearances, return_index = True)
+    player_ids = player_ids[np.argsort(first_appearances)]
     
-    return scores
+    return {names[player_id]: float(scores[player_id]) for player_id in player_ids.tolist()}
 
-def loss_penalty_ranking_year(list_of_dicts, year):
+def loss_penalty_ranking_year(list_of_dicts, year, date_index = None, store = None,
+                              top_k = None, backend = "dict"):
     """
     Ranks the players that played in one year by scores based on their match
     results and round numbers of those matches. Rank #1 is the highest score (the
@@ -114,23 +494,41 @@ def loss_penalty_ranking_year(list_of_dicts, year):
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," "Loser," and "Round number"
     year : int
         the year for which to make rankings
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index, used to find
+        the matches without going through all of the data. The default is None.
+    store : dictionary, optional
+        store of running totals of list_of_dicts as made by 
+        ranking_store.build_ranking_store, used to add up each player's results
+        without going through the matches. The default is None.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+    backend : string, optional
+        backend of calculate_loss_penalty_scores, "dict" or "numpy." The 
+        default is "dict".
 
     Returns
     -------
     list of tuples
         list of (player, rank) tuples sorted in reverse order by rank
     """
-    applicable_data = [dic for dic in list_of_dicts if dic["End date"].year == year]
-    scores_dict = calculate_loss_penalty_scores(applicable_data)
-    return sorted([(player, score) for player, score in 
-            scores_dict.items()], key = lambda tup: tup[1], reverse = True)
+    if store != None:
+        totals = ranking_store.ranking_store_totals(store, 
+                                                    ranking_store.segments_in_years(store, [year]))
+        return rank_players([(player, totals[player][2]) for player in totals], 
+                            top_k = top_k)
+    applicable_data = matches_in_years(list_of_dicts, [year], date_index = date_index)
+    scores_dict = calculate_loss_penalty_scores(applicable_data, backend = backend)
+    return rank_players(scores_dict.items(), top_k = top_k)
 
-def loss_penalty_ranking_years(list_of_dicts, years):
+def loss_penalty_ranking_years(list_of_dicts, years, date_index = None, store = None,
+                               top_k = None, backend = "dict"):
     """
     Ranks the players that played over a range of years by scores based on their
     match esults and round numbers of those matches. Rank #1 is the highest score 
@@ -138,23 +536,78 @@ def loss_penalty_ranking_years(list_of_dicts, years):
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," "Loser," and "Round number"
     years : an iterable type storing integers
         the range of years to use to make the rankings
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index, used to find
+        the matches without going through all of the data. The default is None.
+    store : dictionary, optional
+        store of running totals of list_of_dicts as made by 
+        ranking_store.build_ranking_store, used to add up each player's results
+        without going through the matches. The default is None.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+    backend : string, optional
+        backend of calculate_loss_penalty_scores, "dict" or "numpy." The 
+        default is "dict".
 
     Returns
     -------
     list of tuples
         list of (player, rank) tuples sorted in reverse order by rank
     """
-    applicable_data = [dic for dic in list_of_dicts if dic["End date"].year in years]
-    scores_dict = calculate_loss_penalty_scores(applicable_data)
-    return sorted([(player, score) for player, score in 
-            scores_dict.items()], key = lambda tup: tup[1], reverse = True)
+    if store != None:
+        totals = ranking_store.ranking_store_totals(store, 
+                                                    ranking_store.segments_in_years(store, years))
+        return rank_players([(player, totals[player][2]) for player in totals], 
+                            top_k = top_k)
+    applicable_data = matches_in_years(list_of_dicts, years, date_index = date_index)
+    scores_dict = calculate_loss_penalty_scores(applicable_data, backend = backend)
+    return rank_players(scores_dict.items(), top_k = top_k)
 
-def loss_penalty_ranking_all(list_of_dicts):
+def loss_penalty_ranking_dates(list_of_dicts, first_date, last_date, 
+                               date_index = None, top_k = None, backend = "dict"):
+    """
+    Ranks the players that played over a range of dates by scores based on 
+    their match results and round numbers of those matches. Rank #1 is the 
+    highest score (the best player)
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the keys "End date," "Winner," "Loser," and "Round number"
+    first_date : date or datetime
+        first end date of the matches to use
+    last_date : date or datetime
+        last end date (inclusive) of the matches to use
+    date_index : dictionary, optional
+        date index of list_of_dicts as made by build_date_index. The default
+        is None, which builds it.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+    backend : string, optional
+        backend of calculate_loss_penalty_scores, "dict" or "numpy." The 
+        default is "dict".
+
+    Returns
+    -------
+    list of tuples
+        list of (player, rank) tuples sorted in reverse order by rank
+    """
+    if date_index == None:
+        date_index = build_date_index(list_of_dicts)
+    applicable_data = matches_in_date_ranges(list_of_dicts, [(first_date, last_date)],
+                                             date_index)
+    scores_dict = calculate_loss_penalty_scores(applicable_data, backend = backend)
+    return rank_players(scores_dict.items(), top_k = top_k)
+
+def loss_penalty_ranking_all(list_of_dicts, top_k = None, backend = "dict"):
     """
     Ranks the players in all of the list_of_dicts by scores based on their
     match esults and round numbers of those matches. Rank #1 is the highest score 
@@ -162,20 +615,110 @@ def loss_penalty_ranking_all(list_of_dicts):
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - all dictionaries must
         have the keys "End date," "Winner," "Loser," and "Round number"
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+    backend : string, optional
+        backend of calculate_loss_penalty_scores, "dict" or "numpy." The 
+        default is "dict".
 
     Returns
     -------
     list of tuples
         list of (player, rank) tuples sorted in reverse order by rank
     """
-    scores_dict = calculate_loss_penalty_scores(list_of_dicts)
-    return sorted([(player, score) for player, score in 
-            scores_dict.items()], key = lambda tup: tup[1], reverse = True)
+    scores_dict = calculate_loss_penalty_scores(list_of_dicts, backend = backend)
+    return rank_players(scores_dict.items(), top_k = top_k)
 
-def wbw_one_iteration(list_of_dicts, num_players, initial_scores):
+def batch_rankings(list_of_dicts, key = None, top_k = None):
+    """
+    Ranks the players in each group of matches by wins and by loss penalty
+    score, going through the data once for all of the groups instead of once
+    for each group
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - all dictionaries must
+        have the keys "End date," "Winner," "Loser," and "Round number"
+    key : function, optional
+        function that takes a match and returns the group it belongs to. The
+        default is None, which groups matches by the year of their end date.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned, found
+        with a heap instead of sorting every player. The default is None.
+
+    Returns
+    -------
+    rankings : dictionary
+        dictionary with key: value pairs of group: dictionary with the 
+        players' number of wins and losses under "Wins losses" (as made by
+        rounds.calculate_wins_losses), their loss penalty scores under 
+        "Scores" (as made by calculate_loss_penalty_scores), and lists of 
+        (player, rank) tuples sorted in reverse order by rank under "Wins" and
+        "Loss penalty" (as made by get_win_rankings_year and 
+        loss_penalty_ranking_year); the groups are in the order they are 
+        first found in the data
+    """
+    
+    # look up the year of each distinct end date only once
+    if key == None:
+        years_of_dates = {}
+        def key(dic):
+            end_date = dic["End date"]
+            if end_date not in years_of_dates.keys():
+                years_of_dates[end_date] = end_date.year
+            return years_of_dates[end_date]
+    
+    groups = {}
+    
+    # add up the wins, losses, and scores of every group in the same pass, in
+    # the same order as the functions for one group so the results are the same
+    for dic in list_of_dicts:
+        group = key(dic)
+        if group not in groups.keys():
+            groups[group] = {"Wins losses": {}, "Round points": {}, "Round losses": {}}
+        wins_losses = groups[group]["Wins losses"]
+        round_points = groups[group]["Round points"]
+        round_losses = groups[group]["Round losses"]
+        winner = dic["Winner"]
+        loser = dic["Loser"]
+        round_number = dic["Round number"]
+        if winner in wins_losses.keys():
+            wins_losses[winner][0] += 1
+        else:
+            wins_losses[winner] = [1, 0]
+            round_points[winner] = 0
+            round_losses[winner] = []
+        if loser in wins_losses.keys():
+            wins_losses[loser][1] += 1
+        else:
+            wins_losses[loser] = [0, 1]
+            round_points[loser] = 0
+            round_losses[loser] = []
+        round_points[winner] += round_number
+        losses = round_losses[loser]
+        while len(losses) < round_number:
+            losses.append(0)
+        losses[round_number - 1] += 1
+    
+    for group in groups.values():
+        group["Scores"] = {player: ranking_store.loss_penalty_score(group["Round points"][player],
+                                                                    group["Round losses"][player])
+                           for player in group["Round points"].keys()}
+        del group["Round points"]
+        del group["Round losses"]
+        group["Wins"] = rank_players([(player, record[0]) for player, record in 
+                                      group["Wins losses"].items()], top_k = top_k)
+        group["Loss penalty"] = rank_players(group["Scores"].items(), top_k = top_k)
+    
+    return groups
+
+def wbw_one_iteration(list_of_dicts, num_players, initial_scores, defeated_by = None,
+                      sort_rankings = True):
     """
     Performs one iteration of calculating scores based on who a player beat
 
@@ -188,32 +731,56 @@ def wbw_one_iteration(list_of_dicts, num_players, initial_scores):
         the number of players present in list_of_dicts
     initial_scores : dictionary
         dictionary with key: value pairs of player: initial score
+    defeated_by : dictionary, optional
+        dictionary with key: value pairs of player: dictionary of winner: number
+        of times the winner beat the player, as built by build_defeated_by. If
+        given, it is used instead of list_of_dicts, which can be None. The 
+        default is None.
+    sort_rankings : Boolean, optional
+        If False, skip sorting the players and return None instead of the 
+        sorted list. The default is True.
 
     Returns
     -------
     new_scores : dictionary
         new dictionary with key: value pairs of player: new score
     list of tuples
-        list of (player, new score) tuples in reverse order by new score
+        list of (player, new score) tuples in reverse order by new score, or
+        None if sort_rankings is False
     """
     
     # initialise new scores
     new_scores = {player: 0 for player in initial_scores.keys()}
     
-    # find who each player lost to
-    defeated_by = {player: [] for player in initial_scores.keys()}
-    for match in list_of_dicts:
-        defeated_by[match["Loser"]].append(match["Winner"])
+    if defeated_by != None:
+        # pass the shares using the counts of who each player lost to
+        for player, winners in defeated_by.items():
+            number_lost_to = sum(winners.values())
+            if number_lost_to > 0:
+                share = initial_scores[player] / number_lost_to
+                for winner, times_lost in winners.items():
+                    new_scores[winner] += share * times_lost
+            else:
+                new_scores[player] += initial_scores[player]
     
-    # pass the shares to create the new scores
-    for player in defeated_by.keys():
-        number_lost_to = len(defeated_by[player])
-        if number_lost_to > 0:
-            for i in range(number_lost_to):
-                winner = defeated_by[player].pop()
-                new_scores[winner] += initial_scores[player] / number_lost_to
-        else:
-            new_scores[player] += initial_scores[player]
+    else:
+        # find who each player lost to
+        defeated_by = {player: [] for player in initial_scores.keys()}
+        for match in list_of_dicts:
+            defeated_by[match["Loser"]].append(match["Winner"])
+        
+        # pass the shares to create the new scores
+        for player in defeated_by.keys():
+            number_lost_to = len(defeated_by[player])
+            if number_lost_to > 0:
+                for i in range(number_lost_to):
+                    winner = defeated_by[player].pop()
+                    new_scores[winner] += initial_scores[player] / number_lost_to
+            else:
+                new_scores[player] += initial_scores[player]
+    
+    if not sort_rankings:
+        return new_scores, None
     
     # return both the dictionary holding the players and scores as well as a
     # sorted list
@@ -221,7 +788,68 @@ def wbw_one_iteration(list_of_dicts, num_players, initial_scores):
                                for player in new_scores.keys()], 
                               key = lambda x: x[1], reverse = True)
 
-def wbw(list_of_dicts, initial_scores_dict = None):
+def scores_residual(new_scores, old_scores, norm = "l1"):
+    """
+    Calculates the size of the change between two sets of wbw scores
+
+    Parameters
+    ----------
+    new_scores : dictionary
+        dictionary with key: value pairs of player: new score
+    old_scores : dictionary
+        dictionary with key: value pairs of player: old score for the same 
+        players as new_scores
+    norm : string, optional
+        "l1" for the sum of the absolute changes or "linf" for the largest
+        absolute change. The default is "l1".
+
+    Returns
+    -------
+    float
+        the size of the change in scores
+    """
+    changes = [abs(new_scores[player] - old_scores[player]) for player in new_scores.keys()]
+    if len(changes) == 0:
+        return 0.0
+    if norm == "l1":
+        return sum(changes)
+    return max(changes)
+
+def build_defeated_by(list_of_dicts):
+    """
+    Builds the loser to winner structure used by wbw, counting how many times
+    each player lost to each of their opponents
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries
+        list of dictionaries representing rows of data - all dictionaries must
+        have the keys "Winner" and "Loser"
+
+    Returns
+    -------
+    defeated_by : dictionary
+        dictionary with key: value pairs of player: dictionary of winner: number
+        of times the winner beat the player, with every player that played in
+        list_of_dicts as a key
+    """
+    defeated_by = {}
+    for match in list_of_dicts:
+        if match["Winner"] not in defeated_by.keys():
+            defeated_by[match["Winner"]] = {}
+        if match["Loser"] not in defeated_by.keys():
+            defeated_by[match["Loser"]] = {}
+        winners = defeated_by[match["Loser"]]
+        if match["Winner"] in winners.keys():
+            winners[match["Winner"]] += 1
+        else:
+            winners[match["Winner"]] = 1
+    
+    return defeated_by
+
+def wbw(list_of_dicts, initial_scores_dict = None, defeated_by = None, 
+        backend = "dict", tolerance = None, norm = "l1", max_iterations = None,
+        return_info = False, top_k = None):
     """
     A recursive ranking system assigning scores based on who beats who, giving 
     more weight to beating players with high scores
@@ -235,6 +863,36 @@ def wbw(list_of_dicts, initial_scores_dict = None):
         Dictionary in the form of player: score. The scores are used to initialise 
         the new score estimates. Under the default, None, each player is assigned 
         an initial score equal to 1/n, where n is the number of unique players.
+    defeated_by : dictionary, optional
+        Dictionary in the form of player: dictionary of winner: number of times 
+        the winner beat the player, as built by build_defeated_by or kept up to 
+        date by a 52-week window. If given, the players and results are taken
+        from it and list_of_dicts can be None. The default is None.
+    backend : string, optional
+        "dict" to pass the shares one player at a time with dictionaries or
+        "numpy" to build a sparse loser to winner transition matrix once and
+        run the iterations as matrix-vector products, which needs numpy. The 
+        default is "dict".
+    tolerance : float, optional
+        If given, stop once the change in scores between two iterations is at
+        most tolerance instead of waiting for the ranking order to stay the 
+        same 3 times in a row, so the players are only sorted once at the end.
+        The default is None.
+    norm : string, optional
+        How the change in scores is measured, "l1" for the sum of the absolute
+        changes or "linf" for the largest absolute change. The default is "l1".
+    max_iterations : int, optional
+        If given, stop after this many iterations even if the scores have not
+        converged. The default is None.
+    return_info : Boolean, optional
+        If True, also return a dictionary with the number of iterations run 
+        under "Iterations" and the final change in scores under "Residual." 
+        The default is False.
+    top_k : int, optional
+        If given, only the top_k highest ranked players are returned in 
+        new_rankings; with a tolerance, they are found with a heap instead of
+        sorting every player. new_scores still has every player. The default 
+        is None.
 
     Returns
     -------
@@ -242,17 +900,33 @@ def wbw(list_of_dicts, initial_scores_dict = None):
         New list of (player, score) tuples sorted in reverse order by new score
     new_scores: dictionary
         New dictionary with key: value pairs of player: new score
+    info : dictionary
+        Only returned if return_info is True; dictionary with the number of 
+        iterations under "Iterations" and the final residual under "Residual"
     """
-    # get all players
-    players = []
-    for dic in list_of_dicts:
-        if dic["Player 1"] not in players:
-            players.append(dic["Player 1"])
-        if dic["Player 2"] not in players:
-            players.append(dic["Player 2"])
+    assertion_msg = 'backend must be "dict" or "numpy," not ' + str(backend)
+    assert backend in ("dict", "numpy"), assertion_msg
+    if backend == "numpy" and np == None:
+        raise ImportError("numpy is needed for the numpy backend of wbw")
+    assertion_msg = 'norm must be "l1" or "linf," not ' + str(norm)
+    assert norm in ("l1", "linf"), assertion_msg
     
-    # get unique players and number of unique players
-    unique_players = set(players)
+    if defeated_by == None:
+        # get all players
+        players = []
+        for dic in list_of_dicts:
+            if dic["Player 1"] not in players:
+                players.append(dic["Player 1"])
+            if dic["Player 2"] not in players:
+                players.append(dic["Player 2"])
+        
+        # get unique players
+        unique_players = set(players)
+    else:
+        # every player in the results is a key of defeated_by
+        unique_players = defeated_by.keys()
+    
+    # get number of unique players
     num_players = len(unique_players)
     
     # no initial rankings given
@@ -286,25 +960,596 @@ def wbw(list_of_dicts, initial_scores_dict = None):
                                   reverse = True)
         initial_ranking_order = [player for player, score in initial_rankings]
     
-    # initialise convergence count
+    if backend == "numpy":
+        if defeated_by == None:
+            defeated_by = build_defeated_by(list_of_dicts)
+        new_rankings, new_scores, info = wbw_numpy(defeated_by, initial_scores_dict, 
+                                                   initial_ranking_order, 
+                                                   tolerance = tolerance, norm = norm,
+                                                   max_iterations = max_iterations)
+        if top_k != None:
+            new_rankings = new_rankings[:top_k]
+        if return_info:
+            return new_rankings, new_scores, info
+        return new_rankings, new_scores
+    
+    # initialise convergence count and iteration count
     convergence_count = 0
+    iterations = 0
+    converged = False
     
-    # loop until the ranking order stays the same 3 times in a row
-    while convergence_count < 3:
+    # loop until the ranking order stays the same 3 times in a row, or until 
+    # the scores change by at most tolerance
+    while not converged:
         new_scores, new_rankings = wbw_one_iteration(list_of_dicts, num_players, 
-                                                     initial_scores_dict)
-        new_ranking_order = [player for player, score in new_rankings]
-        if new_ranking_order == initial_ranking_order:
-            convergence_count += 1
+                                                     initial_scores_dict,
+                                                     defeated_by = defeated_by,
+                                                     sort_rankings = tolerance == None)
+        iterations += 1
+        residual = scores_residual(new_scores, initial_scores_dict, norm = norm)
+        if tolerance != None:
+            converged = residual <= tolerance
         else:
-            convergence_count = 0
+            new_ranking_order = [player for player, score in new_rankings]
+            if new_ranking_order == initial_ranking_order:
+                convergence_count += 1
+            else:
+                convergence_count = 0
+            converged = convergence_count == 3
+            initial_ranking_order = new_ranking_order
+        if max_iterations != None and iterations >= max_iterations:
+            converged = True
         # update old values
-        initial_ranking_order = new_ranking_order
         initial_scores_dict = new_scores
     
+    # sort once at the end if the rankings were not sorted each iteration
+    if new_rankings == None:
+        new_rankings = rank_players([(player, new_scores[player] * 0.85 + 0.15 / num_players) 
+                                     for player in new_scores.keys()], top_k = top_k)
+    elif top_k != None:
+        new_rankings = new_rankings[:top_k]
+    
+    if return_info:
+        return new_rankings, new_scores, {"Iterations": iterations, "Residual": residual}
     return new_rankings, new_scores
 
-def assign_wbw_rankings(list_of_dicts):
+def build_transition_matrix(defeated_by, player_indices):
+    """
+    Builds the sparse loser to winner transition matrix used by the numpy 
+    backend of wbw in coordinate form, where a player's score is shared 
+    equally between the matches they lost
+
+    Parameters
+    ----------
+    defeated_by : dictionary
+        dictionary with key: value pairs of player: dictionary of winner: number
+        of times the winner beat the player, with every player as a key
+    player_indices : dictionary
+        dictionary with key: value pairs of player: integer index of the player
+        in the score vector
+
+    Returns
+    -------
+    losers : numpy array of ints
+        index of the player passing on a share of their score for each nonzero
+        entry of the matrix
+    winners : numpy array of ints
+        index of the player receiving the share for each nonzero entry
+    shares : numpy array of floats
+        fraction of the loser's score passed on for each nonzero entry
+    undefeated : numpy array of Booleans
+        True at the index of each player that did not lose, who keeps their 
+        own score
+    """
+    losers = []
+    winners = []
+    shares = []
+    undefeated = np.zeros(len(player_indices), dtype = bool)
+    
+    for player, beaten_by in defeated_by.items():
+        number_lost_to = sum(beaten_by.values())
+        if number_lost_to > 0:
+            for winner, times_lost in beaten_by.items():
+                losers.append(player_indices[player])
+                winners.append(player_indices[winner])
+                shares.append(times_lost / number_lost_to)
+        else:
+            undefeated[player_indices[player]] = True
+    
+    return (np.array(losers, dtype = np.intp), np.array(winners, dtype = np.intp),
+            np.array(shares, dtype = float), undefeated)
+
+def wbw_numpy(defeated_by, initial_scores_dict, initial_ranking_order, 
+              tolerance = None, norm = "l1", max_iterations = None):
+    """
+    Runs the wbw iterations as sparse matrix-vector products, stopping once
+    the ranking order stays the same 3 times in a row, or once the scores 
+    change by at most tolerance if it is given
+
+    Parameters
+    ----------
+    defeated_by : dictionary
+        dictionary with key: value pairs of player: dictionary of winner: number
+        of times the winner beat the player, with every player as a key
+    initial_scores_dict : dictionary
+        dictionary with key: value pairs of player: initial score for every
+        player in defeated_by
+    initial_ranking_order : list of strings
+        the players in order of their initial scores, highest first
+    tolerance : float, optional
+        largest change in scores at which to stop. The default is None, which
+        stops based on the ranking order.
+    norm : string, optional
+        "l1" or "linf," how the change in scores is measured. The default is 
+        "l1".
+    max_iterations : int, optional
+        most iterations to run. The default is None, which sets no limit.
+
+    Returns
+    -------
+    new_rankings : list of tuples
+        New list of (player, score) tuples sorted in reverse order by new score
+    new_scores: dictionary
+        New dictionary with key: value pairs of player: new score
+    info : dictionary
+        dictionary with the number of iterations under "Iterations" and the 
+        final change in scores under "Residual"
+    """
+    # give the players integer indices in the same order as the scores so ties
+    # are ranked in the same order as the dict backend
+    players = list(initial_scores_dict.keys())
+    num_players = len(players)
+    player_indices = {players[i]: i for i in range(num_players)}
+    
+    losers, winners, shares, undefeated = build_transition_matrix(defeated_by, 
+                                                                  player_indices)
+    
+    scores = np.array([initial_scores_dict[player] for player in players], dtype = float)
+    ranking_order = np.array([player_indices[player] for player in 
+                              initial_ranking_order], dtype = np.intp)
+    
+    # initialise convergence count and iteration count
+    convergence_count = 0
+    iterations = 0
+    converged = False
+    
+    # loop until the ranking order stays the same 3 times in a row, or until 
+    # the scores change by at most tolerance
+    while not converged:
+        new_scores = np.bincount(winners, weights = scores[losers] * shares,
+                                 minlength = num_players)
+        new_scores[undefeated] += scores[undefeated]
+        iterations += 1
+        changes = np.abs(new_scores - scores)
+        if num_players == 0:
+            residual = 0.0
+        elif norm == "l1":
+            residual = float(changes.sum())
+        else:
+            residual = float(changes.max())
+        if tolerance != None:
+            converged = residual <= tolerance
+        else:
+            damped_scores = new_scores * 0.85 + 0.15 / max(num_players, 1)
+            # a stable sort keeps ties in player order like sorted does
+            new_ranking_order = np.argsort(-damped_scores, kind = "stable")
+            if np.array_equal(new_ranking_order, ranking_order):
+                convergence_count += 1
+            else:
+                convergence_count = 0
+            converged = convergence_count == 3
+            ranking_order = new_ranking_order
+        if max_iterations != None and iterations >= max_iterations:
+            converged = True
+        # update old values
+        scores = new_scores
+    
+    # sort once at the end if the rankings were not sorted each iteration
+    damped_scores = scores * 0.85 + 0.15 / max(num_players, 1)
+    if tolerance != None:
+        ranking_order = np.argsort(-damped_scores, kind = "stable")
+    
+    new_rankings = [(players[i], float(damped_scores[i])) for i in ranking_order]
+    new_scores_dict = {players[i]: float(scores[i]) for i in range(num_players)}
+    
+    return new_rankings, new_scores_dict, {"Iterations": iterations, "Residual": residual}
+
+def new_wbw_window(list_of_dicts):
+    """
+    Sets up a 52-week window that can be moved over list_of_dicts, with matches
+    entering the window when they start before the current date and leaving
+    it when they ended 52 weeks or more before the current date
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Start date," "End date," "Winner," and "Loser"
+
+    Returns
+    -------
+    window : dictionary
+        dictionary holding the matches ordered by start date under "Entries" and 
+        by end date under "Exits" as (date ordinal, index) tuples, how many of
+        each have been passed under "Number entered" and "Number exited," the
+        loser to winner counts of the matches in the window under "Defeated by"
+        and the number of matches each player has in the window under 
+        "Matches played"
+    """
+    entries, exits = window_order(list_of_dicts, 0, len(list_of_dicts))
+    return {"Entries": entries, "Exits": exits, "Number entered": 0, 
+            "Number exited": 0, "Defeated by": {}, "Matches played": {}}
+
+def window_order(list_of_dicts, first_row, last_row):
+    """
+    Orders the matches from first_row up to (not including) last_row by start 
+    date and by end date for a 52-week window
+
+    Returns
+    -------
+    entries : list of tuples
+        (start date ordinal, index) tuples of the matches, sorted
+    exits : list of tuples
+        (end date ordinal, index) tuples of the matches, sorted
+    """
+    if isinstance(list_of_dicts, MatchTable):
+        # dates are already stored as ordinals
+        start_dates = list_of_dicts.column("Start date")
+        end_dates = list_of_dicts.column("End date")
+        entries = sorted([(start_dates[i], i) for i in range(first_row, last_row)])
+        exits = sorted([(end_dates[i], i) for i in range(first_row, last_row)])
+    else:
+        entries = sorted([(list_of_dicts[i]["Start date"].toordinal(), i) for 
+                          i in range(first_row, last_row)])
+        exits = sorted([(list_of_dicts[i]["End date"].toordinal(), i) for 
+                        i in range(first_row, last_row)])
+    return entries, exits
+
+def add_match_to_window(window, match):
+    """
+    Adds a match to the loser to winner counts of a 52-week window
+
+    Parameters
+    ----------
+    window : dictionary
+        window as made by new_wbw_window
+    match : dictionary
+        dictionary representing a row of data - must have keys "Winner" and 
+        "Loser"
+
+    Returns
+    -------
+    None.
+    """
+    defeated_by = window["Defeated by"]
+    matches_played = window["Matches played"]
+    
+    for player in (match["Winner"], match["Loser"]):
+        if player in matches_played.keys():
+            matches_played[player] += 1
+        else:
+            matches_played[player] = 1
+            defeated_by[player] = {}
+    
+    winners = defeated_by[match["Loser"]]
+    if match["Winner"] in winners.keys():
+        winners[match["Winner"]] += 1
+    else:
+        winners[match["Winner"]] = 1
+
+def remove_match_from_window(window, match):
+    """
+    Removes a match from the loser to winner counts of a 52-week window, 
+    dropping players that no longer have any matches in the window
+
+    Parameters
+    ----------
+    window : dictionary
+        window as made by new_wbw_window
+    match : dictionary
+        dictionary representing a row of data - must have keys "Winner" and 
+        "Loser"
+
+    Returns
+    -------
+    None.
+    """
+    defeated_by = window["Defeated by"]
+    matches_played = window["Matches played"]
+    
+    winners = defeated_by[match["Loser"]]
+    winners[match["Winner"]] -= 1
+    if winners[match["Winner"]] == 0:
+        del winners[match["Winner"]]
+    
+    for player in (match["Winner"], match["Loser"]):
+        matches_played[player] -= 1
+        if matches_played[player] == 0:
+            del matches_played[player]
+            del defeated_by[player]
+
+def move_window(list_of_dicts, window, current_date):
+    """
+    Moves a 52-week window so that it holds the matches that started before
+    current_date and ended after 52 weeks before current_date. Only the matches
+    that enter or leave the window are looked at, and the window can be moved
+    backwards as well as forwards.
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries
+        the list of dictionaries the window was made from
+    window : dictionary
+        window as made by new_wbw_window
+    current_date : datetime
+        the date the window should end at
+
+    Returns
+    -------
+    None.
+    """
+    entries = window["Entries"]
+    exits = window["Exits"]
+    current_ordinal = current_date.toordinal()
+    year_ago_ordinal = (current_date - timedelta(weeks = 52)).toordinal()
+    
+    # moving forwards, matches enter before they leave, so add the new matches 
+    # first
+    while (window["Number entered"] < len(entries) and 
+           entries[window["Number entered"]][0] < current_ordinal):
+        add_match_to_window(window, list_of_dicts[entries[window["Number entered"]][1]])
+        window["Number entered"] += 1
+    while (window["Number exited"] < len(exits) and 
+           exits[window["Number exited"]][0] <= year_ago_ordinal):
+        remove_match_from_window(window, list_of_dicts[exits[window["Number exited"]][1]])
+        window["Number exited"] += 1
+    
+    # moving backwards, put back the matches that should not have left before
+    # taking out the ones that should not have entered
+    while (window["Number exited"] > 0 and 
+           exits[window["Number exited"] - 1][0] > year_ago_ordinal):
+        window["Number exited"] -= 1
+        add_match_to_window(window, list_of_dicts[exits[window["Number exited"]][1]])
+    while (window["Number entered"] > 0 and 
+           entries[window["Number entered"] - 1][0] >= current_ordinal):
+        window["Number entered"] -= 1
+        remove_match_from_window(window, list_of_dicts[entries[window["Number entered"]][1]])
+
+def resume_wbw_window(list_of_dicts, window_state, first_new_row):
+    """
+    Makes a 52-week window from the state of a window saved by 
+    assign_wbw_rankings, holding the same matches as the saved window, with 
+    the matches from first_new_row on merged into its entries and exits. If 
+    the saved window has its entries and exits, only the new matches are 
+    sorted; otherwise the matches before first_new_row are sorted again. All 
+    of the matches are kept in the entries and exits, as matches that have 
+    left the window can enter it again if it is moved backwards to an earlier
+    date.
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        the data the window was saved from, possibly with more matches added
+        to the end
+    window_state : dictionary
+        saved window, with the "Defeated by" and "Matches played" of the 
+        window, the date it was moved to under "Current date," and possibly
+        its "Entries" and "Exits," which are added to in place
+    first_new_row : int
+        number of matches in the data when the window was saved
+
+    Returns
+    -------
+    window : dictionary
+        window as made by new_wbw_window, moved to the saved date
+    """
+    if "Entries" in window_state.keys():
+        entries = window_state["Entries"]
+        exits = window_state["Exits"]
+    else:
+        entries, exits = window_order(list_of_dicts, 0, first_new_row)
+    current_ordinal = window_state["Current date"].toordinal()
+    year_ago_ordinal = (window_state["Current date"] - timedelta(weeks = 52)).toordinal()
+    
+    # a window moved to a date holds the matches that started before it and 
+    # ended after 52 weeks before it, whichever way it was moved
+    window = {"Entries": entries, "Exits": exits,
+              "Number entered": bisect_left(entries, (current_ordinal,)),
+              "Number exited": bisect_left(exits, (year_ago_ordinal + 1,)),
+              "Defeated by": window_state["Defeated by"],
+              "Matches played": window_state["Matches played"]}
+    
+    # new matches usually start after all of the saved ones and go on the 
+    # end; any that start before the saved date are put in the window as if
+    # they had been there when it was moved
+    new_entries, new_exits = window_order(list_of_dicts, first_new_row, len(list_of_dicts))
+    end_ordinals = {i: ordinal for ordinal, i in new_exits}
+    for entry in new_entries:
+        insort(entries, entry)
+        if entry[0] < current_ordinal:
+            window["Number entered"] += 1
+            if end_ordinals[entry[1]] > year_ago_ordinal:
+                add_match_to_window(window, list_of_dicts[entry[1]])
+    for exit in new_exits:
+        insort(exits, exit)
+        if exit[0] <= year_ago_ordinal:
+            window["Number exited"] += 1
+    return window
+
+def wbw_state(list_of_dicts, tournaments_done, current_tournament, current_date, 
+              scores, ranks, window = None, with_order = False):
+    """
+    Makes the state of assign_wbw_rankings after a number of tournaments, as
+    described under state in assign_wbw_rankings
+
+    Returns
+    -------
+    state : dictionary
+        the state, with the window only if one is given and it has been 
+        moved to a date, and the window's entries and exits only if 
+        with_order is True, so later matches can be merged into them instead
+        of sorting all of the matches again
+    """
+    state = {"Tournaments done": tournaments_done, "Rows": len(list_of_dicts),
+             "Current tournament": current_tournament, "Current date": current_date,
+             "Scores": scores, "Ranks": ranks}
+    if window != None and current_date != None:
+        state["Window"] = {"Defeated by": window["Defeated by"],
+                           "Matches played": window["Matches played"],
+                           "Current date": current_date}
+        if with_order:
+            state["Window"]["Entries"] = window["Entries"]
+            state["Window"]["Exits"] = window["Exits"]
+    return state
+
+def checkpoint_tournament(tournament):
+    """
+    Gets what a WbW checkpoint keeps of a tournament to check that it is 
+    resumed on the same data: the tournament's name, start date, and where it 
+    starts and ends in the data
+    """
+    return (tournament["Tournament"], tournament["Start date"], tournament["Start"], 
+            tournament["End"])
+
+def start_wbw_checkpoint(file_path, settings, first_tournament):
+    """
+    Starts a checkpoint file for assign_wbw_rankings, writing the settings the
+    rankings are calculated with and the tournament they start from. Each 
+    checkpoint is then appended to the file by save_wbw_checkpoint.
+
+    Parameters
+    ----------
+    file_path : string
+        path to the checkpoint file, which is overwritten
+    settings : dictionary
+        the arguments of assign_wbw_rankings that change the rankings and the
+        parser the data was parsed with
+    first_tournament : int
+        index in the tournament index of the first tournament ranked
+
+    Returns
+    -------
+    None.
+    """
+    with open(file_path, "wb") as f:
+        pickle.dump({"Settings": settings, "First tournament": first_tournament}, f,
+                    protocol = pickle.HIGHEST_PROTOCOL)
+
+def save_wbw_checkpoint(file_path, list_of_dicts, tournament_index, first_tournament, 
+                        state):
+    """
+    Appends a checkpoint of assign_wbw_rankings to a file started by 
+    start_wbw_checkpoint: the state, and the tournaments ranked since the 
+    previous checkpoint with the "WbW 1" and "WbW 2" values assigned to their
+    matches, so each checkpoint only saves the matches ranked since the last
+
+    Parameters
+    ----------
+    file_path : string
+        path to the checkpoint file
+    list_of_dicts : list of dictionaries or MatchTable
+        the data being ranked
+    tournament_index : list of dictionaries
+        tournament index of list_of_dicts
+    first_tournament : int
+        index in tournament_index of the first tournament ranked since the 
+        previous checkpoint
+    state : dictionary
+        state as made by wbw_state
+
+    Returns
+    -------
+    None.
+    """
+    tournaments = tournament_index[first_tournament:state["Tournaments done"]]
+    # matches before 2008 have no ranks
+    wbw_values = [(list_of_dicts[i]["WbW 1"], list_of_dicts[i]["WbW 2"]) if 
+                  "WbW 1" in list_of_dicts[i] else None for tournament in tournaments 
+                  for i in range(tournament["Start"], tournament["End"] + 1)]
+    
+    with open(file_path, "ab") as f:
+        pickle.dump({"State": state, 
+                     "Tournaments": [checkpoint_tournament(tournament) for 
+                                     tournament in tournaments],
+                     "WbW values": wbw_values}, f, protocol = pickle.HIGHEST_PROTOCOL)
+    instrumentation.count("WbW checkpoints saved")
+
+def load_wbw_checkpoint(file_path, list_of_dicts, tournament_index, settings, 
+                        first_tournament):
+    """
+    Loads the checkpoints saved in a file by save_wbw_checkpoint, putting the
+    "WbW 1" and "WbW 2" values saved in them back onto list_of_dicts. A 
+    checkpoint cut short by a crash while saving it is dropped from the file,
+    so the next one is appended after the last whole one.
+
+    Parameters
+    ----------
+    file_path : string
+        path to the checkpoint file
+    list_of_dicts : list of dictionaries or MatchTable
+        the same data the checkpoints were saved from, possibly with more 
+        matches added to the end
+    tournament_index : list of dictionaries
+        tournament index of list_of_dicts
+    settings : dictionary
+        the arguments of assign_wbw_rankings that change the rankings and the
+        parser the data was parsed with, which must be the ones the 
+        checkpoints were saved with
+    first_tournament : int
+        index in tournament_index of the first tournament to rank, which must
+        be the one the checkpoints started from
+
+    Returns
+    -------
+    state : dictionary
+        the state saved in the last checkpoint, or None if the file has no
+        whole checkpoint
+    """
+    state = None
+    tournament = first_tournament
+    with open(file_path, "r+b") as f:
+        header = pickle.load(f)
+        assert header["Settings"] == settings, ("the checkpoint in " + file_path + 
+                                                " was saved with different settings: " + 
+                                                str(header["Settings"]))
+        assert header["First tournament"] == first_tournament, ("the checkpoint in " + 
+                                                                file_path + " starts " +
+                                                                "from a different " +
+                                                                "tournament")
+        end = f.tell()
+        while True:
+            try:
+                checkpoint = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                break
+            
+            # the tournaments must be where they were when the checkpoint was 
+            # saved, or the values would go onto the wrong matches
+            tournaments = [checkpoint_tournament(tournament_index[t]) for t in 
+                           range(tournament, min(tournament + len(checkpoint["Tournaments"]),
+                                                 len(tournament_index)))]
+            assert tournaments == checkpoint["Tournaments"], ("the checkpoint in " + 
+                                                              file_path + " was saved " +
+                                                              "from different data")
+            
+            wbw_values = iter(checkpoint["WbW values"])
+            for t in range(tournament, tournament + len(tournaments)):
+                for i in range(tournament_index[t]["Start"], tournament_index[t]["End"] + 1):
+                    values = next(wbw_values)
+                    if values != None:
+                        list_of_dicts[i]["WbW 1"], list_of_dicts[i]["WbW 2"] = values
+            tournament += len(tournaments)
+            state = checkpoint["State"]
+            end = f.tell()
+        f.truncate(end)
+    
+    return state
+
+@instrumentation.stage("assign_wbw_rankings")
+def assign_wbw_rankings(list_of_dicts, windowed = False, backend = "dict", 
+                        tolerance = None, norm = "l1", max_iterations = None,
+                        iteration_log = None, tournament_index = None, state = None,
+                        checkpoint_file = None, checkpoint_every = 20):
     """
     Updates wbw rankings before each tournament using the previous 52 weeks of
     results and assigns them to each player by adding "WbW 1" and "WbW 2" keys
@@ -313,57 +1558,163 @@ def assign_wbw_rankings(list_of_dicts):
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - each dictionary must
         have keys "End date," "Tournament," "Start date," "Player 1," "Player 2,"
         "Winner," and "Loser"
+    windowed : Boolean, optional
+        If True, keep a 52-week window that matches enter and leave as the 
+        tournament dates move, updating who beat who in place, instead of 
+        finding the previous 52 weeks of matches by going through all of 
+        list_of_dicts at each new tournament date. The default is False.
+    backend : string, optional
+        backend used by wbw, "dict" or "numpy." The default is "dict".
+    tolerance : float, optional
+        tolerance passed to wbw to stop on the change in scores instead of the
+        ranking order. The default is None.
+    norm : string, optional
+        norm passed to wbw, "l1" or "linf." The default is "l1".
+    max_iterations : int, optional
+        most wbw iterations to run for each ranking. The default is None.
+    iteration_log : list, optional
+        If given, a dictionary is appended to it for each ranking calculated, 
+        with the tournament start date under "Start date," the number of 
+        players under "Players," and the number of iterations and final 
+        residual from wbw under "Iterations" and "Residual." The default is 
+        None.
+    tournament_index : list of dictionaries, optional
+        where each tournament starts and ends in list_of_dicts, as made by
+        data.build_tournament_index. The default is None, which builds it.
+    state : dictionary, optional
+        If given, the rankings carry on from the state saved in it by an 
+        earlier call, so that only the tournaments added to the end of 
+        list_of_dicts and tournament_index since then are ranked, and the
+        state after the last tournament is saved in it: the number of 
+        tournaments done under "Tournaments done," the number of matches 
+        under "Rows," the current tournament and date under "Current 
+        tournament" and "Current date," the last scores and ranks under 
+        "Scores" and "Ranks," and, if windowed, the window under "Window." 
+        An empty dictionary starts from the beginning. The default is None.
+    checkpoint_file : string, optional
+        If given, a checkpoint with the state and the ranks assigned so far is
+        appended to this file every checkpoint_every tournament dates, and if
+        the file already exists, the rankings resume from it instead of from
+        state, so an interrupted run can be carried on. The checkpoint must 
+        have been saved from the same data with the same settings. The file 
+        is deleted once all of the tournaments are ranked. The default is 
+        None.
+    checkpoint_every : int, optional
+        number of tournament dates ranked between checkpoints. The default is
+        20.
 
     Returns
     -------
     None.
 
     """
-    matches_from_2007 = [dic for dic in list_of_dicts if 
-                         dic["End date"].year == 2007]
-    initial_rankings, initial_scores = wbw(matches_from_2007)
-    initial_ranks = {initial_rankings[i][0]: i + 1 for i in range(len(initial_rankings))}
+    if tournament_index == None:
+        tournament_index = data.build_tournament_index(list_of_dicts)
+    
+    saved_state = state
+    if checkpoint_file != None:
+        settings = {"Windowed": windowed, "Backend": backend, "Tolerance": tolerance,
+                    "Norm": norm, "Max iterations": max_iterations, 
+                    "Parser": data.parser_cache_key()}
+        first_checkpoint_tournament = 0
+        if state != None and "Tournaments done" in state.keys():
+            first_checkpoint_tournament = state["Tournaments done"]
+        checkpoint_state = None
+        if os.path.exists(checkpoint_file):
+            checkpoint_state = load_wbw_checkpoint(checkpoint_file, list_of_dicts, 
+                                                   tournament_index, settings, 
+                                                   first_checkpoint_tournament)
+        if checkpoint_state != None:
+            saved_state = checkpoint_state
+            instrumentation.progress("Resuming WbW rankings from", 
+                                     saved_state["Current date"])
+        else:
+            start_wbw_checkpoint(checkpoint_file, settings, first_checkpoint_tournament)
+    
+    if saved_state != None and "Tournaments done" in saved_state.keys():
+        first_tournament = saved_state["Tournaments done"]
+        current_tournament = saved_state["Current tournament"]
+        current_date = saved_state["Current date"]
+        initial_scores = saved_state["Scores"]
+        initial_ranks = saved_state["Ranks"]
+        if windowed:
+            if "Window" in saved_state.keys():
+                window = resume_wbw_window(list_of_dicts, saved_state["Window"],
+                                           saved_state["Rows"])
+            else:
+                window = new_wbw_window(list_of_dicts)
+    else:
+        first_tournament = 0
+        matches_from_2007 = [dic for dic in list_of_dicts if 
+                             dic["End date"].year == 2007]
+        initial_rankings, initial_scores = wbw(matches_from_2007, backend = backend,
+                                               tolerance = tolerance, norm = norm,
+                                               max_iterations = max_iterations)
+        initial_ranks = {initial_rankings[i][0]: i + 1 for 
+                         i in range(len(initial_rankings))}
     
-    current_tournament = None
-    current_date = None
+        current_tournament = None
+        current_date = None
     
-    for i in range(len(list_of_dicts)):
+        if windowed:
+            window = new_wbw_window(list_of_dicts)
+    
+    if not windowed:
+        window = None
+    dates_since_checkpoint = 0
+    last_checkpoint = first_tournament
+
+    for t in range(first_tournament, len(tournament_index)):
+        tournament = tournament_index[t]
+    
+        if tournament["Start date"].year < 2008:
+            continue
         
         # reached a new tournament with a different start date
-        if (list_of_dicts[i]["Tournament"] != current_tournament and 
-            list_of_dicts[i]["Start date"].year >= 2008 and
-            list_of_dicts[i]["Start date"] != current_date):
+        if (tournament["Tournament"] != current_tournament and 
+            tournament["Start date"] != current_date):
             # update current tournament and date
-            current_tournament = list_of_dicts[i]["Tournament"]
-            current_date = list_of_dicts[i]["Start date"]
+            current_tournament = tournament["Tournament"]
+            current_date = tournament["Start date"]
             # get new ranks
-            year_ago = current_date - timedelta(weeks = 52)
-            last_52_weeks = [dic for dic in list_of_dicts if dic["End date"] > year_ago and
-                             dic["Start date"] < current_date]
-            new_rankings, new_scores = wbw(last_52_weeks, initial_scores_dict = initial_scores)
-            new_ranks = {new_rankings[i][0]: i + 1 for i in range(len(new_rankings))}
-            # assign new ranks
-            if list_of_dicts[i]["Player 1"] in new_ranks.keys():
-                list_of_dicts[i]["WbW 1"] = new_ranks[list_of_dicts[i]["Player 1"]]
-            else:
-                list_of_dicts[i]["WbW 1"] = math.nan
-            if list_of_dicts[i]["Player 2"] in new_ranks.keys():
-                list_of_dicts[i]["WbW 2"] = new_ranks[list_of_dicts[i]["Player 2"]]
+            if windowed:
+                move_window(list_of_dicts, window, current_date)
+                new_rankings, new_scores, info = wbw(None, initial_scores_dict = initial_scores,
+                                                     defeated_by = window["Defeated by"],
+                                                     backend = backend, tolerance = tolerance,
+                                                     norm = norm, 
+                                                     max_iterations = max_iterations,
+                                                     return_info = True)
             else:
-                list_of_dicts[i]["WbW 2"] = math.nan
+                year_ago = current_date - timedelta(weeks = 52)
+                last_52_weeks = [dic for dic in list_of_dicts if dic["End date"] > year_ago and
+                                 dic["Start date"] < current_date]
+                new_rankings, new_scores, info = wbw(last_52_weeks, 
+                                                     initial_scores_dict = initial_scores,
+                                                     backend = backend, tolerance = tolerance,
+                                                     norm = norm, 
+                                                     max_iterations = max_iterations,
+                                                     return_info = True)
+            instrumentation.count("WbW windows computed")
+            instrumentation.count("WbW iterations", info["Iterations"])
+            if iteration_log != None:
+                iteration_log.append({"Start date": current_date, "Players": len(new_scores),
+                                      "Iterations": info["Iterations"],
+                                      "Residual": info["Residual"]})
+            new_ranks = {new_rankings[i][0]: i + 1 for i in range(len(new_rankings))}
             # update initial ranks
             initial_rankings = new_rankings
             initial_ranks = new_ranks
             initial_scores = new_scores
+            dates_since_checkpoint += 1
         
-        # reached a new tournament with same start date
-        elif (list_of_dicts[i]["Tournament"] != current_tournament and 
-            list_of_dicts[i]["Start date"].year >= 2008 and
-            list_of_dicts[i]["Start date"] == current_date):
+        # a new tournament with the same start date, or the same tournament, 
+        # uses the ranks that are already calculated
+        for i in range(tournament["Start"], tournament["End"] + 1):
             # assign ranks
             if list_of_dicts[i]["Player 1"] in initial_ranks.keys():
                 list_of_dicts[i]["WbW 1"] = initial_ranks[list_of_dicts[i]["Player 1"]]
@@ -374,30 +1725,37 @@ def assign_wbw_rankings(list_of_dicts):
             else:
                 list_of_dicts[i]["WbW 2"] = math.nan
         
-        # not a new tournamment, but rank should be assigned
-        elif (list_of_dicts[i]["Tournament"] == current_tournament and 
-            list_of_dicts[i]["Start date"].year >= 2008):
-            # assign ranks
-            if list_of_dicts[i]["Player 1"] in initial_ranks.keys():
-                list_of_dicts[i]["WbW 1"] = initial_ranks[list_of_dicts[i]["Player 1"]]
-            else:
-                list_of_dicts[i]["WbW 1"] = math.nan
-            if list_of_dicts[i]["Player 2"] in initial_ranks.keys():
-                list_of_dicts[i]["WbW 2"] = initial_ranks[list_of_dicts[i]["Player 2"]]
-            else:
-                list_of_dicts[i]["WbW 2"] = math.nan
+        if checkpoint_file != None and dates_since_checkpoint >= checkpoint_every:
+            save_wbw_checkpoint(checkpoint_file, list_of_dicts, tournament_index, 
+                                last_checkpoint,
+                                wbw_state(list_of_dicts, t + 1, current_tournament,
+                                          current_date, initial_scores, initial_ranks,
+                                          window = window))
+            dates_since_checkpoint = 0
+            last_checkpoint = t + 1
+    
+    # the run is finished, so the end state only goes to state
+    if checkpoint_file != None:
+        os.remove(checkpoint_file)
+    if state != None:
+        state.update(wbw_state(list_of_dicts, len(tournament_index), current_tournament, 
+                               current_date, initial_scores, initial_ranks, window = window,
+                               with_order = True))
 
-def get_rankings_for_plot(list_of_dicts):
+def get_rankings_for_plot(list_of_dicts, tournament_index = None):
     """
     Builds a list of WTA rankings and a list of WbW rankings with the same player's
     rankings for the same tournament at the same index in both lists
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - each dictionary for
         matches in or after 2008 should have keys "Tournament," "WbW 1," "WbW 2,"
         "Rank 1," "Rank 2," "Player 1," and "Player 2"
+    tournament_index : list of dictionaries, optional
+        where each tournament starts and ends in list_of_dicts, as made by
+        data.build_tournament_index. The default is None, which builds it.
 
     Returns
     -------
@@ -412,34 +1770,25 @@ def get_rankings_for_plot(list_of_dicts):
     # initialise variables
     wta_ranks = []
     wbw_ranks = []
-    current_tournament = None
     
-    # build the wta_ranks and wbw_ranks lists
-    for i in range(len(list_of_dicts)):
-        
-        # next tournament
-        if ("WbW 1" in list_of_dicts[i].keys() and list_of_dicts[i]["Tournament"] !=
-            current_tournament):
-            players_current_tournament = []
-            current_tournament = list_of_dicts[i]["Tournament"]
-            wta_ranks.append(list_of_dicts[i]["Rank 1"])
-            wbw_ranks.append(list_of_dicts[i]["WbW 1"])
-            players_current_tournament.append(list_of_dicts[i]["Player 1"])
-            wta_ranks.append(list_of_dicts[i]["Rank 2"])
-            wbw_ranks.append(list_of_dicts[i]["WbW 2"])
-            players_current_tournament.append(list_of_dicts[i]["Player 2"])
-            
-        # same tournament
-        elif ("WbW 1" in list_of_dicts[i].keys() and list_of_dicts[i]["Tournament"] ==
-            current_tournament):
+    if tournament_index == None:
+        tournament_index = data.build_tournament_index(list_of_dicts)
+    
+    # build the wta_ranks and wbw_ranks lists, adding each player once per
+    # tournament
+    for tournament in tournament_index:
+        players_current_tournament = set()
+        for i in range(tournament["Start"], tournament["End"] + 1):
+            if "WbW 1" not in list_of_dicts[i].keys():
+                continue
             if list_of_dicts[i]["Player 1"] not in players_current_tournament:
                 wta_ranks.append(list_of_dicts[i]["Rank 1"])
                 wbw_ranks.append(list_of_dicts[i]["WbW 1"])
-                players_current_tournament.append(list_of_dicts[i]["Player 1"])
+                players_current_tournament.add(list_of_dicts[i]["Player 1"])
             if list_of_dicts[i]["Player 2"] not in players_current_tournament:
                 wta_ranks.append(list_of_dicts[i]["Rank 2"])
                 wbw_ranks.append(list_of_dicts[i]["WbW 2"])
-                players_current_tournament.append(list_of_dicts[i]["Player 2"])
+                players_current_tournament.add(list_of_dicts[i]["Player 2"])
     
     return wta_ranks, wbw_ranks
 
@@ -0,0 +1,246 @@
+# online Elo ratings, updated one match at a time as matches stream in, as a
+# quick alternative to recalculating WbW rankings
+
+import math
+import data
+import rankings
+import instrumentation
+
+# rating of a player before their first match
+INITIAL_RATING = 1500.0
+
+# the K factor of a player with n matches is K_SCALE / (n + K_OFFSET) ** K_SHAPE,
+# so new players' ratings move quickly and settle as they play more matches
+K_SCALE = 250.0
+K_OFFSET = 5
+K_SHAPE = 0.4
+
+def main():
+    pass
+
+def new_rating_engine(initial_rating = INITIAL_RATING):
+    """
+    Makes a rating engine with no players
+
+    Parameters
+    ----------
+    initial_rating : float, optional
+        rating of a player before their first match. The default is
+        INITIAL_RATING.
+
+    Returns
+    -------
+    engine : dictionary
+        dictionary with key: value pairs of player: rating under "Ratings,"
+        player: number of matches rated under "Matches played," the rating of
+        new players under "Initial rating," the number of matches rated under
+        "Matches rated," and the start date of the last tournament rated under
+        "Last date"
+    """
+    return {"Ratings": {}, "Matches played": {}, "Initial rating": initial_rating,
+            "Matches rated": 0, "Last date": None}
+
+def k_factor(matches_played):
+    """
+    Finds how much a player's rating can move in one match given how many
+    matches they have played
+    """
+    return K_SCALE / (matches_played + K_OFFSET) ** K_SHAPE
+
+def expected_score(rating, opponent_rating):
+    """
+    Finds the chance that a player beats an opponent given their ratings
+
+    Parameters
+    ----------
+    rating : float
+        rating of the player
+    opponent_rating : float
+        rating of the opponent
+
+    Returns
+    -------
+    float
+        chance between 0 and 1 that the player wins
+    """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+def update_ratings(engine, winner, loser):
+    """
+    Updates the ratings of the two players of a match, which takes the same
+    time however many players and matches have been rated
+
+    Parameters
+    ----------
+    engine : dictionary
+        rating engine as made by new_rating_engine
+    winner : string
+        name of the winner
+    loser : string
+        name of the loser
+
+    Returns
+    -------
+    None.
+    """
+    ratings = engine["Ratings"]
+    matches_played = engine["Matches played"]
+    for player in (winner, loser):
+        if player not in ratings.keys():
+            ratings[player] = engine["Initial rating"]
+            matches_played[player] = 0
+
+    # each player moves by their own K factor times the same surprise, so a new
+    # player's rating moves more than an established one's and the ratings are
+    # not zero-sum
+    winner_expected = expected_score(ratings[winner], ratings[loser])
+    ratings[winner] += k_factor(matches_played[winner]) * (1 - winner_expected)
+    ratings[loser] -= k_factor(matches_played[loser]) * (1 - winner_expected)
+    matches_played[winner] += 1
+    matches_played[loser] += 1
+    engine["Matches rated"] += 1
+
+def rate_tournament(engine, list_of_dicts, start, end):
+    """
+    Assigns each player's rating before the tournament to the tournament's
+    matches by adding "Elo 1" and "Elo 2" keys, with nan for players who have
+    not played a rated match, and then updates the ratings with the
+    tournament's matches in order
+
+    Parameters
+    ----------
+    engine : dictionary
+        rating engine as made by new_rating_engine
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Start date," "Player 1," "Player 2," "Winner," and "Loser"
+    start : int
+        index of the tournament's first match
+    end : int
+        index of the tournament's last match (inclusive)
+
+    Returns
+    -------
+    None.
+    """
+    ratings = engine["Ratings"]
+
+    # all of the ratings are assigned before any of the tournament's matches
+    # are rated
+    for i in range(start, end + 1):
+        dic = list_of_dicts[i]
+        dic["Elo 1"] = ratings.get(dic["Player 1"], math.nan)
+        dic["Elo 2"] = ratings.get(dic["Player 2"], math.nan)
+
+    for i in range(start, end + 1):
+        update_ratings(engine, list_of_dicts[i]["Winner"], list_of_dicts[i]["Loser"])
+    engine["Last date"] = list_of_dicts[start]["Start date"]
+
+def assign_elo_ratings(list_of_dicts, tournament_index = None, engine = None):
+    """
+    Rates each tournament in order, assigning the players' ratings before the
+    tournament to its matches under "Elo 1" and "Elo 2" as assign_wbw_rankings
+    does with "WbW 1" and "WbW 2"
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Start date," "Player 1," "Player 2," "Winner," and "Loser"
+    tournament_index : list of dictionaries, optional
+        the tournaments to rate, as made by data.build_tournament_index. The
+        default is None, which builds it and rates every tournament.
+    engine : dictionary, optional
+        rating engine to carry on from, such as one kept from rating earlier
+        years. The default is None, which starts a new one.
+
+    Returns
+    -------
+    engine : dictionary
+        the rating engine after the last tournament
+    """
+    with instrumentation.stage("assign_elo_ratings"):
+        if tournament_index == None:
+            tournament_index = data.build_tournament_index(list_of_dicts)
+        if engine == None:
+            engine = new_rating_engine()
+
+        matches_rated = engine["Matches rated"]
+        for tournament in tournament_index:
+            rate_tournament(engine, list_of_dicts, tournament["Start"], tournament["End"])
+        instrumentation.count("Matches rated", engine["Matches rated"] - matches_rated)
+
+    return engine
+
+def stream_elo_ratings(tournaments, engine = None):
+    """
+    Rates tournaments as they arrive, such as from data.stream_tournaments,
+    yielding each one with "Elo 1" and "Elo 2" assigned as soon as it is
+    rated
+
+    Parameters
+    ----------
+    tournaments : iterable of lists of dictionaries
+        the matches of each tournament, in order
+    engine : dictionary, optional
+        rating engine to carry on from. The default is None, which starts a
+        new one.
+
+    Yields
+    ------
+    tournament : list of dictionaries
+        the tournament's matches with the ratings assigned
+    """
+    if engine == None:
+        engine = new_rating_engine()
+    for tournament in tournaments:
+        rate_tournament(engine, tournament, 0, len(tournament) - 1)
+        yield tournament
+
+def rating_snapshot(engine):
+    """
+    Copies the ratings at this point, so they can be kept or saved while the
+    engine carries on. A snapshot is itself a rating engine and can be carried
+    on from later.
+
+    Parameters
+    ----------
+    engine : dictionary
+        rating engine as made by new_rating_engine
+
+    Returns
+    -------
+    dictionary
+        a copy of engine
+    """
+    snapshot = dict(engine)
+    snapshot["Ratings"] = dict(engine["Ratings"])
+    snapshot["Matches played"] = dict(engine["Matches played"])
+    return snapshot
+
+def rating_rankings(engine, top_k = None, min_matches = 0):
+    """
+    Ranks the players by their current ratings
+
+    Parameters
+    ----------
+    engine : dictionary
+        rating engine as made by new_rating_engine
+    top_k : int, optional
+        If given, only the top_k players are found. The default is None.
+    min_matches : int, optional
+        fewest rated matches a player needs to be ranked, so players with a
+        few lucky wins are left out. The default is 0.
+
+    Returns
+    -------
+    list of tuples
+        list of (player, rating) tuples sorted in reverse order by rating
+    """
+    matches_played = engine["Matches played"]
+    return rankings.rank_players([(player, rating) for player, rating in
+                                  engine["Ratings"].items() if
+                                  matches_played[player] >= min_matches], top_k = top_k)
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,213 @@
 # functions for assigning rounds
 
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from match_table import MatchTable
+from brackets import build_brackets
+import data
+import instrumentation
+
 def main():
     pass
 
-def assign_rounds(list_of_dicts):
+def assign_rounds(list_of_dicts, tournament_index = None, workers = None, 
+                  brackets = None):
     """
     Assign rounds to each of the dictionaries in list_of_dicts by adding "Round number"
     and "Round name" keys along with the value determined for each
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
+    list_of_dicts : list of dictionaries or MatchTable
         list of dictionaries representing rows of data - each dictionary must
         have keys "Tournament," "Round robin tournament," "Winner", "Loser,"
         "Player 1," and "Player 2"
+    tournament_index : list of dictionaries, optional
+        where each tournament starts and ends in list_of_dicts, as made by
+        data.build_tournament_index. The default is None, which builds it.
+    workers : int, optional
+        number of processes to assign rounds with. The default is None, which
+        assigns rounds to the tournaments one after another in this process.
+    brackets : dictionary, optional
+        dictionary to add the bracket tree of each tournament to, as made by
+        brackets.build_bracket, with key: value pairs of (tournament, start 
+        date): bracket. The default is None, which does not build them.
 
     Returns
     -------
     None.
     """
     
-    # initialise variables
-    start = 0
-    end = None
-    
-    for i in range(1, len(list_of_dicts)):
+    with instrumentation.stage("assign_rounds"):
+        if tournament_index == None:
+            tournament_index = data.build_tournament_index(list_of_dicts)
         
-        current_tournament = list_of_dicts[start]["Tournament"]
+        if workers != None and workers > 1 and len(tournament_index) > 1:
+            assign_rounds_parallel(list_of_dicts, tournament_index, workers)
+        else:
+            # we know the start and end indices for each whole tournament, so
+            # we can assign rounds one tournament at a time
+            for tournament in tournament_index:
+                assign_rounds_tournament(list_of_dicts, tournament["Start"], 
+                                         tournament["End"])
+        instrumentation.count("Tournaments processed", len(tournament_index))
+    
+    if brackets != None:
+        with instrumentation.stage("build_brackets"):
+            brackets.update(build_brackets(list_of_dicts, tournament_index))
+
+def assign_rounds_parallel(list_of_dicts, tournament_index, workers):
+    """
+    Assign rounds to each tournament in tournament_index in a pool of worker
+    processes. Each worker is sent a copy of one tournament's rows and sends 
+    back the round numbers and names, which are written to list_of_dicts in
+    order. An AssertionError raised for a tournament in a worker is raised 
+    again here with the same message.
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Tournament," "Round robin tournament," "Winner", "Loser,"
+        "Player 1," and "Player 2"
+    tournament_index : list of dictionaries
+        where each tournament starts and ends in list_of_dicts, as made by
+        data.build_tournament_index
+    workers : int
+        number of processes to assign rounds with
+
+    Returns
+    -------
+    None.
+    """
+    
+    # only send the keys round assignment reads, including the ones used in
+    # assertion messages, so less has to be pickled
+    keys = ("Tournament", "Start date", "Round robin tournament", "Winner", "Loser",
+            "Player 1", "Player 2")
+    segments = ([{key: list_of_dicts[i][key] for key in keys}
+                 for i in range(tournament["Start"], tournament["End"] + 1)]
+                for tournament in tournament_index)
+    
+    # send several tournaments to a worker at a time, since most take much
+    # less time to assign rounds to than to send between processes
+    chunksize = max(1, len(tournament_index) // (workers * 4))
+    
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        # map returns the results in the order the tournaments were given
+        results = executor.map(assign_rounds_segment, segments, chunksize = chunksize)
+        for tournament, rounds_assigned in zip(tournament_index, results):
+            for i, (round_number, round_name) in enumerate(rounds_assigned):
+                if round_number == None:
+                    continue
+                list_of_dicts[tournament["Start"] + i]["Round number"] = round_number
+                list_of_dicts[tournament["Start"] + i]["Round name"] = round_name
+
+def assign_rounds_segment(tournament):
+    """
+    Assigns rounds to the matches of one whole tournament and returns them, 
+    for use in a worker process by assign_rounds_parallel
+
+    Parameters
+    ----------
+    tournament : list of dictionaries
+        the matches of one whole tournament - each dictionary must have keys
+        "Tournament," "Round robin tournament," "Winner", "Loser," "Player 1,"
+        and "Player 2"
+
+    Returns
+    -------
+    list of tuples
+        (round number, round name) for each match in tournament, in order, or
+        (None, None) for a match no round was assigned to
+    """
+    assign_rounds_tournament(tournament, 0, len(tournament) - 1)
+    return [(dic.get("Round number"), dic.get("Round name")) for dic in tournament]
+
+def assign_rounds_tournament(list_of_dicts, start, end):
+    """
+    Assign rounds to the matches of one tournament, from the start index to the
+    end index (inclusive) of list_of_dicts, by adding "Round number" and 
+    "Round name" keys along with the value determined for each
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Tournament," "Round robin tournament," "Winner", "Loser,"
+        "Player 1," and "Player 2"
+    start : int
+        index of list_of_dicts of the first match in the tournament
+    end : int
+        index of list_of_dicts of the last match in the tournament
+
+    Returns
+    -------
+    None.
+    """
+    
+    # calculate wins and losses
+    wins_losses_dict = calculate_wins_losses(list_of_dicts, start, end)
+    
+    # assign rounds for a tournament with a round robin group stage
+    if list_of_dicts[start]["Round robin tournament"]:
+        assign_rounds_round_robin(list_of_dicts, start, end, wins_losses_dict)
+        return
+    
+    # calculate some parameters for single elimination tournaments
+    has_third_place_match = check_third_place_match(wins_losses_dict)
+    num_players = len(wins_losses_dict)
+    num_byes = number_of_byes(num_players)
+    
+    # assign rounds for a single elimination tournament with no byes or 
+    # third place match
+    if num_byes == 0 and not has_third_place_match:
+        elimination_tournament_standard(list_of_dicts, start, end, wins_losses_dict)
         
-        # check if we have passed through all matches in the current tournament
-        if list_of_dicts[i]["Tournament"] != current_tournament:
-            end = i - 1
-            
-        # check if we have reached the last row in the data
-        elif i == len(list_of_dicts) - 1:
-            end = i
-            
-        # if either of the above happens, we know the start and end indices for
-        # one whole tournament, and we can assign rounds
-        if end != None:
-            
-            # calculate wins and losses
-            wins_losses_dict = calculate_wins_losses(list_of_dicts, start, end)
-            
-            # assign rounds for a tournament with a round robin group stage
-            if list_of_dicts[start]["Round robin tournament"]:
-                assign_rounds_round_robin(list_of_dicts, start, end, wins_losses_dict)
-                start = i
-                end = None
-                current_tournament = list_of_dicts[start]["Tournament"]
-                continue
-            
-            # calculate some parameters for single elimination tournaments
-            has_third_place_match = check_third_place_match(wins_losses_dict)
-            num_players = len(wins_losses_dict)
-            num_byes = number_of_byes(num_players)
-            
-            # assign rounds for a single elimination tournament with no byes or 
-            # third place match
-            if num_byes == 0 and not has_third_place_match:
-                elimination_tournament_standard(list_of_dicts, start, end, wins_losses_dict)
-                
-            # assign rounds for a single elimination tournament with no byes but 
-            # with a third place match
-            elif num_byes == 0 and has_third_place_match:
-                third_place_no_byes(list_of_dicts, start, end, wins_losses_dict)
-            
-            # assign rounds for a single elimination tournament with byes but no 
-            # third place match
-            elif num_byes > 0 and not has_third_place_match:
-                num_matches_per_round = calc_num_matches_per_round(num_players)
-                byes_no_third_place(list_of_dicts, start, end, wins_losses_dict, 
-                        num_byes, num_matches_per_round)
-            
-            # assign rounds for a single elimination tournament with byes and a 
-            # third place match
-            elif num_byes > 0 and has_third_place_match:
-                num_matches_per_round = calc_num_matches_per_round(num_players,
-                                                                   has_third_place_match = True)
-                byes_and_third_place(list_of_dicts, start, end, wins_losses_dict, 
-                                     num_byes, num_matches_per_round)
-            
-            # reset start and end indices
-            start = i
-            end = None
+    # assign rounds for a single elimination tournament with no byes but 
+    # with a third place match
+    elif num_byes == 0 and has_third_place_match:
+        third_place_no_byes(list_of_dicts, start, end, wins_losses_dict)
+    
+    # assign rounds for a single elimination tournament with byes but no 
+    # third place match
+    elif num_byes > 0 and not has_third_place_match:
+        num_matches_per_round = calc_num_matches_per_round(num_players)
+        byes_no_third_place(list_of_dicts, start, end, wins_losses_dict, 
+                num_byes, num_matches_per_round)
+    
+    # assign rounds for a single elimination tournament with byes and a 
+    # third place match
+    elif num_byes > 0 and has_third_place_match:
+        num_matches_per_round = calc_num_matches_per_round(num_players,
+                                                           has_third_place_match = True)
+        byes_and_third_place(list_of_dicts, start, end, wins_losses_dict, 
+                             num_byes, num_matches_per_round)
+
+def assign_rounds_stream(tournaments):
+    """
+    Assigns rounds to each tournament from an iterable of tournaments, such as
+    data.stream_tournaments, yielding each one once its rounds are assigned so
+    round assignment can run as part of a pipeline
+
+    Parameters
+    ----------
+    tournaments : iterable of lists of dictionaries
+        each item holds the matches of one whole tournament - each dictionary
+        must have keys "Tournament," "Round robin tournament," "Winner", 
+        "Loser," "Player 1," and "Player 2"
+
+    Yields
+    ------
+    tournament : list of dictionaries
+        the matches of the next tournament with "Round number" and "Round name"
+        keys added
+    """
+    for tournament in tournaments:
+        with instrumentation.stage("assign_rounds"):
+            assign_rounds_tournament(tournament, 0, len(tournament) - 1)
+        instrumentation.count("Tournaments processed")
+        yield tournament
 
 def calculate_wins_losses(list_of_dicts, start, end):
     """
@@ -95,8 +219,9 @@ def calculate_wins_losses(list_of_dicts, start, end):
 
     Parameters
     ----------
-    list_of_dicts : list of dictionaries
-        List of dictionaries that all have a "Winner" key and a "Loser" key
+    list_of_dicts : list of dictionaries or MatchTable
+        List of dictionaries that all have a "Winner" key and a "Loser" key, 
+        or a MatchTable with "Winner" and "Loser" columns
     start : int
         An integer representing the index of the list_of_dicts at which to start
     end : int
@@ -110,6 +235,12 @@ def calculate_wins_losses(list_of_dicts, start, end):
         "Player Name": [number of matches the player won, number of matches the player lost]
         for each player in the specified range of the given data
     """
+    # count using the player ids of a MatchTable
+    if (isinstance(list_of_dicts, MatchTable) and 
+        list_of_dicts.column_kind("Winner") == "player" and
+        list_of_dicts.column_kind("Loser") == "player"):
+        return calculate_wins_losses_table(list_of_dicts, start, end)
+    
     # initialise dictionary
     wins_losses = {}
     
@@ -126,6 +257,47 @@ def calculate_wins_losses(list_of_dicts, start, end):
     
     return wins_losses
 
+def calculate_wins_losses_table(table, start, end):
+    """
+    Calculates the number of wins and losses for each player in the rows of a
+    MatchTable from the start index to the end index (inclusive), counting by
+    player id instead of by name
+
+    Parameters
+    ----------
+    table : MatchTable
+        table with "Winner" and "Loser" player columns
+    start : int
+        An integer representing the index of the table at which to start
+    end : int
+        An integer representing the index of the table at which to end
+        (inclusive)
+
+    Returns
+    -------
+    dictionary
+        dictionary with key: value pairs in the form of 
+        "Player Name": [number of matches the player won, number of matches the player lost]
+        for each player in the specified range of the table, in the same order
+        as calculate_wins_losses
+    """
+    winners = table.column("Winner")
+    losers = table.column("Loser")
+    wins_losses = {}
+    
+    for i in range(start, end + 1):
+        if winners[i] in wins_losses.keys():
+            wins_losses[winners[i]][0] += 1
+        else:
+            wins_losses[winners[i]] = [1, 0]
+        if losers[i] in wins_losses.keys():
+            wins_losses[losers[i]][1] += 1
+        else:
+            wins_losses[losers[i]] = [0, 1]
+    
+    return {table.player_name(player_id): record for player_id, record in 
+            wins_losses.items()}
+
 def number_of_byes(num_players):
     """
     Calculates the number of byes awarded in a single elimination tournament
@@ -474,6 +646,9 @@ def byes_no_third_place(list_of_dicts, start, end, wins_losses_dict,
     players_last_rounds[num_rounds - 1].append(champion)
     assign_final_for_champion = True
     
+    # index each player's matches once for the whole tournament
+    winner_matches = build_winner_matches(list_of_dicts, start, end, wins_losses_dict)
+    
     # assign rounds until all matches have been assigned a round
     while sum(num_matches_per_round) != 0:
         for i in range(num_rounds, 0, -1):
@@ -488,7 +663,8 @@ def byes_no_third_place(list_of_dicts, start, end, wins_losses_dict,
                                                                       player_to_examine,
                                                                       wins_losses_dict,
                                                                       player_last_round,
-                                                                      assign_final_for_champion)
+                                                                      assign_final_for_champion,
+                                                                      winner_matches)
         assign_final_for_champion = False
 
         # add the people eliminated to the last rounds list indicating which
@@ -513,8 +689,51 @@ def byes_no_third_place(list_of_dicts, start, end, wins_losses_dict,
     for i in range(start, end + 1):
         list_of_dicts[i]["Round name"] = round_names[list_of_dicts[i]["Round number"]]
 
+def build_winner_matches(list_of_dicts, start, end, wins_losses_dict):
+    """
+    Builds an index of the matches in a tournament that have not been assigned
+    a round yet, grouped by winner and then by the number of matches the loser
+    played, so each player's matches can be found without rescanning the 
+    tournament
+
+    Parameters
+    ----------
+    list_of_dicts : list of dictionaries or MatchTable
+        list of dictionaries representing rows of data - each dictionary must
+        have keys "Winner" and "Loser"
+    start : positive int
+        index of list_of_dicts of the first match in the tournament
+    end : positive int
+        index of list_of_dicts of the last match in the tournament
+    wins_losses_dict : dict
+        dictionary of the number of wins and losses for each player with 
+        key: value pairs in the form of player name: [number of wins, number of losses]
+
+    Returns
+    -------
+    winner_matches : dictionary
+        dictionary with key: value pairs of winner name: dictionary of number
+        of matches played by the loser: deque of the indices of those matches
+        in list_of_dicts, in increasing order
+    """
+    winner_matches = {}
+    
+    for i in range(start, end + 1):
+        if "Round number" in list_of_dicts[i].keys():
+            continue
+        winner = list_of_dicts[i]["Winner"]
+        beaten_player_num_matches = sum(wins_losses_dict[list_of_dicts[i]["Loser"]])
+        if winner not in winner_matches.keys():
+            winner_matches[winner] = {}
+        if beaten_player_num_matches not in winner_matches[winner].keys():
+            winner_matches[winner][beaten_player_num_matches] = deque()
+        winner_matches[winner][beaten_player_num_matches].append(i)
+    
+    return winner_matches
+
 def assign_rounds_byes(list_of_dicts, start, end, player_name, wins_losses_dict,
-                       player_last_round, assign_final_for_champion):
+                       player_last_round, assign_final_for_champion, 
+                       winner_matches = None):
     """
     Assigns rounds for a player in a single elimination tournament with byes
 
@@ -536,6 +755,10 @@ def assign_rounds_byes(list_of_dicts, start, end, player_name, wins_losses_dict,
         the round number of the last round the player has had assigned so far
     assign_final_for_champion : Boolean
         whether the round still needs to be assigned for the final match
+    winner_matches : dictionary, optional
+        index of the matches without rounds made by build_winner_matches; the
+        player's matches are removed from it as their rounds are assigned.
+        The default is None, which builds it.
 
     Returns
     -------
@@ -545,24 +768,18 @@ def assign_rounds_byes(list_of_dicts, start, end, player_name, wins_losses_dict,
     players_awarded_byes : list of strings
         list of the names of the players awarded byes
     """
-    # list of the match's index in the data and list of the number of matches 
-    # played by the player beaten in that match
-    indices_of_matches = []
-    opponents_num_matches = []
+    if winner_matches == None:
+        winner_matches = build_winner_matches(list_of_dicts, start, end, wins_losses_dict)
+    
+    # the current player's matches that have not been assigned rounds, by the
+    # number of matches played by the player beaten in that match
+    player_matches = winner_matches.pop(player_name, {})
     opponents_top_rounds = {}
     
     # players awarded byes while looking at matches of current player
     players_awarded_byes = []
     
-    # find the current player's matches that have not been assigned rounds
-    for i in range(start, end + 1):
-        if (list_of_dicts[i]["Winner"] == player_name and "Round number" not in
-            list_of_dicts[i].keys()):
-            beaten_player = list_of_dicts[i]["Loser"]
-            indices_of_matches.append(i)
-            opponents_num_matches.append(sum(wins_losses_dict[beaten_player]))
-    
-    number_matches_won = len(indices_of_matches)
+    number_matches_won = sum([len(indices) for indices in player_matches.values()])
     
     if not assign_final_for_champion:
         # their highest round was already assigned when they lost
@@ -576,19 +793,20 @@ def assign_rounds_byes(list_of_dicts, start, end, player_name, wins_losses_dict,
     for i in rounds_to_assign:
         
         # one of the player's opponents played as many matches as the current
-        # round number
-        if i in opponents_num_matches:
-            position = opponents_num_matches.index(i)
-            current_round_index = indices_of_matches[position]
+        # round number; take the first such match
+        if i in player_matches.keys() and len(player_matches[i]) != 0:
+            current_round_index = player_matches[i].popleft()
             bye_awarded = False
         
-        # none of the opponents played in every round up until current round
+        # none of the opponents played in every round up until current round,
+        # so take the last match against an opponent that played one fewer
         else:
-            possible_match_indices = [indices_of_matches[j] for j in 
-                                      range(len(opponents_num_matches)) if 
-                                      opponents_num_matches[j] == i - 1]
-            current_round_index = max(possible_match_indices)
-            position = indices_of_matches.index(current_round_index)
+            assertion_msg = ("no match found for round " + str(i) + " won by " +
+                             player_name + " in " + list_of_dicts[start]["Tournament"] +
+                             " starting " + str(list_of_dicts[start]["Start date"]))
+            assert (i - 1 in player_matches.keys() and 
+                    len(player_matches[i - 1]) != 0), assertion_msg
+            current_round_index = player_matches[i - 1].pop()
             bye_awarded = True
         
         # assign round and keep track of eliminated player's name and round
@@ -598,9 +816,6 @@ def assign_rounds_byes(list_of_dicts, start, end, player_name, wins_losses_dict,
         
         if bye_awarded:
             players_awarded_byes.append(eliminated)
-            
-        del indices_of_matches[position]
-        del opponents_num_matches[position]
     
     return opponents_top_rounds, players_awarded_byes
 
@@ -649,6 +864,9 @@ def byes_and_third_place(list_of_dicts, start, end, wins_losses_dict,
     num_matches_per_round[-1] -= 2
     num_matches_per_round[-2] -= 2
     
+    # index each player's remaining matches once for the whole tournament
+    winner_matches = build_winner_matches(list_of_dicts, start, end, wins_losses_dict)
+    
     # assign rounds until all matches have been assigned a round
     while sum(num_matches_per_round) != 0:
         for i in range(num_rounds, 0, -1):
@@ -663,7 +881,7 @@ def byes_and_third_place(list_of_dicts, start, end, wins_losses_dict,
                                                                       player_to_examine,
                                                                       wins_losses_dict,
                                                                       current_round_assigned,
-                                                                      False)
+                                                                      False, winner_matches)
         
         # add the people eliminated to the last rounds list indicating which
         # round they were eliminated in; update the number of matches still to
@@ -0,0 +1,334 @@
+# functions for generating synthetic match data in the same format as the real data
+
+import argparse
+import csv
+import os
+import random
+from datetime import date, timedelta
+import data
+
+# columns of the csv files, in order
+COLUMN_NAMES = ["Tournament", "Start date", "End date", "Best of", "Player 1", "Player 2",
+                "Rank 1", "Rank 2", "Set 1", "Set 2", "Set 3", "Comment"]
+
+# single elimination draw sizes; sizes that are not a power of 2 need byes
+DRAW_SIZES = [28, 30, 32, 48, 56, 64, 96, 128]
+THIRD_PLACE_DRAW_SIZES = [8, 12, 16, 24]
+
+def main():
+    parser = argparse.ArgumentParser(description = "Writes synthetic match data to " +
+                                     "csv files in the format of the real data")
+    parser.add_argument("out_dir", help = "folder to write the csv files to")
+    parser.add_argument("--first-year", type = int, default = 2007)
+    parser.add_argument("--last-year", type = int, default = 2010)
+    parser.add_argument("--tournaments", type = int, default = 40,
+                        help = "number of single elimination tournaments each year")
+    parser.add_argument("--players", type = int, default = 600)
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+    generate_data(args.out_dir, list(range(args.first_year, args.last_year + 1)),
+                  args.tournaments, num_players = args.players, seed = args.seed)
+
+def set_scores(winner_is_player1, rng):
+    """
+    Makes the set scores of a completed best of 3 match
+
+    Parameters
+    ----------
+    winner_is_player1 : Boolean
+        whether player 1 won the match
+    rng : random.Random
+        random number generator
+
+    Returns
+    -------
+    sets : list of strings
+        the score of each set from player 1's point of view, such as "6-3";
+        always 3 items, with "" for a set that was not played
+    """
+    if rng.random() < 0.6:
+        winner_won_sets = [True, True]
+    else:
+        winner_won_sets = rng.choice([[True, False, True], [False, True, True]])
+    sets = []
+    for winner_won in winner_won_sets:
+        games = (6, rng.randint(0, 4))
+        if winner_won != winner_is_player1:
+            games = (games[1], games[0])
+        sets.append(str(games[0]) + "-" + str(games[1]))
+    return sets + [""] * (3 - len(sets))
+
+def match_line(tournament, player1, player2, winner, ranks, rng, retirement_rate = 0.0,
+               end_date = None):
+    """
+    Makes one line of a csv file for a match
+
+    Parameters
+    ----------
+    tournament : dictionary
+        dictionary with the tournament's name under "Name" and its start and
+        end dates under "Start date" and "End date"
+    player1 : string
+        name of player 1
+    player2 : string
+        name of player 2
+    winner : string
+        name of the winner, player1 or player2
+    ranks : dictionary
+        dictionary with key: value pairs of player name: rank; players without
+        a rank are left blank
+    rng : random.Random
+        random number generator
+    retirement_rate : float, optional
+        chance that the loser retired during the match. The default is 0.0.
+    end_date : date, optional
+        end date to use instead of the tournament's. The default is None.
+
+    Returns
+    -------
+    list of strings
+        values for each of COLUMN_NAMES
+    """
+    if end_date == None:
+        end_date = tournament["End date"]
+    if rng.random() < retirement_rate:
+        loser = player2 if winner == player1 else player1
+        sets = ["6-3" if winner == player1 else "3-6", "2-1", ""]
+        comment = loser + " Retired"
+    else:
+        sets = set_scores(winner == player1, rng)
+        comment = "Completed"
+    rank_strings = [str(ranks[player]) if player in ranks.keys() else "" for
+                    player in (player1, player2)]
+    return ([tournament["Name"], tournament["Start date"].isoformat(), end_date.isoformat(),
+             "3", player1, player2] + rank_strings + sets + [comment])
+
+def play_match(player1, player2, ranks, rng):
+    """
+    Picks the winner of a match, giving the better ranked player a better chance
+
+    Returns
+    -------
+    string
+        name of the winner
+    """
+    rank1 = ranks.get(player1, 1000)
+    rank2 = ranks.get(player2, 1000)
+    if rng.random() < rank2 / (rank1 + rank2):
+        return player1
+    return player2
+
+def elimination_matches(players, ranks, rng, third_place_match = False):
+    """
+    Plays a single elimination tournament, giving byes to the best ranked
+    players if the number of players is not a power of 2
+
+    Parameters
+    ----------
+    players : list of strings
+        names of the players in the draw
+    ranks : dictionary
+        dictionary with key: value pairs of player name: rank
+    rng : random.Random
+        random number generator
+    third_place_match : Boolean, optional
+        whether the losers of the semifinals play a third place match. The
+        default is False.
+
+    Returns
+    -------
+    matches : list of tuples
+        (player 1, player 2, winner) tuples in round order, with the third
+        place match just before the final
+    """
+    draw_size = 1
+    while draw_size < len(players):
+        draw_size *= 2
+    num_byes = draw_size - len(players)
+
+    # the best ranked players get byes and everyone else plays in the first round
+    seeded = sorted(players, key = lambda player: ranks.get(player, 10 ** 6))
+    unseeded = seeded[num_byes:]
+    rng.shuffle(unseeded)
+    slots = [(player, None) for player in seeded[:num_byes]]
+    slots.extend([(unseeded[i], unseeded[i + 1]) for i in range(0, len(unseeded), 2)])
+    rng.shuffle(slots)
+
+    rounds = []
+    semifinal_losers = []
+    while True:
+        round_matches = []
+        advancing = []
+        for player1, player2 in slots:
+            if player2 == None:
+                advancing.append(player1)
+                continue
+            if rng.random() < 0.5:
+                player1, player2 = player2, player1
+            winner = play_match(player1, player2, ranks, rng)
+            round_matches.append((player1, player2, winner))
+            advancing.append(winner)
+        rounds.append(round_matches)
+        if len(advancing) == 1:
+            break
+        if len(advancing) == 2:
+            semifinal_losers = [player2 if winner == player1 else player1 for
+                                player1, player2, winner in round_matches]
+        slots = [(advancing[i], advancing[i + 1]) for i in range(0, len(advancing), 2)]
+
+    matches = []
+    for round_matches in rounds[:-1]:
+        matches.extend(round_matches)
+    if third_place_match:
+        player1, player2 = semifinal_losers
+        matches.append((player1, player2, play_match(player1, player2, ranks, rng)))
+    matches.extend(rounds[-1])
+    return matches
+
+def round_robin_matches(players, ranks, rng):
+    """
+    Plays a tournament of two round robin groups of four, whose top two
+    players play semifinals against the other group, followed by a final
+
+    Parameters
+    ----------
+    players : list of strings
+        names of the 8 players
+    ranks : dictionary
+        dictionary with key: value pairs of player name: rank
+    rng : random.Random
+        random number generator
+
+    Returns
+    -------
+    matches : list of tuples
+        (player 1, player 2, winner) tuples with the group matches first
+    """
+    groups = [players[:4], players[4:8]]
+    matches = []
+    group_wins = {player: 0 for player in players}
+    for group in groups:
+        for i in range(4):
+            for j in range(i + 1, 4):
+                winner = play_match(group[i], group[j], ranks, rng)
+                group_wins[winner] += 1
+                matches.append((group[i], group[j], winner))
+
+    # the top two of each group play the other group's top two
+    top_two = [sorted(group, key = lambda player: -group_wins[player])[:2] for group in groups]
+    semifinals = [(top_two[0][0], top_two[1][1]), (top_two[1][0], top_two[0][1])]
+    finalists = [play_match(player1, player2, ranks, rng) for player1, player2 in semifinals]
+    # the finalists come from different groups so they only play each other once
+    if (finalists[0] in groups[0]) == (finalists[1] in groups[0]):
+        player1, player2 = semifinals[1]
+        finalists[1] = player2 if finalists[1] == player1 else player1
+    for k in range(2):
+        matches.append((semifinals[k][0], semifinals[k][1], finalists[k]))
+    matches.append((finalists[0], finalists[1], play_match(finalists[0], finalists[1],
+                                                           ranks, rng)))
+    return matches
+
+def generate_data(out_dir, years, tournaments_per_year, num_players = 600, seed = 0,
+                  retirement_rate = 0.02):
+    """
+    Writes a csv file of synthetic matches for each year. Each year has
+    tournaments_per_year single elimination tournaments with a mix of draw
+    sizes, some needing byes and some with third place matches, the round robin
+    tournaments in the tournament format registry for that year, and, except
+    in the last year, a tournament that ends in the next year.
+
+    Parameters
+    ----------
+    out_dir : string
+        folder to write the csv files to; made if it does not exist
+    years : list of ints
+        the years to make data for, in order
+    tournaments_per_year : int
+        number of single elimination tournaments each year
+    num_players : int, optional
+        number of players to draw the players of each tournament from. The
+        default is 600.
+    seed : int, optional
+        seed of the random number generator, so the same data is made each
+        time. The default is 0.
+    retirement_rate : float, optional
+        chance that each single elimination match ended with a retirement. The
+        default is 0.02.
+
+    Returns
+    -------
+    file_names : list of strings
+        names of the csv files written, one for each year, as used by
+        data.get_and_parse_data
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok = True)
+    players = ["Player" + str(i).zfill(5) + " " + chr(65 + i % 26) + "." for
+               i in range(num_players)]
+    ranks = {players[i]: i + 1 for i in range(num_players)}
+    formats = data.load_tournament_formats(data.FORMATS_FILE)
+    file_names = []
+    next_year_lines = []
+
+    for year in years:
+        lines = next_year_lines
+        next_year_lines = []
+        first_start = date(year, 1, 2)
+
+        for k in range(tournaments_per_year):
+            start_date = first_start + timedelta(weeks = k * 50 // tournaments_per_year)
+            tournament = {"Name": "Synthetic Open " + str(k), "Start date": start_date,
+                          "End date": start_date + timedelta(days = 6)}
+            draw_type = rng.random()
+            if draw_type < 0.2:
+                draw = rng.sample(players, rng.choice(THIRD_PLACE_DRAW_SIZES))
+                matches = elimination_matches(draw, ranks, rng, third_place_match = True)
+            else:
+                draw = rng.sample(players, rng.choice(DRAW_SIZES))
+                matches = elimination_matches(draw, ranks, rng)
+            for player1, player2, winner in matches:
+                lines.append(match_line(tournament, player1, player2, winner, ranks, rng,
+                                        retirement_rate = retirement_rate))
+
+        # the round robin tournaments of the year, played by top players
+        for (name, format_year), tournament_format in formats.items():
+            if format_year != year or tournament_format != "round robin":
+                continue
+            tournament = {"Name": name, "Start date": date(year, 10, 20),
+                          "End date": date(year, 10, 27)}
+            draw = rng.sample(players[:40], 8)
+            for player1, player2, winner in round_robin_matches(draw, ranks, rng):
+                lines.append(match_line(tournament, player1, player2, winner, ranks, rng))
+
+        # a tournament over new year; its early rounds are in this year's file
+        # with an end date of December 31 and the rest are in next year's file
+        if year != years[-1]:
+            tournament = {"Name": "Synthetic New Year Cup", "Start date": date(year, 12, 29),
+                          "End date": date(year + 1, 1, 4)}
+            matches = elimination_matches(rng.sample(players, 32), ranks, rng)
+            for i in range(len(matches)):
+                player1, player2, winner = matches[i]
+                if i < 16:
+                    lines.append(match_line(tournament, player1, player2, winner, ranks,
+                                            rng, end_date = date(year, 12, 31)))
+                else:
+                    next_year_lines.append(match_line(tournament, player1, player2,
+                                                      winner, ranks, rng))
+
+        file_name = str(year) + ".csv"
+        with open(os.path.join(out_dir, file_name), "w", newline = "") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMN_NAMES)
+            writer.writerows(lines)
+        file_names.append(file_name)
+
+        # ranks move a little between years, and some players lose their rank
+        for player in players:
+            ranks[player] = max(1, ranks.get(player, num_players) + rng.randint(-5, 5))
+            if rng.random() < 0.01:
+                del ranks[player]
+
+    return file_names
+
+if __name__ == "__main__":
+    main()
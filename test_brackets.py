@@ -0,0 +1,45 @@
+# tests of the bracket tree of a tournament with byes and a third place match
+
+from datetime import datetime
+import brackets
+
+def make_tournament():
+    """
+    Makes a six player tournament where A and B have byes into the
+    semifinals and C and E, the losing semifinalists, play a third place match
+    """
+    matches = [("C", "D", 1, "First Round"), ("E", "F", 1, "First Round"),
+               ("A", "C", 2, "Semifinal"), ("B", "E", 2, "Semifinal"),
+               ("E", "C", 3, "Third Place Match"), ("A", "B", 3, "Final")]
+    return [{"Tournament": "Open", "Start date": datetime(2008, 3, 1), "Winner": winner,
+             "Loser": loser, "Round number": round_number, "Round name": round_name} for
+            winner, loser, round_number, round_name in matches]
+
+def test_build_bracket():
+    list_of_dicts = make_tournament()
+    bracket = brackets.build_bracket(list_of_dicts, 0, len(list_of_dicts) - 1)
+    nodes = bracket["Matches"]
+    assert [node["Index"] for node in nodes] == list(range(6))
+    assert bracket["Final"] is nodes[5]
+    assert bracket["Third place match"] is nodes[4]
+    assert bracket["Byes"] == ["A", "B"]
+
+    assert nodes[0]["Parent"] is nodes[2] and nodes[1]["Parent"] is nodes[3]
+    assert nodes[2]["Feeders"] == [None, nodes[0]]
+    assert nodes[5]["Feeders"] == [nodes[2], nodes[3]]
+    assert nodes[5]["Parent"] == None
+    assert nodes[4]["Feeders"] == [nodes[3], nodes[2]]
+    assert bracket["First match"]["D"] is nodes[0]
+    assert bracket["Last match"]["C"] is nodes[2]
+
+def test_bracket_queries():
+    list_of_dicts = make_tournament()
+    bracket = brackets.build_bracket(list_of_dicts, 0, len(list_of_dicts) - 1)
+    nodes = bracket["Matches"]
+    assert brackets.path_to_final(bracket, "D") == [nodes[0], nodes[2], nodes[5]]
+    assert brackets.players_beaten(bracket, "A") == ["C", "B"]
+    assert brackets.players_beaten(bracket, "E") == ["F"]
+    assert brackets.bracket_section(bracket, "D", 2) is nodes[2]
+    assert brackets.bracket_section(bracket, "A", 1) == None
+    assert sorted(brackets.section_players(nodes[3])) == ["B", "E", "F"]
+    assert sorted(brackets.section_players(bracket["Final"])) == ["A", "B", "C", "D", "E", "F"]
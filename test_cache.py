@@ -0,0 +1,49 @@
+# tests of the cache of parsed rows
+
+import os
+from datetime import datetime
+import cache
+
+ROWS = [{"Tournament": "Open", "End date": datetime(2008, 3, 2), "Player 1": "Smith J.",
+         "Player 2": "Jones A.", "Winner": "Smith J.", "Loser": "Jones A."}]
+
+def write_data_file(tmp_path, text = "Tournament,Player 1\nOpen,Smith J.\n"):
+    file_path = str(tmp_path / "data.csv")
+    with open(file_path, "w") as f:
+        f.write(text)
+    return file_path
+
+def test_round_trip(tmp_path):
+    file_path = write_data_file(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    assert cache.load_cached_rows(cache_dir, file_path, 2008) == None
+    cache.save_cached_rows(cache_dir, file_path, 2008, ROWS, parser_key = "parser",
+                           extra = {"Count": 1})
+    assert cache.load_cached_rows(cache_dir, file_path, 2008, parser_key = "parser") == ROWS
+    assert cache.load_cached_rows(cache_dir, file_path, 2008, parser_key = "parser",
+                                  with_extra = True) == (ROWS, {"Count": 1})
+
+def test_stale_cache_is_not_used(tmp_path):
+    file_path = write_data_file(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    cache.save_cached_rows(cache_dir, file_path, 2008, ROWS, parser_key = "parser")
+    assert cache.load_cached_rows(cache_dir, file_path, 2008, parser_key = "other") == None
+    assert cache.load_cached_rows(cache_dir, file_path, 2009, parser_key = "parser") == None
+    write_data_file(tmp_path, "Tournament,Player 1\nOpen,Jones A.\n")
+    assert cache.load_cached_rows(cache_dir, file_path, 2008, parser_key = "parser") == None
+
+def test_touched_file_with_same_contents(tmp_path):
+    file_path = write_data_file(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    cache.save_cached_rows(cache_dir, file_path, 2008, ROWS)
+    stats = os.stat(file_path)
+    os.utime(file_path, ns = (stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+    assert cache.load_cached_rows(cache_dir, file_path, 2008) == ROWS
+
+def test_broken_cache_file(tmp_path):
+    file_path = write_data_file(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    cache.save_cached_rows(cache_dir, file_path, 2008, ROWS)
+    with open(cache.cache_file_path(cache_dir, file_path, 2008), "wb") as f:
+        f.write(b"not a pickle")
+    assert cache.load_cached_rows(cache_dir, file_path, 2008) == None
@@ -0,0 +1,117 @@
+# tests of parsing the data files on two small hand written years of matches
+
+import math
+import pytest
+import data
+
+HEADER = "Tournament,Start date,End date,Best of,Player 1,Player 2,Rank 1,Rank 2,Set 1,Set 2,Set 3,Comment\n"
+
+# the Hopman Cup starts in 2008 and ends in 2009, so its 2008 matches end on
+# December 31 and are held back until the rest of the tournament is read
+YEAR_FILES = {"2008.csv": ["Open,2008-03-01,2008-03-08,3,Smith J.,Jones A.,3,10,6-4,3-6,7-5,Completed",
+                           "Open,2008-03-01,2008-03-08,3,Brown K.,Lee M.,5,,6-3,2-1,,Lee M. Retired",
+                           "Open,2008-03-01,2008-03-08,3,Smith J.,Brown K.,3,5,2-6,1-6,,Completed",
+                           "Hopman Cup,2008-12-29,2008-12-31,3,Green P.,White R.,20,30,6-2,6-2,,Completed",
+                           "Masters,2008-11-01,2008-11-08,3,Jones A.,Lee M.,10,12,7-6,6-7,6-0,Completed"],
+              "2009.csv": ["Hopman Cup,2008-12-29,2009-01-04,3,Green P.,Smith J.,20,3,4-6,6-4,1-0,Green P. Retired",
+                           "Spring,2009-02-01,2009-02-08,3,White R.,Brown K.,30,5,0-6,6-0,6-3,Completed"]}
+
+def write_year_files(tmp_path):
+    for file_name, lines in YEAR_FILES.items():
+        with open(tmp_path / file_name, "w") as f:
+            f.write(HEADER + "\n".join(lines) + "\n")
+    return list(YEAR_FILES.keys()), [2008, 2009]
+
+def comparable(rows):
+    """
+    Copies rows with nan replaced by None, since nan is not equal to itself
+    once rows have been through the cache
+    """
+    return [{key: None if isinstance(value, float) and math.isnan(value) else value for
+             key, value in dic.items()} for dic in rows]
+
+def test_stream_tournaments_matches_get_and_parse_data(tmp_path):
+    file_names, years = write_year_files(tmp_path)
+    all_data = data.get_and_parse_data(file_names, years, data_dir = str(tmp_path))
+    # the second run with a cache folder loads the rows saved by the first
+    for cache_dir in (None, str(tmp_path / "cache"), str(tmp_path / "cache")):
+        tournaments = list(data.stream_tournaments(file_names, years, cache_dir = cache_dir,
+                                                   data_dir = str(tmp_path)))
+        assert [tournament[0]["Tournament"] for tournament in tournaments] == [
+            "Open", "Masters", "Hopman Cup", "Spring"]
+        for tournament in tournaments:
+            assert len(set(dic["Tournament"] for dic in tournament)) == 1
+        assert comparable([dic for tournament in tournaments for dic in tournament]) == \
+            comparable(all_data)
+    hopman_cup = [dic for dic in all_data if dic["Tournament"] == "Hopman Cup"]
+    assert [dic["Winner"] for dic in hopman_cup] == ["Green P.", "Smith J."]
+
+def test_apply_corrections():
+    rules = [{"Action": "rename", "Field": "Player 2", "Value": "Jones A.", "Note": "",
+              "Times applied": 0},
+             {"Action": "winner", "Field": "", "Value": "Jones A.", "Note": "",
+              "Times applied": 0}]
+    row_dict = {"Player 1": "Smith J.", "Player 2": "Jones"}
+    data.apply_corrections(row_dict, rules, "rename")
+    assert row_dict == {"Player 1": "Smith J.", "Player 2": "Jones A."}
+    assert [rule["Times applied"] for rule in rules] == [1, 0]
+
+    row_dict["Winner"], row_dict["Loser"] = "Smith J.", "Jones A."
+    data.apply_corrections(row_dict, rules, "winner")
+    assert (row_dict["Winner"], row_dict["Loser"]) == ("Jones A.", "Smith J.")
+    assert [rule["Times applied"] for rule in rules] == [1, 1]
+
+def test_load_corrections_rejects_unknown_actions(tmp_path):
+    file_path = tmp_path / "corrections.csv"
+    with open(file_path, "w") as f:
+        f.write("Year,Tournament,Player 1,Player 2,Action,Field,Value,Note\n" +
+                "2008,Open,Smith J.,Jones A.,swap,,,\n")
+    with pytest.raises(AssertionError):
+        data.load_corrections(str(file_path))
+
+def test_parsed_line_is_corrected():
+    col_names = HEADER.strip().split(",")
+    line = ("Internationaux de Strasbourg,2007-05-19,2007-05-26,3,Sun T.T.,Tanasugarn T.," +
+            "50,40,6-4,6-4,,Completed").split(",")
+    row_dict = data.parse_tennis_data_line(line, col_names, 2007)
+    assert row_dict["Player 1"] == "Sun S."
+    assert (row_dict["Winner"], row_dict["Loser"]) == ("Sun S.", "Tanasugarn T.")
+
+def test_tournament_formats(tmp_path):
+    file_path = tmp_path / "formats.csv"
+    with open(file_path, "w") as f:
+        f.write("Tournament,First year,Last year,Format\n" +
+                "Masters,2008,2009,round robin\n")
+    assert data.load_tournament_formats(str(file_path)) == {
+        ("Masters", 2008): "round robin", ("Masters", 2009): "round robin"}
+    with open(file_path, "a") as f:
+        f.write("Cup,2008,2008,third place match\n")
+    with pytest.raises(AssertionError):
+        data.load_tournament_formats(str(file_path))
+
+    assert data.get_tournament_format("Sony Ericsson Championships", 2008) == "round robin"
+    assert data.get_tournament_format("Sony Ericsson Championships", 2016) == "single elimination"
+    assert data.get_round_robin_status("Sony Ericsson Championships", 2008)
+    assert not data.get_round_robin_status("Open", 2008)
+
+def test_decode_set_scores(tmp_path):
+    write_year_files(tmp_path)
+    parsed_rows = data.parse_one_file(str(tmp_path / "2008.csv"), 2008)
+    set_scores = data.decode_set_scores(parsed_rows)
+    assert set_scores["Sets per match"] == 3
+    assert list(set_scores["Games 1"]) == [6, 3, 7, 6, 2, 0, 2, 1, 0, 6, 6, 0, 7, 6, 6]
+    assert list(set_scores["Games 2"]) == [4, 6, 5, 3, 1, 0, 6, 6, 0, 2, 2, 0, 6, 7, 0]
+    assert list(set_scores["Sets parsed"]) == [3, 2, 2, 2, 3]
+    # the unfinished set before Lee M. retired is not counted
+    assert list(set_scores["Sets 1"]) == [2, 1, 0, 2, 2]
+    assert list(set_scores["Sets 2"]) == [1, 0, 2, 0, 1]
+    assert list(set_scores["Winner index"]) == [0, 0, 1, 0, 0]
+    assert [dic["Winner"] for dic in parsed_rows] == ["Smith J.", "Brown K.", "Brown K.",
+                                                     "Green P.", "Jones A."]
+
+def test_parse_one_file_matches_parsing_each_line(tmp_path):
+    file_names, years = write_year_files(tmp_path)
+    for file_name, year in zip(file_names, years):
+        file_path = str(tmp_path / file_name)
+        assert (comparable(data.parse_one_file(file_path, year)) ==
+                comparable(data.iter_parsed_rows(file_path, year)))
@@ -0,0 +1,66 @@
+# tests of the MatchTable columns and the dictionary view of each row
+
+import math
+from datetime import datetime
+import pytest
+from match_table import MatchTable
+
+def make_rows():
+    return [{"Tournament": "Open", "Start date": datetime(2008, 3, 1),
+             "End date": datetime(2008, 3, 2), "Player 1": "Smith J.",
+             "Player 2": "Jones A.", "Winner": "Smith J.", "Loser": "Jones A.",
+             "Best of": 5, "Rank 1": 3.0, "Rank 2": math.nan, "Comment": "Completed"},
+            {"Tournament": "Open", "Start date": datetime(2008, 3, 1),
+             "End date": datetime(2008, 3, 2), "Player 1": "Brown K.",
+             "Player 2": "Smith J.", "Winner": "Smith J.", "Loser": "Brown K.",
+             "Best of": 5, "Rank 1": 7.0, "Rank 2": 3.0, "Round number": 2}]
+
+def test_round_trip():
+    rows = make_rows()
+    table = MatchTable.from_dicts(rows)
+    assert len(table) == 2
+    dicts = table.to_dicts()
+    assert dicts[0].keys() == rows[0].keys()
+    assert dicts[1].keys() == rows[1].keys()
+    for dic, row in zip(dicts, rows):
+        for key, value in row.items():
+            if isinstance(value, float) and math.isnan(value):
+                assert math.isnan(dic[key])
+            else:
+                assert dic[key] == value
+
+def test_row_reads_and_changes_the_table():
+    table = MatchTable.from_dicts(make_rows())
+    row = table[-1]
+    assert row["Player 1"] == "Brown K."
+    assert "Comment" not in row
+    with pytest.raises(KeyError):
+        row["Comment"]
+
+    row["WbW 1"] = 4
+    row["WbW 2"] = math.nan
+    assert table[1]["WbW 1"] == 4 and isinstance(table[1]["WbW 1"], int)
+    assert math.isnan(table[1]["WbW 2"])
+    assert "WbW 1" not in table[0]
+
+    del row["Round number"]
+    assert "Round number" not in row
+    assert table[0].get("Round number") == None
+    with pytest.raises(KeyError):
+        del row["Round number"]
+    with pytest.raises(IndexError):
+        table[2]
+
+def test_value_of_another_type_is_kept():
+    table = MatchTable.from_dicts(make_rows())
+    table[0]["Best of"] = "3"
+    assert table[0]["Best of"] == "3"
+    assert table[1]["Best of"] == 5
+    assert table.column_kind("Best of") == "object"
+
+def test_select_shares_ids():
+    table = MatchTable.from_dicts(make_rows())
+    selected = table.select([1])
+    assert len(selected) == 1
+    assert dict(selected[0]) == dict(table[1])
+    assert selected.column("Player 1")[0] == table.player_id("Brown K.")
@@ -0,0 +1,78 @@
+# tests of adding years to a saved pipeline state, on synthetic data
+
+import math
+import pytest
+import pipeline
+import synthetic
+
+YEARS = [2007, 2008, 2009]
+
+# the undamped WbW iteration can cycle forever, so each ranking is capped
+MAX_ITERATIONS = 200
+
+@pytest.fixture(scope = "module")
+def data_dir(tmp_path_factory):
+    data_dir = str(tmp_path_factory.mktemp("data"))
+    synthetic.generate_data(data_dir, YEARS, 8, num_players = 150, seed = 1)
+    return data_dir
+
+def wbw_values(list_of_dicts):
+    """
+    Gets the "WbW 1" and "WbW 2" values of each match, with None for nan so
+    they can be compared
+    """
+    return [tuple(None if math.isnan(dic[key]) else dic[key] for key in ("WbW 1", "WbW 2"))
+            if "WbW 1" in dic else None for dic in list_of_dicts]
+
+def saved_state(data_dir, tmp_path, **kwargs):
+    """
+    Runs the pipeline on all but the last year, saving its state to a file
+    and loading it back
+    """
+    state = {}
+    file_names, years = pipeline.find_data_files(data_dir, last_year = YEARS[-2])
+    pipeline.run_pipeline(file_names, years, data_dir, max_iterations = MAX_ITERATIONS,
+                          state = state, **kwargs)
+    state_file = str(tmp_path / "state.pkl")
+    pipeline.save_state(state_file, state)
+    return pipeline.load_state(state_file)
+
+def test_update_matches_full_run(data_dir, tmp_path):
+    file_names, years = pipeline.find_data_files(data_dir)
+    full, tournament_index, engine = pipeline.run_pipeline(file_names, years, data_dir,
+                                                           max_iterations = MAX_ITERATIONS)
+
+    state = saved_state(data_dir, tmp_path)
+    file_names, years = pipeline.find_data_files(data_dir, first_year = YEARS[-1])
+    updated, updated_index, updated_engine = pipeline.update_pipeline(
+        state, file_names, years, data_dir, max_iterations = MAX_ITERATIONS)
+
+    assert updated_index == tournament_index
+    assert [dic["Round number"] for dic in updated] == [dic["Round number"] for dic in full]
+    assert wbw_values(updated) == wbw_values(full)
+    assert state["Years"] == YEARS
+
+def test_update_with_other_settings_fails(data_dir, tmp_path):
+    state = saved_state(data_dir, tmp_path)
+    file_names, years = pipeline.find_data_files(data_dir, first_year = YEARS[-1])
+    with pytest.raises(AssertionError, match = "saved with"):
+        pipeline.update_pipeline(state, file_names, years, data_dir,
+                                 max_iterations = MAX_ITERATIONS + 1)
+    with pytest.raises(AssertionError, match = "saved with"):
+        pipeline.update_pipeline(state, file_names, years, data_dir, backend = "numpy",
+                                 max_iterations = MAX_ITERATIONS)
+
+def test_update_carries_on_elo_ratings(data_dir, tmp_path):
+    file_names, years = pipeline.find_data_files(data_dir)
+    full, tournament_index, engine = pipeline.run_pipeline(file_names, years, data_dir,
+                                                           max_iterations = MAX_ITERATIONS,
+                                                           elo = True)
+
+    state = saved_state(data_dir, tmp_path, elo = True)
+    file_names, years = pipeline.find_data_files(data_dir, first_year = YEARS[-1])
+    updated, updated_index, updated_engine = pipeline.update_pipeline(
+        state, file_names, years, data_dir, max_iterations = MAX_ITERATIONS)
+
+    assert updated_engine == engine
+    assert ([(dic["Elo 1"], dic["Elo 2"]) for dic in updated[-100:]] ==
+            [(dic["Elo 1"], dic["Elo 2"]) for dic in full[-100:]])
@@ -0,0 +1,300 @@
+# regression tests on a small made up dataset: the faster ways of ranking the
+# players must give the same results as the original functions
+
+import copy
+import math
+import os
+import random
+from datetime import datetime, timedelta
+import pytest
+import data
+from match_table import MatchTable
+import ranking_store
+import rankings
+
+YEARS = [2007, 2008, 2009]
+
+# the undamped WbW iteration can cycle forever, so each ranking is capped
+MAX_ITERATIONS = 200
+
+def make_matches(years, tournaments_per_year, num_players = 16, seed = 0):
+    """
+    Makes the matches of eight player single elimination tournaments spread
+    over each year, with a championship in October listed after the rest of
+    the year's tournaments as it is in the real data. The better ranked
+    player of a match, the one earlier in the list of players, usually wins.
+
+    Returns
+    -------
+    list_of_dicts : list of dictionaries
+        the matches, with the keys needed to rank the players
+    """
+    rng = random.Random(seed)
+    players = ["Player" + str(i).zfill(3) for i in range(num_players)]
+    list_of_dicts = []
+
+    for year in years:
+        tournaments = [("Open " + str(k), datetime(year, 1, 5) +
+                        timedelta(weeks = k * 50 // tournaments_per_year), players) for
+                       k in range(tournaments_per_year)]
+        tournaments.append(("Championships", datetime(year, 10, 20), players[:8]))
+        for name, start_date, entrants in tournaments:
+            draw = rng.sample(entrants, 8)
+            for round_number in (1, 2, 3):
+                next_draw = []
+                for j in range(0, len(draw), 2):
+                    better, worse = sorted(draw[j:j + 2], key = players.index)
+                    winner, loser = (better, worse) if rng.random() < 0.7 else (worse, better)
+                    player1, player2 = (winner, loser) if rng.random() < 0.5 else (loser, winner)
+                    list_of_dicts.append({"Tournament": name, "Start date": start_date,
+                                          "End date": start_date + timedelta(days = 6),
+                                          "Player 1": player1, "Player 2": player2,
+                                          "Winner": winner, "Loser": loser,
+                                          "Round number": round_number,
+                                          "Round robin tournament": False})
+                    next_draw.append(winner)
+                draw = next_draw
+
+    return list_of_dicts
+
+@pytest.fixture(scope = "module")
+def matches():
+    return make_matches(YEARS, 12)
+
+def assign_and_record_wbw(list_of_dicts, **kwargs):
+    """
+    Assigns WbW ranks to a copy of list_of_dicts, recording the scores of
+    each ranking calculated
+
+    Returns
+    -------
+    list_of_dicts : list of dictionaries
+        the copy with the WbW ranks assigned
+    all_scores : list of dictionaries
+        the scores returned by wbw for each ranking, in order
+    """
+    list_of_dicts = copy.deepcopy(list_of_dicts)
+    all_scores = []
+    wbw = rankings.wbw
+    def recording_wbw(*args, **wbw_kwargs):
+        result = wbw(*args, **wbw_kwargs)
+        all_scores.append(result[1])
+        return result
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(rankings, "wbw", recording_wbw)
+        rankings.assign_wbw_rankings(list_of_dicts, max_iterations = MAX_ITERATIONS,
+                                     **kwargs)
+    return list_of_dicts, all_scores
+
+@pytest.fixture(scope = "module")
+def full_wbw(matches):
+    """
+    The WbW ranks assigned by the original assign_wbw_rankings, which finds
+    the last 52 weeks of matches by going through all of the data
+    """
+    return assign_and_record_wbw(matches)
+
+@pytest.fixture(scope = "module")
+def windowed_wbw(matches):
+    return assign_and_record_wbw(matches, windowed = True)
+
+def wbw_values(list_of_dicts):
+    """
+    Gets the "WbW 1" and "WbW 2" values of each match, with None for nan so
+    they can be compared
+    """
+    values = []
+    for dic in list_of_dicts:
+        pair = []
+        for key in ("WbW 1", "WbW 2"):
+            value = dic.get(key)
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            pair.append(value)
+        values.append(tuple(pair))
+    return values
+
+def same_score(score, other_score):
+    return math.isclose(score, other_score, rel_tol = 1e-9, abs_tol = 1e-12)
+
+def assert_same_wbw(recorded, expected):
+    """
+    Checks that two runs of assign_wbw_rankings calculated the same scores for
+    each ranking and assigned the same ranks. Players with the same score are
+    ranked in the order wbw finds them, which depends on the hash seed, so the
+    ranks of players tied with another player in any ranking are not
+    compared.
+    """
+    list_of_dicts, all_scores = recorded
+    expected_list_of_dicts, expected_all_scores = expected
+    assert len(all_scores) == len(expected_all_scores)
+
+    tied = set()
+    for scores, expected_scores in zip(all_scores, expected_all_scores):
+        assert scores.keys() == expected_scores.keys()
+        for player in scores.keys():
+            assert same_score(scores[player], expected_scores[player]), player
+        ordered = sorted(expected_scores.items(), key = lambda item: item[1])
+        for j in range(1, len(ordered)):
+            if same_score(ordered[j][1], ordered[j - 1][1]):
+                tied.update([ordered[j][0], ordered[j - 1][0]])
+
+    values = wbw_values(list_of_dicts)
+    expected_values = wbw_values(expected_list_of_dicts)
+    compared = 0
+    for i in range(len(expected_values)):
+        for k in range(2):
+            if expected_list_of_dicts[i]["Player " + str(k + 1)] not in tied:
+                assert values[i][k] == expected_values[i][k], i
+                compared += 1
+    # most of the ranks must be compared for the check to mean anything
+    assert compared > len(expected_values)
+
+def test_windowed_wbw_matches_full(windowed_wbw, full_wbw):
+    assert_same_wbw(windowed_wbw, full_wbw)
+
+def test_numpy_wbw_matches_dict(matches, full_wbw):
+    pytest.importorskip("numpy")
+    numpy_wbw = assign_and_record_wbw(matches, backend = "numpy")
+    assert_same_wbw(numpy_wbw, full_wbw)
+
+def test_date_index_finds_the_same_matches(matches):
+    date_index = rankings.build_date_index(matches)
+    for years in ([YEARS[0]], YEARS[1:]):
+        assert (rankings.matches_in_years(matches, years, date_index = date_index) ==
+                rankings.matches_in_years(matches, years))
+    for year in YEARS:
+        assert (rankings.get_win_rankings_year(matches, year, date_index = date_index) ==
+                rankings.get_win_rankings_year(matches, year))
+        assert (rankings.loss_penalty_ranking_year(matches, year, date_index = date_index) ==
+                rankings.loss_penalty_ranking_year(matches, year))
+
+def test_ranking_store_gives_the_same_rankings(matches):
+    store = ranking_store.build_ranking_store(matches)
+    # a store added to a part at a time, as when a new year is added
+    added_store = ranking_store.new_ranking_store()
+    ranking_store.add_to_ranking_store(added_store, matches[:100])
+    ranking_store.add_to_ranking_store(added_store, matches[100:])
+
+    for years in ([YEARS[0]], [YEARS[2]], YEARS[1:], YEARS):
+        wins = rankings.get_win_rankings_years(matches, years)
+        loss_penalty = rankings.loss_penalty_ranking_years(matches, years)
+        for each_store in (store, added_store):
+            assert rankings.get_win_rankings_years(matches, years, store = each_store) == wins
+            assert (rankings.loss_penalty_ranking_years(matches, years, store = each_store) ==
+                    loss_penalty)
+
+def test_batch_rankings_match_each_year(matches):
+    batch = rankings.batch_rankings(matches)
+    assert list(batch.keys()) == YEARS
+    for year in YEARS:
+        assert batch[year]["Wins"] == rankings.get_win_rankings_year(matches, year)
+        assert batch[year]["Loss penalty"] == rankings.loss_penalty_ranking_year(matches, year)
+    top_3 = rankings.batch_rankings(matches, top_k = 3)
+    assert top_3[YEARS[0]]["Wins"] == batch[YEARS[0]]["Wins"][:3]
+
+def test_numpy_loss_penalty_matches_dict(matches):
+    pytest.importorskip("numpy")
+    scores = rankings.calculate_loss_penalty_scores(matches)
+    assert rankings.calculate_loss_penalty_scores(matches, backend = "numpy") == scores
+    table = MatchTable.from_dicts(matches)
+    assert rankings.calculate_loss_penalty_scores(table, backend = "numpy") == scores
+    for year in YEARS:
+        assert (rankings.loss_penalty_ranking_year(matches, year, backend = "numpy") ==
+                rankings.loss_penalty_ranking_year(matches, year))
+
+def first_row_of(list_of_dicts, tournament, year):
+    """
+    Gets the index of the first match of a tournament in a year
+    """
+    for i in range(len(list_of_dicts)):
+        if (list_of_dicts[i]["Tournament"] == tournament and 
+            list_of_dicts[i]["Start date"].year == year):
+            return i
+
+def test_incremental_wbw_matches_full(matches, windowed_wbw):
+    # the data is split between years, as when a new year's file is added
+    split = first_row_of(matches, "Open 0", YEARS[-1])
+    state = {}
+    tournament_index = data.build_tournament_index(matches[:split])
+    earlier, earlier_scores = assign_and_record_wbw(matches[:split], windowed = True,
+                                                    tournament_index = tournament_index,
+                                                    state = state)
+    earlier.extend(copy.deepcopy(matches[split:]))
+    tournament_index.extend(data.build_tournament_index(earlier, first_row = split))
+    updated, later_scores = assign_and_record_wbw(earlier, windowed = True,
+                                                  tournament_index = tournament_index,
+                                                  state = state)
+    assert state["Rows"] == len(matches)
+    assert_same_wbw((updated, earlier_scores + later_scores), windowed_wbw)
+
+# the championship starts before the tournament listed before it, so the new
+# matches include some that are already in the window at the saved date
+@pytest.mark.parametrize("with_order", [True, False])
+def test_resumed_window_matches_new_window(matches, with_order):
+    split = first_row_of(matches, "Championships", YEARS[1])
+    current_date = matches[split - 1]["Start date"]
+    window = rankings.new_wbw_window(matches[:split])
+    rankings.move_window(matches[:split], window, current_date)
+    window_state = rankings.wbw_state(matches[:split], 0, None, current_date, {}, {},
+                                      window = window, with_order = with_order)["Window"]
+
+    resumed = rankings.resume_wbw_window(matches, copy.deepcopy(window_state), split)
+    expected = rankings.new_wbw_window(matches)
+    rankings.move_window(matches, expected, current_date)
+    assert resumed == expected
+    assert resumed["Matches played"] != window["Matches played"]
+
+def test_checkpoint_resume_matches_uninterrupted_run(matches, windowed_wbw, tmp_path,
+                                                     monkeypatch):
+    tournament_index = data.build_tournament_index(matches)
+    checkpoint_file = str(tmp_path / "checkpoint.pkl")
+
+    # stop the first run at the first checkpoint where the next tournament 
+    # starts before the current date, so the resumed window has to move back
+    # and put back matches that had left it
+    save_wbw_checkpoint = rankings.save_wbw_checkpoint
+    def save_and_stop(file_path, list_of_dicts, tournament_index, first_tournament, state):
+        save_wbw_checkpoint(file_path, list_of_dicts, tournament_index, first_tournament, 
+                            state)
+        next_tournament = tournament_index[state["Tournaments done"]]
+        if next_tournament["Start date"] < state["Current date"]:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(rankings, "save_wbw_checkpoint", save_and_stop)
+    with pytest.raises(KeyboardInterrupt):
+        rankings.assign_wbw_rankings(copy.deepcopy(matches), windowed = True,
+                                     max_iterations = MAX_ITERATIONS,
+                                     tournament_index = tournament_index,
+                                     checkpoint_file = checkpoint_file, checkpoint_every = 1)
+    monkeypatch.undo()
+
+    resumed = copy.deepcopy(matches)
+    rankings.assign_wbw_rankings(resumed, windowed = True, max_iterations = MAX_ITERATIONS,
+                                 tournament_index = tournament_index,
+                                 checkpoint_file = checkpoint_file, checkpoint_every = 1)
+    assert wbw_values(resumed) == wbw_values(windowed_wbw[0])
+    assert not os.path.exists(checkpoint_file)
+
+def test_checkpoint_from_other_data_fails(matches, tmp_path, monkeypatch):
+    tournament_index = data.build_tournament_index(matches)
+    checkpoint_file = str(tmp_path / "checkpoint.pkl")
+
+    # stop the first run after its first checkpoint
+    save_wbw_checkpoint = rankings.save_wbw_checkpoint
+    def save_and_stop(*args):
+        save_wbw_checkpoint(*args)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(rankings, "save_wbw_checkpoint", save_and_stop)
+    with pytest.raises(KeyboardInterrupt):
+        rankings.assign_wbw_rankings(copy.deepcopy(matches), windowed = True,
+                                     max_iterations = MAX_ITERATIONS,
+                                     tournament_index = tournament_index,
+                                     checkpoint_file = checkpoint_file, checkpoint_every = 5)
+    monkeypatch.undo()
+
+    # the same data without its first tournament
+    other_data = copy.deepcopy(matches[tournament_index[1]["Start"]:])
+    with pytest.raises(AssertionError, match = "different data"):
+        rankings.assign_wbw_rankings(other_data, windowed = True,
+                                     max_iterations = MAX_ITERATIONS,
+                                     checkpoint_file = checkpoint_file, checkpoint_every = 5)
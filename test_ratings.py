@@ -0,0 +1,75 @@
+# tests of the online Elo ratings
+
+import math
+from datetime import datetime
+import data
+import ratings
+
+def make_matches():
+    """
+    Makes three small tournaments, the last of them with a player who has not
+    played before
+    """
+    matches = [("Open", datetime(2008, 3, 1), "A", "B"), ("Open", datetime(2008, 3, 1), "C", "D"),
+               ("Open", datetime(2008, 3, 1), "A", "C"), ("Cup", datetime(2008, 4, 1), "B", "A"),
+               ("Cup", datetime(2008, 4, 1), "D", "C"), ("Cup", datetime(2008, 4, 1), "B", "D"),
+               ("Masters", datetime(2008, 5, 1), "E", "A"),
+               ("Masters", datetime(2008, 5, 1), "B", "E")]
+    return [{"Tournament": tournament, "Start date": start_date, "End date": start_date,
+             "Player 1": winner, "Player 2": loser, "Winner": winner, "Loser": loser,
+             "Round robin tournament": False} for
+            tournament, start_date, winner, loser in matches]
+
+def test_update_ratings():
+    engine = ratings.new_rating_engine()
+    ratings.update_ratings(engine, "A", "B")
+    change = ratings.k_factor(0) * 0.5
+    assert engine["Ratings"] == {"A": ratings.INITIAL_RATING + change,
+                                 "B": ratings.INITIAL_RATING - change}
+    assert engine["Matches played"] == {"A": 1, "B": 1}
+
+    # an upset moves the ratings more than the expected result
+    upset = ratings.rating_snapshot(engine)
+    ratings.update_ratings(upset, "B", "A")
+    ratings.update_ratings(engine, "A", "B")
+    assert (upset["Ratings"]["B"] - (ratings.INITIAL_RATING - change) >
+            engine["Ratings"]["A"] - (ratings.INITIAL_RATING + change))
+    assert engine["Matches rated"] == 2
+
+def test_assign_elo_ratings():
+    list_of_dicts = make_matches()
+    engine = ratings.assign_elo_ratings(list_of_dicts)
+    # every match of a tournament gets the ratings from before the tournament
+    assert all(math.isnan(dic["Elo 1"]) and math.isnan(dic["Elo 2"]) for
+               dic in list_of_dicts[:3])
+    assert list_of_dicts[3]["Elo 1"] == list_of_dicts[5]["Elo 1"]
+    assert math.isnan(list_of_dicts[6]["Elo 1"])
+    assert engine["Matches rated"] == len(list_of_dicts)
+    assert engine["Last date"] == datetime(2008, 5, 1)
+    # E has only played two matches
+    players = [player for player, rating in ratings.rating_rankings(engine, min_matches = 3)]
+    assert sorted(players) == ["A", "B", "C", "D"]
+    assert players[0] == "B"
+    assert ratings.rating_rankings(engine, top_k = 2) == ratings.rating_rankings(engine)[:2]
+
+def test_carried_on_and_streamed_ratings_match():
+    list_of_dicts = make_matches()
+    engine = ratings.assign_elo_ratings(list_of_dicts)
+
+    # rating the last tournament later with the engine kept from the others
+    carried_on = make_matches()
+    tournament_index = data.build_tournament_index(carried_on)
+    kept_engine = ratings.assign_elo_ratings(carried_on, tournament_index = tournament_index[:2])
+    ratings.assign_elo_ratings(carried_on, tournament_index = tournament_index[2:],
+                               engine = kept_engine)
+    assert kept_engine == engine
+
+    tournaments = [make_matches()[tournament["Start"]:tournament["End"] + 1] for
+                   tournament in tournament_index]
+    streamed = [dic for tournament in ratings.stream_elo_ratings(tournaments) for
+                dic in tournament]
+    for rows in (carried_on, streamed):
+        for dic, expected in zip(rows, list_of_dicts):
+            for key in ("Elo 1", "Elo 2"):
+                assert dic[key] == expected[key] or (math.isnan(dic[key]) and
+                                                     math.isnan(expected[key]))